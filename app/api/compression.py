@@ -0,0 +1,193 @@
+# app/api/compression.py
+
+"""
+ASGI middleware that compresses response bodies with brotli or gzip,
+whichever the client prefers in Accept-Encoding. Brotli is used only when
+the optional `brotli` package is installed.
+
+Small bodies and responses that are already encoded pass through.
+Streamed bodies are compressed chunk by chunk and flushed after each
+chunk. Each encoding is a different representation, so a strong ETag gets
+a `-br` / `-gzip` suffix, which `etag_matches` ignores when comparing. A 304
+keeps the suffix of the validator the client sent, so it names the same
+representation as the 200 it revalidates.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # optional: brotli encoding
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Best supported encoding for an Accept-Encoding header (brotli first
+    on equal q-values), or None.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    available = [e for e in ENCODINGS if e != "br" or brotli is not None]
+    best = max(available, key=lambda e: weights.get(e, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for encoding in ENCODINGS:
+        if tag.endswith(f"-{encoding}"):
+            return tag[: -len(encoding) - 1]
+    return tag
+
+
+def _suffixed(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _strong(etag: Optional[str]) -> bool:
+    return bool(etag) and not etag.startswith("W/") and etag.endswith('"')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak If-None-Match comparison that sees through encoding suffixes.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == target for tag in if_none_match.split(","))
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        responder = _Responder(self, encoding, if_none_match, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        if_none_match: str,
+        send: Send,
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            if "content-encoding" not in headers:
+                headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if self._start["status"] == 304 and _strong(etag):
+                # the client revalidates the encoded 200 it holds
+                tags = {t.strip() for t in self.if_none_match.split(",")}
+                if _suffixed(etag, self.encoding) in tags:
+                    headers["ETag"] = _suffixed(etag, self.encoding)
+            if (
+                "content-encoding" in headers
+                or self._start["status"] in (204, 304)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = _Compressor(
+                self.encoding,
+                self.middleware.gzip_level,
+                self.middleware.brotli_quality,
+            )
+            headers["Content-Encoding"] = self.encoding
+            if _strong(etag):
+                headers["ETag"] = _suffixed(etag, self.encoding)
+            data = self._compressor.compress(body, final=not more_body)
+            if more_body:
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                headers["Content-Length"] = str(len(data))
+            await self._send(self._start)
+            await self._send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+            return
+
+        data = self._compressor.compress(body, final=not more_body)
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
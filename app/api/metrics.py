@@ -0,0 +1,54 @@
+# app/api/metrics.py
+
+"""
+Request latency middleware and the GET /metrics route.
+"""
+
+import time
+
+from fastapi import APIRouter, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REQUEST_LATENCY, exposition
+
+router = APIRouter()
+
+
+class MetricsMiddleware:
+    """
+    Observe every HTTP request in REQUEST_LATENCY, labelled by route
+    template (e.g. /api/v1/costs/aws) rather than raw path, so label
+    cardinality stays bounded. Streamed bodies count until their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI's router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(
+                time.perf_counter() - start
+            )
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = exposition()
+    return Response(body, media_type=content_type)
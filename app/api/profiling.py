@@ -0,0 +1,108 @@
+# app/api/profiling.py
+
+"""
+Opt-in request profiling middleware and the /admin/profiles routes.
+
+A request is profiled when it carries a valid X-Profile-Token header, or
+at random with probability PROFILING_SAMPLE_RATE. Its response then has an
+X-Profile-Id header naming the profile to fetch from /admin/profiles.
+app.main adds the middleware only when profiling is configured, so it
+costs nothing otherwise.
+"""
+
+import hmac
+import random
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import profiling
+from app.core.config import settings
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+ADMIN_PREFIX = "/admin/profiles"
+
+router = APIRouter(prefix=ADMIN_PREFIX, include_in_schema=False)
+
+
+def enabled() -> bool:
+    return bool(settings.profiling_token) or settings.profiling_sample_rate > 0
+
+
+def _authorized(token: Optional[str]) -> bool:
+    expected = settings.profiling_token
+    return bool(expected and token) and hmac.compare_digest(
+        token.encode(), expected.encode()
+    )
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _wanted(self, scope: Scope) -> bool:
+        if scope["path"].startswith(ADMIN_PREFIX):
+            return False
+        rate = settings.profiling_sample_rate
+        if rate and random.random() < rate:
+            return True
+        return _authorized(Headers(scope=scope).get(PROFILE_HEADER))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.start(
+            scope["method"], scope["path"], scope["query_string"].decode("latin-1")
+        )
+        status = None
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = str(profile.id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiling.finish(profile, status)
+
+
+def require_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    if not settings.profiling_token:
+        raise HTTPException(404, "Request profiling is disabled")
+    if not _authorized(x_profile_token):
+        raise HTTPException(403, "Invalid or missing X-Profile-Token")
+
+
+@router.get("/", dependencies=[Depends(require_token)])
+def list_profiles() -> List[Dict[str, Any]]:
+    """The buffered profiles, newest first."""
+    return [p.summary() for p in profiling.profiles.list()]
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_token)])
+def get_profile(
+    profile_id: int,
+    profile_format: Literal["speedscope", "collapsed"] = Query(
+        "speedscope", alias="format"
+    ),
+) -> Response:
+    """One profile as speedscope JSON (default) or collapsed stacks."""
+    profile = profiling.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(404, f"No buffered profile {profile_id}")
+    if profile_format == "collapsed":
+        return PlainTextResponse(profiling.collapsed(profile))
+    filename = f"profile-{profile.id}.speedscope.json"
+    return JSONResponse(
+        profiling.speedscope(profile),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
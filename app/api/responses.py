@@ -0,0 +1,247 @@
+# app/api/responses.py
+
+"""
+Response helpers for the cost routes: opt-in cursor pagination,
+streaming NDJSON / CSV bodies built chunk by chunk from a DataFrame, and
+JSON bodies encoded straight from the frame's columns; plus the
+ETag / Last-Modified validators that let unchanged data answer 304.
+
+The frames come from our own stores, so JSON bodies skip per-row
+`response_model` validation. The models still document the routes in
+OpenAPI.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
+
+import orjson
+import pandas as pd
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.api.compression import etag_matches
+from app.core.config import settings
+from app.core.metrics import timed
+from app.services.cost_service import OUTPUT_COLUMNS, data_version
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+STREAM_MEDIA_TYPES = (NDJSON, CSV)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DATA_VERSION_HEADER = "X-Data-Version"
+
+# `format` query parameter: one object per row, or one array per column
+ResponseFormat = Literal["records", "columnar"]
+
+# OpenAPI description of the alternative bodies a cost route can return
+STREAM_RESPONSES: Dict[Union[int, str], Dict] = {
+    200: {
+        "content": {NDJSON: {}, CSV: {}},
+        "description": (
+            "JSON array by default, or with `format=columnar` one object of "
+            "per-column arrays (`{provider: [...], date: [...], ...}`); "
+            "newline-delimited JSON or CSV, streamed, when requested via "
+            f"`Accept: {NDJSON}` or `Accept: {CSV}`. "
+            f"With `limit`, the `{NEXT_CURSOR_HEADER}` header carries the "
+            "cursor of the next page."
+        ),
+    },
+    410: {"description": "The data changed since the cursor was issued"},
+}
+
+
+def encode_cursor(offset: int, version: Optional[str] = None) -> str:
+    raw = json.dumps({"o": offset, "v": version}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        fields = json.loads(base64.urlsafe_b64decode(padded))
+        offset, version = fields["o"], fields.get("v")
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(400, "Invalid cursor")
+    return offset, version
+
+
+def paginate(
+    df: pd.DataFrame,
+    limit: Optional[int],
+    cursor: Optional[str],
+    version: Optional[str] = None,
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Slice one page out of a date-ordered frame. Returns the page and the
+    cursor of the next one (None on the last page or without `limit`).
+
+    A cursor is a row offset bound to the data `version` it was issued
+    for: once an ingestion changes the rows, offsets would skip or repeat
+    records, so an old cursor is answered with 410 instead.
+    """
+    offset = 0
+    if cursor:
+        offset, issued_for = decode_cursor(cursor)
+        if issued_for != version:
+            raise HTTPException(
+                410, "The data changed since this cursor was issued: start over"
+            )
+    if limit is None:
+        return df.iloc[offset:], None
+    end = offset + limit
+    next_cursor = encode_cursor(end, version) if end < len(df) else None
+    return df.iloc[offset:end], next_cursor
+
+
+def stream_media_type(request: Request) -> Optional[str]:
+    """
+    The streaming media type asked for in the Accept header, if any.
+    """
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in STREAM_MEDIA_TYPES:
+            return media_type
+    return None
+
+
+def _chunks(df: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    size = settings.stream_chunk_rows
+    for start in range(0, len(df), size):
+        chunk = df.iloc[start : start + size][OUTPUT_COLUMNS]  # noqa: E203
+        yield chunk.assign(date=chunk["date"].dt.strftime("%Y-%m-%d"))
+
+
+def iter_ndjson(df: pd.DataFrame) -> Iterator[str]:
+    for chunk in _chunks(df):
+        with timed("serialize.ndjson"):
+            body = chunk.to_json(orient="records", lines=True, force_ascii=False)
+        yield body
+
+
+def iter_csv(df: pd.DataFrame) -> Iterator[str]:
+    header = True
+    for chunk in _chunks(df):
+        with timed("serialize.csv"):
+            body = chunk.to_csv(index=False, header=header)
+        yield body
+        header = False
+
+
+def column_values(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """
+    OUTPUT_COLUMNS as JSON-ready lists: dates as YYYY-MM-DD strings,
+    categoricals as plain strings.
+    """
+    values: Dict[str, List[Any]] = {}
+    for col in OUTPUT_COLUMNS:
+        series = df[col]
+        if col == "date":
+            values[col] = series.to_numpy("datetime64[D]").astype(str).tolist()
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            values[col] = series.astype(str).tolist()
+        else:
+            values[col] = series.tolist()
+    return values
+
+
+def json_records(df: pd.DataFrame) -> bytes:
+    """
+    The frame as a JSON array of objects, in CostItem field order.
+    """
+    with timed("serialize.records"):
+        values = column_values(df)
+        return orjson.dumps([dict(zip(values, row)) for row in zip(*values.values())])
+
+
+def json_columns(df: pd.DataFrame) -> bytes:
+    with timed("serialize.columnar"):
+        return orjson.dumps(column_values(df))
+
+
+def cache_validators(request: Request, providers: Iterable[str]) -> Dict[str, str]:
+    """
+    ETag, Last-Modified and Cache-Control headers for a response built
+    from `providers`' data. The ETag hashes the route, its query parameters
+    and requested media type, and each provider's data version; nothing is
+    read but the version.
+    """
+    digest = hashlib.sha256(request.url.path.encode())
+    for key, value in sorted(request.query_params.multi_items()):
+        digest.update(f"&{key}={value}".encode())
+    digest.update(f"|{stream_media_type(request) or JSON}".encode())
+    modified = 0.0
+    version = hashlib.sha256()
+    for provider in providers:
+        token, last_modified = data_version(provider)
+        digest.update(f"|{provider}={token}".encode())
+        version.update(f"|{provider}={token}".encode())
+        modified = max(modified, last_modified)
+    return {
+        "ETag": f'"{digest.hexdigest()[:32]}"',
+        "Last-Modified": formatdate(modified, usegmt=True),
+        # binds pagination cursors to the data they page through
+        DATA_VERSION_HEADER: version.hexdigest()[:16],
+        # cache, but revalidate every time: data changes only on ingestion
+        "Cache-Control": "no-cache",
+    }
+
+
+def not_modified(request: Request, validators: Dict[str, str]) -> Optional[Response]:
+    """
+    A 304 response when the client's If-None-Match (or, without one,
+    If-Modified-Since) still matches `validators`.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, validators["ETag"])
+    else:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            modified = parsedate_to_datetime(validators["Last-Modified"])
+            fresh = modified <= since
+        except (KeyError, TypeError, ValueError):
+            fresh = False
+    return Response(status_code=304, headers=validators) if fresh else None
+
+
+def cost_response(
+    request: Request,
+    df: pd.DataFrame,
+    limit: Optional[int],
+    cursor: Optional[str],
+    not_found: str,
+    response_format: ResponseFormat = "records",
+    validators: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Render a filtered cost frame as a (paginated) JSON list or column
+    object, or as a streamed NDJSON/CSV body when the client asks for one.
+    `validators` (see `cache_validators`) are added to the headers, and
+    their data version binds the pagination cursors.
+    """
+    version = (validators or {}).get(DATA_VERSION_HEADER)
+    page, next_cursor = paginate(df, limit, cursor, version)
+    if page.empty:
+        raise HTTPException(404, not_found)
+
+    headers = dict(validators or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if response_format == "columnar":
+        return Response(json_columns(page), media_type=JSON, headers=headers)
+    media_type = stream_media_type(request)
+    if media_type == NDJSON:
+        return StreamingResponse(iter_ndjson(page), media_type=NDJSON, headers=headers)
+    if media_type == CSV:
+        return StreamingResponse(iter_csv(page), media_type=CSV, headers=headers)
+
+    return Response(json_records(page), media_type=JSON, headers=headers)
@@ -0,0 +1,62 @@
+# app/api/routes/v1/anomalies.py
+
+from datetime import date
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel, Field
+
+from app.services import anomalies
+
+router = APIRouter(prefix="/anomalies", tags=["anomalies"])
+
+
+class AnomalyItem(BaseModel):
+    provider: Literal["AWS", "Azure", "GCP"] = Field(..., example="AWS")
+    adate: date = Field(
+        ...,
+        alias="date",
+        description="Day of the anomalous cost (YYYY-MM-DD)",
+        example="2025-06-30",
+    )
+    service: str = Field(..., example="AmazonEC2")
+    cost_usd: float = Field(..., description="Actual daily cost", example=912.4)
+    expected_usd: float = Field(
+        ..., description="Baseline for that weekday", example=151.08
+    )
+    zscore: float = Field(
+        ..., description="Deviation in residual standard deviations", example=6.3
+    )
+
+    class Config:
+        validate_by_name = True
+        from_attributes = True
+
+
+@router.get(
+    "/",
+    summary="Detected cost anomalies",
+    description=(
+        "Days whose cost deviates from the series' EWMA baseline by more "
+        "than ANOMALY_Z_THRESHOLD standard deviations. Flags are computed "
+        "incrementally on ingestion; this endpoint only reads them."
+    ),
+    response_model=List[AnomalyItem],
+)
+def list_anomalies(
+    provider: Optional[Literal["AWS", "Azure", "GCP"]] = Query(
+        None, description="Filter by provider"
+    ),
+    service: Optional[str] = Query(
+        None, description="Filter by service", examples="AmazonEC2"
+    ),
+    start_date: Optional[date] = Query(
+        None, description="Start date YYYY-MM-DD", examples="2025-01-01"
+    ),
+    end_date: Optional[date] = Query(
+        None, description="End date YYYY-MM-DD", examples="2025-01-31"
+    ),
+):
+    df = anomalies.flags(provider, service, start_date, end_date)
+    df = df.assign(date=df["date"].dt.date)
+    return df.to_dict(orient="records")
@@ -1,16 +1,25 @@
 # app/api/routes/v1/costs.py
 
 from datetime import date
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
+from app.api.responses import (
+    STREAM_RESPONSES,
+    ResponseFormat,
+    cache_validators,
+    cost_response,
+    not_modified,
+)
+from app.services import rollups
 from app.services.cost_service import (
-    get_aws_cost_data,
-    get_azure_cost_data,
-    get_cost_data,
-    get_gcp_cost_data,
+    PROVIDER_FILES,
+    aget_cost_frame,
+    aget_provider_cost_frame,
+    cache_stats,
 )
 
 router = APIRouter(prefix="/costs", tags=["costs"])
@@ -44,13 +53,34 @@ class CostItem(BaseModel):
         from_attributes = True  # renamed from orm_mode
 
 
+SummaryField = Literal["provider", "service", "account_id", "region", "month", "week"]
+
+
+class SummaryItem(BaseModel):
+    provider: Optional[str] = Field(None, example="AWS")
+    service: Optional[str] = Field(None, example="AmazonEC2")
+    account_id: Optional[str] = Field(None, example="123456789012")
+    region: Optional[str] = Field(None, example="us-east-1")
+    month: Optional[str] = Field(
+        None, description="Calendar month (YYYY-MM)", example="2025-06"
+    )
+    week: Optional[str] = Field(
+        None, description="Monday of the ISO week (YYYY-MM-DD)", example="2025-06-30"
+    )
+    cost_usd: float = Field(..., description="Total cost in USD", example=4213.77)
+    records: int = Field(
+        ..., description="Number of raw cost rows aggregated", example=31
+    )
+
+
 @router.get(
     "/",
     summary="Unified cost data (AWS + Azure + GCP)",
     response_model=List[CostItem],
-    responses={404: {"description": "No cost data found"}},
+    responses={**STREAM_RESPONSES, 404: {"description": "No cost data found"}},
 )
-def unified_costs(
+async def unified_costs(
+    request: Request,
     service: Optional[str] = Query(
         None, description="Filter by service", examples="AmazonEC2"
     ),
@@ -60,24 +90,94 @@ def unified_costs(
     end_date: Optional[date] = Query(
         None, description="End date YYYY-MM-DD", examples="2025-01-31"
     ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100_000, description="Page size (enables pagination)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    response_format: ResponseFormat = Query(
+        "records", alias="format", description="JSON rows or per-column arrays"
+    ),
 ):
-    results = get_cost_data(
+    validators = cache_validators(request, PROVIDER_FILES)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    df = await aget_cost_frame(
         service=service,
         start_date=start_date,
         end_date=end_date,
     )
-    if not results:
-        raise HTTPException(404, "No cost data for the specified filters")
-    return results
+    # paging and JSON encoding are CPU-bound: keep them off the loop
+    return await run_in_threadpool(
+        cost_response,
+        request,
+        df,
+        limit,
+        cursor,
+        "No cost data for the specified filters",
+        response_format,
+        validators,
+    )
+
+
+@router.get(
+    "/summary",
+    summary="Aggregated cost totals",
+    description=(
+        "Cost totals grouped by any combination of provider, service, "
+        "account_id, region, month and week, served from rollups that are "
+        "updated incrementally on ingestion."
+    ),
+    response_model=List[SummaryItem],
+    response_model_exclude_none=True,
+)
+def cost_summary(
+    request: Request,
+    response: Response,
+    group_by: List[SummaryField] = Query(
+        ["provider"], description="Dimensions to group by (repeatable)"
+    ),
+    provider: Optional[Literal["AWS", "Azure", "GCP"]] = Query(
+        None, description="Filter by provider"
+    ),
+    service: Optional[str] = Query(
+        None, description="Filter by service", examples="AmazonEC2"
+    ),
+    start_date: Optional[date] = Query(
+        None, description="Start date YYYY-MM-DD", examples="2025-01-01"
+    ),
+    end_date: Optional[date] = Query(
+        None, description="End date YYYY-MM-DD", examples="2025-01-31"
+    ),
+):
+    validators = cache_validators(request, [provider] if provider else PROVIDER_FILES)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    response.headers.update(validators)
+    df = rollups.summarize(
+        group_by,
+        start_date=start_date,
+        end_date=end_date,
+        provider=provider,
+        service=service,
+    )
+    return df.to_dict(orient="records")
 
 
 @router.get(
     "/aws",
     summary="AWS cost data",
     response_model=List[CostItem],
-    responses={404: {"description": "No AWS cost data found"}},
+    responses={
+        **STREAM_RESPONSES,
+        404: {"description": "No AWS cost data found"},
+    },
 )
-def aws_costs(
+async def aws_costs(
+    request: Request,
     service: Optional[str] = Query(
         None, description="Filter by AWS service", examples="AmazonEC2"
     ),
@@ -87,24 +187,50 @@ def aws_costs(
     end_date: Optional[date] = Query(
         None, description="End date YYYY-MM-DD", examples="2025-01-31"
     ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100_000, description="Page size (enables pagination)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    response_format: ResponseFormat = Query(
+        "records", alias="format", description="JSON rows or per-column arrays"
+    ),
 ):
-    results = get_aws_cost_data(
+    validators = cache_validators(request, ["AWS"])
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    df = await aget_provider_cost_frame(
+        "AWS",
         service=service,
         start_date=start_date,
         end_date=end_date,
     )
-    if not results:
-        raise HTTPException(404, "No AWS cost data for the specified filters")
-    return results
+    # paging and JSON encoding are CPU-bound: keep them off the loop
+    return await run_in_threadpool(
+        cost_response,
+        request,
+        df,
+        limit,
+        cursor,
+        "No AWS cost data for the specified filters",
+        response_format,
+        validators,
+    )
 
 
 @router.get(
     "/azure",
     summary="Azure cost data",
     response_model=List[CostItem],
-    responses={404: {"description": "No Azure cost data found"}},
+    responses={
+        **STREAM_RESPONSES,
+        404: {"description": "No Azure cost data found"},
+    },
 )
-def azure_costs(
+async def azure_costs(
+    request: Request,
     service: Optional[str] = Query(
         None, description="Filter by Azure service", examples="Virtual Machines"
     ),
@@ -114,24 +240,50 @@ def azure_costs(
     end_date: Optional[date] = Query(
         None, description="End date YYYY-MM-DD", examples="2025-01-31"
     ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100_000, description="Page size (enables pagination)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    response_format: ResponseFormat = Query(
+        "records", alias="format", description="JSON rows or per-column arrays"
+    ),
 ):
-    results = get_azure_cost_data(
+    validators = cache_validators(request, ["Azure"])
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    df = await aget_provider_cost_frame(
+        "Azure",
         service=service,
         start_date=start_date,
         end_date=end_date,
     )
-    if not results:
-        raise HTTPException(404, "No Azure cost data for the specified filters")
-    return results
+    # paging and JSON encoding are CPU-bound: keep them off the loop
+    return await run_in_threadpool(
+        cost_response,
+        request,
+        df,
+        limit,
+        cursor,
+        "No Azure cost data for the specified filters",
+        response_format,
+        validators,
+    )
 
 
 @router.get(
     "/gcp",
     summary="GCP cost data",
     response_model=List[CostItem],
-    responses={404: {"description": "No GCP cost data found"}},
+    responses={
+        **STREAM_RESPONSES,
+        404: {"description": "No GCP cost data found"},
+    },
 )
-def gcp_costs(
+async def gcp_costs(
+    request: Request,
     service: Optional[str] = Query(
         None, description="Filter by GCP service", examples="Compute Engine"
     ),
@@ -141,12 +293,43 @@ def gcp_costs(
     end_date: Optional[date] = Query(
         None, description="End date YYYY-MM-DD", examples="2025-01-31"
     ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100_000, description="Page size (enables pagination)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    response_format: ResponseFormat = Query(
+        "records", alias="format", description="JSON rows or per-column arrays"
+    ),
 ):
-    results = get_gcp_cost_data(
+    validators = cache_validators(request, ["GCP"])
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+    df = await aget_provider_cost_frame(
+        "GCP",
         service=service,
         start_date=start_date,
         end_date=end_date,
     )
-    if not results:
-        raise HTTPException(404, "No GCP cost data for the specified filters")
-    return results
+    # paging and JSON encoding are CPU-bound: keep them off the loop
+    return await run_in_threadpool(
+        cost_response,
+        request,
+        df,
+        limit,
+        cursor,
+        "No GCP cost data for the specified filters",
+        response_format,
+        validators,
+    )
+
+
+@router.get(
+    "/cache",
+    summary="Cost data cache statistics",
+    description="Hit/miss counters and memory usage of the in-process cache.",
+)
+def costs_cache() -> Dict[str, Any]:
+    return cache_stats()
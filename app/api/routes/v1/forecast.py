@@ -0,0 +1,76 @@
+# app/api/routes/v1/forecast.py
+
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app.services import forecasting
+from app.services.cost_service import get_cost_frame, get_provider_cost_frame
+
+router = APIRouter(prefix="/forecast", tags=["forecast"])
+
+
+class ForecastItem(BaseModel):
+    provider: Literal["AWS", "Azure", "GCP"] = Field(..., example="AWS")
+    fdate: date = Field(
+        ...,
+        alias="date",
+        description="Forecast day (YYYY-MM-DD)",
+        example="2025-07-01",
+    )
+    service: str = Field(..., example="AmazonEC2")
+    cost_usd: float = Field(
+        ..., description="Predicted daily cost in USD", example=151.08
+    )
+
+    class Config:
+        validate_by_name = True
+        from_attributes = True
+
+
+@router.get(
+    "/",
+    summary="Daily cost forecast per provider and service",
+    description=(
+        "Forecasts the next `horizon_days` days of every (provider, service) "
+        "daily cost series with one XGBoost model per series. Models are "
+        "trained in a process pool and cached by a hash of their input "
+        "series, so only series with new data are retrained."
+    ),
+    response_model=List[ForecastItem],
+    responses={404: {"description": "No cost data found"}},
+)
+def cost_forecast(
+    provider: Optional[Literal["AWS", "Azure", "GCP"]] = Query(
+        None, description="Filter by provider"
+    ),
+    service: Optional[str] = Query(
+        None, description="Filter by service", examples="AmazonEC2"
+    ),
+    horizon_days: int = Query(30, ge=1, le=366, description="Days to forecast"),
+    start_date: Optional[date] = Query(
+        None, description="First day of training history", examples="2025-01-01"
+    ),
+    end_date: Optional[date] = Query(
+        None, description="Last day of training history", examples="2025-06-30"
+    ),
+):
+    if provider:
+        df = get_provider_cost_frame(provider, service, start_date, end_date)
+    else:
+        df = get_cost_frame(service=service, start_date=start_date, end_date=end_date)
+    result = forecasting.forecast(df, horizon_days)
+    if result.empty:
+        raise HTTPException(404, "Not enough cost history to forecast")
+    return result.to_dict(orient="records")
+
+
+@router.get(
+    "/cache",
+    summary="Forecast model cache statistics",
+    description="Cached models and forecasts, and models trained so far.",
+)
+def forecast_cache() -> Dict[str, Any]:
+    return forecasting.cache_stats()
@@ -1,17 +1,15 @@
 # app/api/routes/v1/ingestion.py
 
-import os
-from datetime import date
-from typing import Any, Dict
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from app.services.ingestion.aws_ingest import AwsIngest
-from app.services.ingestion.azure_ingest import AzureIngest
-from app.services.ingestion.gcp_ingest import GcpIngest
-from app.services.ingestion.loader import save
-from app.services.ingestion.normalizer import normalize
+from app.services.ingestion import watermarks
+from app.services.ingestion.clients import registry
+from app.services.ingestion.jobs import jobs
+from app.services.ingestion.runner import PROVIDERS
 
 router = APIRouter(
     prefix="/ingestion",
@@ -22,60 +20,156 @@ router = APIRouter(
     },
 )
 
+Provider = Literal["AWS", "Azure", "GCP"]
+
 
 class IngestRequest(BaseModel):
-    start: date = Field(
-        ...,
-        description="Start date (inclusive) for ingestion (YYYY-MM-DD)",
+    start: Optional[date] = Field(
+        None,
+        description=(
+            "Start date (inclusive) for ingestion (YYYY-MM-DD). Omit for an "
+            "incremental run from each provider's watermark"
+        ),
         example="2025-01-01",
     )
-    end: date = Field(
-        ...,
-        description="End date (inclusive) for ingestion (YYYY-MM-DD)",
+    end: Optional[date] = Field(
+        None,
+        description=(
+            "End date (inclusive) for ingestion (YYYY-MM-DD). "
+            "Defaults to the last complete day"
+        ),
         example="2025-06-30",
     )
+    providers: List[Provider] = Field(
+        list(PROVIDERS), description="Providers to ingest", example=["AWS"]
+    )
+    window_days: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Window size in days (default: one window per calendar month)",
+        example=7,
+    )
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.start and self.end and self.start > self.end:
+            raise ValueError("start must not be after end")
+        return self
+
+
+class WindowStatus(BaseModel):
+    provider: Provider = Field(..., example="AWS")
+    start: date = Field(..., example="2025-01-01")
+    end: date = Field(..., example="2025-01-31")
+    status: Literal["pending", "running", "ok", "error", "timeout"] = Field(
+        ..., example="ok"
+    )
+    attempts: int = Field(..., description="Times this window has been run")
+    count: int = Field(..., description="Records ingested by this window")
+    seconds: float = Field(..., description="Fetch wall time of the last attempt")
+    error: Optional[str] = Field(None, description="Failure reason, if any")
 
 
-class IngestResponse(BaseModel):
-    status: str = Field(..., example="ok")
-    count: int = Field(..., description="Number of records ingested", example=1234)
+class JobStatus(BaseModel):
+    id: str = Field(..., example="3f2c9a0e6b8d4c1fa2e7d5b6c4a3f1e0")
+    status: Literal["queued", "running", "ok", "partial", "error"] = Field(
+        ..., example="running"
+    )
+    start: Optional[date] = None
+    end: Optional[date] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    windows_total: int = Field(..., example=18)
+    windows_done: int = Field(..., example=7)
+    windows_failed: int = Field(..., example=1)
+    progress: float = Field(..., description="Share of windows done (0-1)")
+    count: int = Field(..., description="Number of records ingested so far")
+    records_per_second: float = Field(..., description="Ingestion throughput")
+    windows: Optional[List[WindowStatus]] = None
 
 
 @router.post(
     "/",
-    summary="Trigger ingestion of cost data from all providers",
+    summary="Start an ingestion job for the given providers and date range",
     description=(
-        "Fetch raw cost data from AWS, Azure, GCP for the given date range, "
-        "normalize it, and save to CSV files."
+        "Split the date range into per-month (or `window_days`) windows per "
+        "provider and ingest them in the background on a bounded worker "
+        "pool. Without `start`, each provider resumes from its watermark "
+        "minus the restatement lookback. Rows are upserted, so overlapping "
+        "runs never duplicate data. Returns immediately with the job id; "
+        "poll `GET /ingestion/jobs/{id}` for progress. Jobs are stored under "
+        "`app/data`, so any API worker process can report or retry them, and "
+        "a window is never ingested by two processes at once."
     ),
-    response_model=IngestResponse,
+    response_model=JobStatus,
+    status_code=202,
+)
+def ingest_all(payload: IngestRequest):
+    return jobs.submit(
+        payload.start,
+        payload.end,
+        providers=payload.providers,
+        window_days=payload.window_days,
+    )
+
+
+@router.get(
+    "/watermarks",
+    summary="Last completely ingested day per provider",
+    response_model=Dict[str, date],
+)
+def get_watermarks():
+    return watermarks.load()
+
+
+@router.get(
+    "/clients",
+    summary="Shared provider SDK clients",
+    description="Setup time, age and credential refresh count per client.",
+)
+def get_clients() -> Dict[str, Dict[str, Any]]:
+    return registry.stats()
+
+
+@router.get(
+    "/jobs",
+    summary="Recent ingestion jobs",
+    response_model=List[JobStatus],
+    response_model_exclude_none=True,
+)
+def list_jobs():
+    return jobs.list()
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Progress of an ingestion job",
+    response_model=JobStatus,
+    responses={404: {"description": "Unknown job"}},
+)
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown ingestion job {job_id!r}")
+    return job
+
+
+@router.post(
+    "/jobs/{job_id}/retry",
+    summary="Retry the failed windows of an ingestion job",
+    response_model=JobStatus,
+    status_code=202,
+    responses={
+        404: {"description": "Unknown job"},
+        409: {"description": "Job, or a timed-out window, still running"},
+    },
 )
-async def ingest_all(payload: IngestRequest) -> Dict[str, Any]:
-    # AWS
-    aws = AwsIngest(profile_name="", region_name="")
-    raw_aws = aws.fetch(payload.start, payload.end)
-
-    # Azure
-    sub_id = os.getenv("AZURE_SUBSCRIPTION_ID")
-    if not sub_id:
-        raise HTTPException(500, "Missing AZURE_SUBSCRIPTION_ID environment variable")
-    azure = AzureIngest(subscription_id=sub_id)
-    raw_az = azure.fetch(payload.start, payload.end)
-
-    # GCP
-    proj = os.getenv("GCP_PROJECT_ID")
-    ds = os.getenv("GCP_DATASET")
-    tbl = os.getenv("GCP_TABLE")
-    if not (proj and ds and tbl):
-        raise HTTPException(
-            500,
-            "Missing GCP_PROJECT_ID, GCP_DATASET, or GCP_TABLE environment variables",
-        )
-    gcp = GcpIngest(project_id=proj, dataset=ds, table=tbl)
-    raw_gcp = gcp.fetch(payload.start, payload.end)
-
-    # Normalize and save
-    unified = normalize(raw_aws, raw_az, raw_gcp)
-    save(unified)
-
-    return IngestResponse(status="ok", count=len(unified)).dict()
+def retry_job(job_id: str):
+    try:
+        job = jobs.retry(job_id)
+    except ValueError as exc:
+        raise HTTPException(409, str(exc))
+    if job is None:
+        raise HTTPException(404, f"Unknown ingestion job {job_id!r}")
+    return job
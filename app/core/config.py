@@ -0,0 +1,249 @@
+# app/core/config.py
+
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Runtime configuration, read from environment variables (or a .env file).
+    Variable names are case-insensitive, e.g. COST_CACHE_MAX_BYTES.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # ─── API process ─────────────────────────────────────────────────────────
+    api_read_only: bool = Field(
+        False,
+        description="Serve a read-only replica: no ingestion routes, and no "
+        "ingestion SDK clients built or refreshed",
+    )
+
+    # ─── cost frame cache ────────────────────────────────────────────────────
+    cost_cache_max_bytes: int = Field(
+        512 * 1024 * 1024,
+        description="Memory cap for cached provider DataFrames (bytes)",
+    )
+    cost_cache_warmup: bool = Field(
+        True,
+        description="Load every provider CSV into the cache at startup",
+    )
+    etl_block_bytes: int = Field(
+        16 * 1024 * 1024,
+        description="CSV bytes parsed per block when loading a provider file",
+    )
+
+    # ─── cost storage ────────────────────────────────────────────────────────
+    cost_storage: Literal["parquet", "csv", "database"] = Field(
+        "parquet",
+        description="Where loader.save writes: Parquet store, flat CSV, or the "
+        "DATABASE_URL cost repository",
+    )
+    cost_store_row_group_size: int = Field(
+        64 * 1024,
+        description="Rows per Parquet row group in the cost store",
+    )
+    database_url: str = Field(
+        "",
+        description="postgresql://... for PostgreSQL, or sqlite:///path "
+        "(empty = SQLite in app/data/costs.db)",
+    )
+    database_pool_min_size: int = Field(
+        1,
+        description="Minimum asyncpg connections kept open",
+    )
+    database_pool_max_size: int = Field(
+        10,
+        description="Maximum asyncpg connections",
+    )
+    database_providers_ttl_seconds: float = Field(
+        5.0,
+        description="How long a process trusts its last read of cost_providers; "
+        "bounds how late it sees writes by other replicas",
+    )
+
+    # ─── ingestion ───────────────────────────────────────────────────────────
+    ingestion_max_workers: int = Field(
+        3,
+        description="Threads available to run blocking provider fetches",
+    )
+    ingestion_provider_timeout_seconds: float = Field(
+        600.0,
+        description="Per-provider fetch timeout for an ingestion window",
+    )
+    ingestion_clients_warmup: bool = Field(
+        False,
+        description="Build the shared provider SDK clients at startup",
+    )
+    ingestion_client_pool_size: int = Field(
+        10,
+        description="HTTP connections kept per shared provider client",
+    )
+    ingestion_client_max_age_seconds: float = Field(
+        12 * 3600,
+        description="Rebuild a shared provider client after this age (0 = never)",
+    )
+    ingestion_credential_refresh_interval: float = Field(
+        60.0,
+        description="Seconds between background credential expiry checks",
+    )
+    ingestion_credential_refresh_margin: int = Field(
+        600,
+        description="Refresh credentials expiring within this many seconds",
+    )
+    ingestion_lookback_days: int = Field(
+        3,
+        description="Days before the watermark re-fetched by incremental runs",
+    )
+    ingestion_initial_days: int = Field(
+        90,
+        description="Days fetched by an incremental run with no watermark yet",
+    )
+    ingestion_job_history: int = Field(
+        100,
+        description="Ingestion jobs kept in memory for the progress API",
+    )
+    ingestion_batch_rows: int = Field(
+        50000,
+        description="Normalized rows buffered before a streamed ingestion "
+        "flushes them to storage (0 = flush every page)",
+    )
+    ingestion_throttle_max_retries: int = Field(
+        6,
+        description="Retries of a throttled provider request before failing",
+    )
+    ingestion_throttle_base_delay_seconds: float = Field(
+        1.0,
+        description="First backoff delay after a throttled request (doubles)",
+    )
+
+    # ─── AWS Cost Explorer ───────────────────────────────────────────────────
+    aws_ce_requests_per_second: float = Field(
+        5.0,
+        description="Cost Explorer requests per second shared by all fetches",
+    )
+    aws_ce_concurrency: int = Field(
+        4,
+        description="Date sub-ranges fetched concurrently by one AWS window",
+    )
+    aws_ce_chunk_days: int = Field(
+        7,
+        description="Days per concurrently fetched Cost Explorer sub-range",
+    )
+    aws_ce_group_by: str = Field(
+        "",
+        description="Extra Cost Explorer GroupBy dimension besides SERVICE: "
+        "LINKED_ACCOUNT or REGION (empty = service only)",
+    )
+
+    # ─── Azure Cost Management ───────────────────────────────────────────────
+    azure_requests_per_second: float = Field(
+        1.0,
+        description="Cost Management queries per second shared by all fetches",
+    )
+    azure_concurrency: int = Field(
+        4,
+        description="Month windows queried concurrently by one Azure fetch",
+    )
+    azure_group_by: str = Field(
+        "",
+        description="Extra Azure grouping besides ServiceName: "
+        "ResourceGroupName or Meter (empty = service only)",
+    )
+
+    # ─── GCP BigQuery export ─────────────────────────────────────────────────
+    gcp_storage_api: bool = Field(
+        True,
+        description="Download GCP results through the BigQuery Storage Read API "
+        "when google-cloud-bigquery-storage is installed",
+    )
+    gcp_group_by: str = Field(
+        "",
+        description="Extra GCP grouping besides service, comma-separated: "
+        "project, region, sku",
+    )
+
+    # ─── forecasting ─────────────────────────────────────────────────────────
+    forecast_workers: int = Field(
+        0,
+        description="Processes that train forecast models (0 = one per CPU)",
+    )
+    forecast_chunk_series: int = Field(
+        25,
+        description="Series trained per process-pool task",
+    )
+    forecast_model_cache_size: int = Field(
+        10000,
+        description="Fitted models (and forecasts) kept in memory, LRU",
+    )
+    forecast_min_history_days: int = Field(
+        14,
+        description="Series with fewer days of history are not forecast",
+    )
+
+    # ─── anomaly detection ───────────────────────────────────────────────────
+    anomaly_ewma_alpha: float = Field(
+        0.1,
+        description="Smoothing factor of the EWMA level and residual variance",
+    )
+    anomaly_season_alpha: float = Field(
+        0.2,
+        description="Smoothing factor of the per-weekday seasonal offsets",
+    )
+    anomaly_z_threshold: float = Field(
+        3.0,
+        description="Residual z-score above which a day is flagged",
+    )
+    anomaly_min_cost_usd: float = Field(
+        1.0,
+        description="Smallest absolute deviation from the baseline flagged",
+    )
+    anomaly_min_history_days: int = Field(
+        14,
+        description="Days a series is observed before it can be flagged",
+    )
+    anomaly_settle_days: int = Field(
+        2,
+        description="Most recent days left unscored while providers revise them",
+    )
+    anomaly_max_lookback_days: int = Field(
+        62,
+        description="Days before its earliest row a save re-reads for days "
+        "not scored yet (a provider's first save reads all history)",
+    )
+
+    # ─── API responses ───────────────────────────────────────────────────────
+    stream_chunk_rows: int = Field(
+        5000,
+        description="Rows serialized per chunk in streamed NDJSON/CSV bodies",
+    )
+    response_compression_min_bytes: int = Field(
+        1024,
+        description="Smallest response body compressed with brotli/gzip",
+    )
+
+    # ─── request profiling ───────────────────────────────────────────────────
+    profiling_token: str = Field(
+        "",
+        description="Secret for the X-Profile-Token header, which profiles a "
+        "request and authorizes /admin/profiles (empty = disabled)",
+    )
+    profiling_sample_rate: float = Field(
+        0.0,
+        ge=0.0,
+        le=1.0,
+        description="Share of requests profiled without the header",
+    )
+    profiling_interval_seconds: float = Field(
+        0.005,
+        description="Stack sampling interval of the request profiler",
+    )
+    profiling_buffer_size: int = Field(
+        50,
+        description="Finished request profiles kept for /admin/profiles",
+    )
+
+
+settings = Settings()
@@ -0,0 +1,138 @@
+"""
+Prometheus metrics for the API and ingestion, served at GET /metrics.
+
+Under a multi-worker server, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers before they start. prometheus_client then
+keeps each process's samples in files there, and `exposition()`
+aggregates them across workers.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+NAMESPACE = "finops"
+
+# internal stages are much faster than whole requests
+STAGE_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+INGESTION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"],
+    namespace=NAMESPACE,
+)
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Time spent in internal processing stages (ETL, filtering, serialization)",
+    ["stage"],
+    namespace=NAMESPACE,
+    buckets=STAGE_BUCKETS,
+)
+ROWS_SCANNED = Counter(
+    "rows_scanned_total",
+    "Cost rows the query filters were applied to",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+ROWS_RETURNED = Counter(
+    "rows_returned_total",
+    "Cost rows left after filtering",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+    namespace=NAMESPACE,
+)
+INGESTION_DURATION = Histogram(
+    "ingestion_duration_seconds",
+    "Duration of one provider ingestion window by outcome",
+    ["provider", "status"],
+    namespace=NAMESPACE,
+    buckets=INGESTION_BUCKETS,
+)
+INGESTION_PAGES = Counter(
+    "ingestion_pages_total",
+    "Result pages fetched from provider billing APIs",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+INGESTION_ROWS = Counter(
+    "ingestion_rows_total",
+    "Normalized cost rows saved by ingestion",
+    ["provider"],
+    namespace=NAMESPACE,
+)
+THROTTLE_RETRIES = Counter(
+    "throttle_retries_total",
+    "Provider API requests retried after being throttled",
+    ["api"],
+    namespace=NAMESPACE,
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Observe the duration of the block in STAGE_LATENCY."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def exposition() -> Tuple[bytes, str]:
+    """
+    The text exposition of every metric: this process's, or all workers'
+    under PROMETHEUS_MULTIPROC_DIR. Returns (body, content type).
+    """
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live-only samples when it shuts down."""
+    if _multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
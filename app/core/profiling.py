@@ -0,0 +1,227 @@
+"""
+Sampling profiler for individual API requests.
+
+While at least one request is being profiled, a background thread reads
+the Python stack of every other thread (`sys._current_frames`) every
+PROFILING_INTERVAL_SECONDS and adds it to each active recording. Threads
+parked in a wait (idle pool workers, the event loop's selector) are
+skipped, so a recording shows where the request's event loop and worker
+threads spent CPU and I/O time. Requests handled concurrently with a
+profiled one show up in its recording too.
+
+Finished profiles are kept in a ring buffer of the last
+PROFILING_BUFFER_SIZE and exported as collapsed stacks or speedscope JSON.
+Nothing runs unless a request is being profiled.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# (file, qualified name, first line) from root to leaf
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+# leaf frames of threads that are parked, not working
+_IDLE_LEAVES = {
+    ("threading.py", None),
+    ("selectors.py", None),
+    ("queue.py", None),
+    ("thread.py", "_worker"),  # concurrent.futures worker waiting for work
+}
+
+
+@dataclass
+class Profile:
+    id: int
+    method: str
+    path: str
+    query: str
+    started_at: datetime
+    interval: float
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+    status: Optional[int] = None
+    duration: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+        }
+
+
+def _stack(frame) -> Stack:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_filename, code.co_qualname, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def _idle(stack: Stack) -> bool:
+    filename, name, _ = stack[-1]
+    base = os.path.basename(filename)
+    return (base, None) in _IDLE_LEAVES or (base, name) in _IDLE_LEAVES
+
+
+class Sampler:
+    """
+    Shared sampling thread, running only while recordings are active.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: List[Profile] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.remove(profile)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            names = {t.ident: t.name for t in threading.enumerate()}
+            counted = Counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _stack(frame)
+                if stack and not _idle(stack):
+                    counted[(names.get(ident, str(ident)), stack)] += 1
+            for profile in active:
+                profile.stacks.update(counted)
+                profile.samples += 1
+            time.sleep(min(p.interval for p in active))
+
+
+class ProfileBuffer:
+    """The last `size` finished profiles."""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._profiles: Deque[Profile] = deque(maxlen=size)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+_sampler = Sampler()
+_ids = itertools.count(1)
+profiles = ProfileBuffer(settings.profiling_buffer_size)
+
+
+def start(method: str, path: str, query: str = "") -> Profile:
+    profile = Profile(
+        id=next(_ids),
+        method=method,
+        path=path,
+        query=query,
+        started_at=datetime.now(timezone.utc),
+        interval=settings.profiling_interval_seconds,
+    )
+    _sampler.add(profile)
+    return profile
+
+
+def finish(profile: Profile, status: Optional[int]) -> None:
+    _sampler.remove(profile)
+    profile.duration = time.perf_counter() - profile._started
+    profile.status = status
+    profiles.add(profile)
+
+
+# ─── export ─────────────────────────────────────────────────────────────────
+
+
+def _frame_name(frame: Frame) -> str:
+    filename, name, _ = frame
+    return f"{name} ({os.path.basename(filename)})"
+
+
+def collapsed(profile: Profile) -> str:
+    """
+    Brendan Gregg's collapsed stack format: `thread;root;...;leaf count`
+    per line, as read by flamegraph.pl and speedscope.
+    """
+    lines = [
+        ";".join([thread, *map(_frame_name, stack)]) + f" {count}"
+        for (thread, stack), count in profile.stacks.most_common()
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def speedscope(profile: Profile) -> Dict[str, Any]:
+    """
+    The profile as a speedscope file (https://www.speedscope.app), one
+    sampled profile per thread, weighted in milliseconds.
+    """
+    index: Dict[Frame, int] = {}
+    weight = profile.interval * 1000
+    threads: Dict[str, Dict[str, list]] = {}
+    for (thread, stack), count in profile.stacks.most_common():
+        t = threads.setdefault(thread, {"samples": [], "weights": []})
+        t["samples"].append([index.setdefault(f, len(index)) for f in stack])
+        t["weights"].append(count * weight)
+    frames = [{"name": name, "file": file, "line": line} for file, name, line in index]
+
+    name = f"{profile.method} {profile.path} #{profile.id}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "ai-finops-platform",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(t["weights"]),
+                "samples": t["samples"],
+                "weights": t["weights"],
+            }
+            for thread, t in threads.items()
+        ],
+    }
@@ -1,7 +1,21 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes.v1 import api_info, costs, ingestion
+from app.api import metrics, profiling
+from app.api.compression import CompressionMiddleware
+from app.api.metrics import MetricsMiddleware
+from app.api.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from app.api.responses import DATA_VERSION_HEADER, NEXT_CURSOR_HEADER
+from app.api.routes.v1 import anomalies, api_info, costs, forecast, ingestion
+from app.core.config import settings
+from app.core.metrics import mark_process_dead
+from app.services import forecasting
+from app.services.cost_repository import repository as cost_repository
+from app.services.cost_service import check_data_dir, warm_cache
+from app.services.ingestion.clients import registry as client_registry
 
 tags_metadata = [
     {
@@ -22,6 +36,23 @@ tags_metadata = [
     },
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_data_dir()
+    if settings.cost_cache_warmup:
+        await run_in_threadpool(warm_cache)
+    if not settings.api_read_only:
+        if settings.ingestion_clients_warmup:
+            await run_in_threadpool(client_registry.warm)
+        client_registry.start()
+    yield
+    client_registry.close()
+    forecasting.shutdown()
+    await run_in_threadpool(cost_repository.close)
+    mark_process_dead()
+
+
 app = FastAPI(
     title="AI FinOps Platform API",
     version="1.0.0",
@@ -33,6 +64,7 @@ app = FastAPI(
         {"url": "https://api.yourdomain.com", "description": "Production API"},
     ],
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
     openapi_url="/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
@@ -49,9 +81,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER,
+        DATA_VERSION_HEADER,
+        "ETag",
+        "Last-Modified",
+        PROFILE_ID_HEADER,
+    ],
+)
+# brotli/gzip for large bodies; wraps CORS, but only sets Content-Encoding,
+# Vary and the ETag, so the CORS headers pass through unchanged
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.response_compression_min_bytes
 )
+# sampled/on-demand profiles; only installed when configured
+if profiling.enabled():
+    app.add_middleware(ProfilingMiddleware)
+# outermost: request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
 # Include versioned routers
 app.include_router(api_info.router, prefix="/api/v1", tags=["info"])
-app.include_router(ingestion.router, prefix="/api/v1", tags=["ingestion"])
+if not settings.api_read_only:
+    app.include_router(ingestion.router, prefix="/api/v1", tags=["ingestion"])
 app.include_router(costs.router, prefix="/api/v1", tags=["costs"])
+app.include_router(forecast.router, prefix="/api/v1", tags=["forecast"])
+app.include_router(anomalies.router, prefix="/api/v1", tags=["anomalies"])
+app.include_router(metrics.router)
+app.include_router(profiling.router)
@@ -0,0 +1,342 @@
+"""
+Incremental cost anomaly detection behind GET /api/v1/anomalies.
+
+`loader.save` calls `apply()` right after the rollups are updated. Every
+(provider, service) daily series keeps a constant-size running state in
+app/data/anomalies/state.parquet: an EWMA level, an EWMA variance of its
+residuals and one seasonal offset per weekday. Days newer than a
+series' state are folded in one at a time, for all series at once with
+NumPy. Each day is scored before it updates the state:
+
+    expected = level + season[weekday]
+    zscore   = (cost - expected) / sqrt(variance)
+
+Days with |zscore| above ANOMALY_Z_THRESHOLD are appended to
+flags.parquet, which the endpoint reads, so history is never re-scanned.
+A day is folded only once. Providers keep revising their last few days,
+so the newest ANOMALY_SETTLE_DAYS days (in UTC, like the ingestion
+watermarks) wait for a later ingestion, and so does a provider's latest
+day, which a batched save may have only partly written. A save re-reads
+the rollups from the day after the provider's newest folded day, or from
+the earliest written day a series has not folded yet, and never more
+than ANOMALY_MAX_LOOKBACK_DAYS before the days it wrote.
+"""
+
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import settings
+from app.services import rollups
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_DIR = Path(__file__).resolve().parents[1] / "data" / "anomalies"
+
+SERIES_KEYS = ["provider", "service"]
+SEASON_COLUMNS = [f"season_{weekday}" for weekday in range(7)]
+STATE_COLUMNS = ["last_date", "n", "level", "var", *SEASON_COLUMNS]
+FLAG_COLUMNS = ["provider", "date", "service", "cost_usd", "expected_usd", "zscore"]
+
+
+def _empty_state() -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays([[], []], names=SERIES_KEYS)
+    state = pd.DataFrame(
+        {c: pd.Series(dtype="float64") for c in STATE_COLUMNS}, index=index
+    )
+    return state.astype({"last_date": "datetime64[ns]", "n": "int64"})
+
+
+def _empty_flags() -> pd.DataFrame:
+    flags = pd.DataFrame({c: pd.Series(dtype="float64") for c in FLAG_COLUMNS})
+    return flags.astype(
+        {"provider": "string", "service": "string", "date": "datetime64[ns]"}
+    )
+
+
+def _batch_series(records: Union[Iterable[Dict], pa.Table]) -> pd.Series:
+    """
+    The first date written for each (provider, service) series of
+    `records`, with services normalized as in the rollups.
+    """
+    if isinstance(records, pa.Table):
+        columns = [
+            c for c in ("provider", "service", "date") if c in records.column_names
+        ]
+        df = records.select(columns).to_pandas()
+    else:
+        df = pd.DataFrame.from_records(
+            [
+                {
+                    "provider": r["provider"],
+                    "service": r.get("service"),
+                    "date": r["date"],
+                }
+                for r in records
+            ]
+        )
+    if "service" not in df.columns:
+        df["service"] = ""
+    df["service"] = df["service"].astype("string").fillna("")
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    return df.groupby(SERIES_KEYS, sort=False)["date"].min()
+
+
+def _resume_date(state: pd.DataFrame, provider: str, series: pd.Series) -> pd.Timestamp:
+    """
+    First day a save of `series` must re-read for a provider with state.
+    Every day up to the provider's newest folded day was folded for all of
+    its series, so only later days, and the written days of each series
+    after its own state, can be new. Never more than
+    ANOMALY_MAX_LOOKBACK_DAYS before the first written day.
+    """
+    last = state.loc[provider, "last_date"]
+    written = series.loc[provider]
+    after = last.reindex(written.index) + pd.Timedelta(days=1)
+    starts = np.maximum(written.to_numpy(), after.fillna(written).to_numpy())
+    start = min(pd.Timestamp(starts.min()), last.max() + pd.Timedelta(days=1))
+    floor = written.min() - pd.Timedelta(days=settings.anomaly_max_lookback_days)
+    return max(start, floor)
+
+
+def score(
+    daily: pd.DataFrame, state: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fold daily (provider, service, date, cost_usd) totals into `state`.
+    Days a series has already folded, or has no row for, are skipped.
+    Returns the new state and the flagged days.
+    """
+    wide = daily.pivot_table(
+        index=SERIES_KEYS,
+        columns="date",
+        values="cost_usd",
+        aggfunc="sum",
+    )
+    days = pd.date_range(wide.columns.min(), wide.columns.max(), freq="D")
+    wide = wide.reindex(columns=days)
+
+    state = state.reindex(state.index.union(wide.index))
+    state["n"] = state["n"].fillna(0).astype("int64")
+    state = state.fillna({c: 0.0 for c in ["level", "var", *SEASON_COLUMNS]})
+
+    rows = wide.index
+    last = state.loc[rows, "last_date"].to_numpy("datetime64[D]")
+    n = state.loc[rows, "n"].to_numpy()
+    level = state.loc[rows, "level"].to_numpy()
+    var = state.loc[rows, "var"].to_numpy()
+    season = state.loc[rows, SEASON_COLUMNS].to_numpy()
+    costs = wide.to_numpy(dtype=np.float64)
+
+    alpha, beta = settings.anomaly_ewma_alpha, settings.anomaly_season_alpha
+    flagged = []
+    for j, day in enumerate(days):
+        x = costs[:, j]
+        today = np.datetime64(day.date(), "D")
+        active = (np.isnat(last) | (last < today)) & ~np.isnan(x)
+        if not active.any():
+            continue
+        weekday = day.weekday()
+        expected = level + season[:, weekday]
+        resid = x - expected
+        # a perfectly flat series has no variance: floor it at 1% of level
+        sd = np.maximum(np.sqrt(var), 0.01 * np.abs(level))
+        z = np.divide(resid, sd, out=np.zeros_like(resid), where=sd > 0)
+        hit = (
+            active
+            & (n >= settings.anomaly_min_history_days)
+            & (np.abs(z) > settings.anomaly_z_threshold)
+            & (np.abs(resid) >= settings.anomaly_min_cost_usd)
+        )
+        if hit.any():
+            idx = np.flatnonzero(hit)
+            flagged.append(
+                pd.DataFrame(
+                    {
+                        "provider": rows.get_level_values(0)[idx],
+                        "date": day,
+                        "service": rows.get_level_values(1)[idx],
+                        "cost_usd": x[idx],
+                        "expected_usd": expected[idx],
+                        "zscore": z[idx],
+                    }
+                )
+            )
+
+        # the first day of a series seeds its level
+        first = active & (n == 0)
+        level[first] = x[first]
+        upd = active & (n > 0)
+        old_level, old_season = level[upd], season[upd, weekday]
+        level[upd] = old_level + alpha * (x[upd] - old_season - old_level)
+        season[upd, weekday] = old_season + beta * (x[upd] - old_level - old_season)
+        var[upd] = (1 - alpha) * var[upd] + alpha * resid[upd] ** 2
+        n[active] += 1
+        last[active] = today
+
+    state.loc[rows, "last_date"] = pd.to_datetime(last)
+    state.loc[rows, "n"] = n
+    state.loc[rows, "level"] = level
+    state.loc[rows, "var"] = var
+    state.loc[rows, SEASON_COLUMNS] = season
+    flags = pd.concat(flagged, ignore_index=True) if flagged else _empty_flags()
+    return state, flags
+
+
+class AnomalyStore:
+    """
+    Thread-safe holder of the persisted series state and flags.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self._root = root
+        self._lock = threading.RLock()
+        self._state: Optional[pd.DataFrame] = None
+        self._flags: Optional[pd.DataFrame] = None
+        self._signature: Optional[int] = None
+
+    @property
+    def root(self) -> Path:
+        return self._root or ANOMALY_DIR
+
+    @property
+    def state_path(self) -> Path:
+        return self.root / "state.parquet"
+
+    @property
+    def flags_path(self) -> Path:
+        return self.root / "flags.parquet"
+
+    # ─── persistence ────────────────────────────────────────────────────────
+
+    def _disk_signature(self) -> Optional[int]:
+        try:
+            return self.state_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return the in-memory state and flags, reloading them if another
+        process persisted newer ones.
+        """
+        signature = self._disk_signature()
+        if self._state is None or signature != self._signature:
+            if signature is not None and self.flags_path.exists():
+                self._state = pd.read_parquet(self.state_path)
+                self._flags = pd.read_parquet(self.flags_path)
+            else:
+                self._state, self._flags = _empty_state(), _empty_flags()
+            self._signature = signature
+        return self._state, self._flags
+
+    def _persist(self, state: pd.DataFrame, flags: pd.DataFrame) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.flags_path.with_suffix(".parquet.tmp")
+        flags.to_parquet(tmp, index=False)
+        os.replace(tmp, self.flags_path)
+        # state.parquet is written last: its mtime versions the pair
+        tmp = self.state_path.with_suffix(".parquet.tmp")
+        state.to_parquet(tmp)
+        os.replace(tmp, self.state_path)
+        self._state, self._flags = state, flags
+        self._signature = self._disk_signature()
+
+    # ─── updates ────────────────────────────────────────────────────────────
+
+    def apply(self, records: Union[Iterable[Dict], pa.Table]) -> None:
+        """
+        Fold the settled days of the providers in `records` that the state
+        has not seen yet, up to (excluding) each provider's latest day. A
+        provider without state is bootstrapped from its full rollup history
+        once.
+        """
+        series = _batch_series(records)
+        today = datetime.now(timezone.utc).date()
+        end = today - timedelta(days=settings.anomaly_settle_days)
+        with self._lock:
+            state, flags = self._load()
+            known = state.index.get_level_values("provider")
+            frames = []
+            for provider in sorted(series.index.unique("provider")):
+                start = None
+                if provider in known:
+                    start = _resume_date(state, provider, series).date()
+                daily = rollups.daily(provider, start)
+                latest = daily["date"].max()
+                frames.append(
+                    daily[
+                        (daily["date"] <= pd.Timestamp(end)) & (daily["date"] < latest)
+                    ]
+                )
+            daily = pd.concat(frames, ignore_index=True)
+            if daily.empty:
+                return
+            state, new_flags = score(daily, state)
+            if not new_flags.empty:
+                logger.info("Flagged %d cost anomalies", len(new_flags))
+                flags = pd.concat([flags, new_flags], ignore_index=True)
+            self._persist(state, flags)
+
+    def drop_provider(self, provider: str) -> None:
+        with self._lock:
+            state, flags = self._load()
+            keep = state.index.get_level_values("provider") != provider
+            self._persist(
+                state[keep], flags[flags["provider"] != provider].reset_index(drop=True)
+            )
+
+    # ─── queries ────────────────────────────────────────────────────────────
+
+    def flags(
+        self,
+        provider: Optional[str] = None,
+        service: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> pd.DataFrame:
+        with self._lock:
+            _, flags = self._load()
+        mask = pd.Series(True, index=flags.index)
+        if provider:
+            mask &= flags["provider"] == provider
+        if service:
+            mask &= flags["service"] == service
+        if start_date:
+            mask &= flags["date"] >= pd.Timestamp(start_date)
+        if end_date:
+            mask &= flags["date"] <= pd.Timestamp(end_date)
+        return flags[mask].sort_values(["date", "provider", "service"])
+
+
+_store = AnomalyStore()
+
+
+def apply(records: Union[Iterable[Dict], pa.Table]) -> None:
+    """
+    Score the days just written to the store and update the series state.
+    """
+    _store.apply(records)
+
+
+def drop_provider(provider: str) -> None:
+    _store.drop_provider(provider)
+
+
+def flags(
+    provider: Optional[str] = None,
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Precomputed anomaly flags, oldest first.
+    """
+    return _store.flags(provider, service, start_date, end_date)
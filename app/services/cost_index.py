@@ -0,0 +1,84 @@
+"""
+Date-sorted cost frames with a prebuilt service index.
+
+`CostFrame` keeps a transformed cost DataFrame sorted by date next to a
+datetime64 array of its dates and a service → row-positions index, so a
+query is answered with binary searches and positional takes whose cost
+scales with the number of matching rows, not the size of the frame.
+"""
+
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class CostFrame:
+    """
+    Read-only, date-sorted view over the output of `etl.load_and_transform`.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.sort_values("date", kind="stable", ignore_index=True)
+        self.df = df
+        self.dates = df["date"].to_numpy(dtype="datetime64[ns]")
+        self.service_index = self._build_service_index(df["service"])
+        self.nbytes = int(df.memory_usage(index=True, deep=True).sum()) + sum(
+            pos.nbytes for pos in self.service_index.values()
+        )
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @staticmethod
+    def _build_service_index(services: pd.Series) -> Dict[str, np.ndarray]:
+        cat = services.astype("category")
+        codes = cat.cat.codes.to_numpy()
+        # stable sort keeps positions ascending (i.e. date-ordered) per service
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+        index: Dict[str, np.ndarray] = {}
+        for chunk in np.split(order, starts):
+            if len(chunk) == 0:
+                continue
+            code = codes[chunk[0]]
+            if code < 0:  # NaN service
+                continue
+            index[str(cat.cat.categories[code])] = chunk
+        return index
+
+    def date_bounds(
+        self, start_date: Optional[date], end_date: Optional[date]
+    ) -> Tuple[int, int]:
+        """
+        Row range [lo, hi) whose dates fall in [start_date, end_date].
+        """
+        lo = 0
+        hi = len(self.dates)
+        if start_date:
+            lo = int(np.searchsorted(self.dates, np.datetime64(start_date), "left"))
+        if end_date:
+            hi = int(np.searchsorted(self.dates, np.datetime64(end_date), "right"))
+        return lo, max(lo, hi)
+
+    def select(
+        self,
+        service: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        Rows matching the filters, in date order.
+        """
+        lo, hi = self.date_bounds(start_date, end_date)
+        if not service:
+            return self.df.iloc[lo:hi]
+
+        positions = self.service_index.get(service)
+        if positions is None:
+            return self.df.iloc[0:0]
+        a = np.searchsorted(positions, lo, "left")
+        b = np.searchsorted(positions, hi, "left")
+        return self.df.take(positions[a:b])
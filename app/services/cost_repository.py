@@ -0,0 +1,456 @@
+"""
+Database-backed cost repository, used with COST_STORAGE=database.
+
+PostgreSQL (DATABASE_URL=postgresql://...) goes through an asyncpg
+connection pool. Normalized rows are bulk-loaded with COPY into a
+temporary staging table and upserted into `costs`. That table is range
+partitioned by month, with a covering (provider, date, service) index.
+SQLite (DATABASE_URL=sqlite:///path, the default) implements the same
+interface with the standard library driver, so it runs locally and in
+tests without a database server.
+
+All database work runs on one event loop thread owned by the
+repository. The pool is therefore not tied to whichever loop (the API,
+a TestClient or the ingestion jobs) calls it. Coroutines await `read` /
+`has_provider`, and threads call the `*_sync` variants.
+
+`cost_providers` holds one row per provider with the time of its last
+write, shared by every replica. It is read with one small query and
+trusted for DATABASE_PROVIDERS_TTL_SECONDS (or until this process writes),
+so checking which providers have rows, and how recent they are, costs no
+round trip on most requests, and another replica's writes show up within
+the TTL.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import settings
+from app.services.cost_store import to_table
+from app.services.etl import transform
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COLUMNS = ["provider", "date", "service", "cost_usd", "account_id", "region"]
+KEY_COLUMNS = ["provider", "date", "service", "account_id", "region"]
+READ_COLUMNS = ["date", "service", "cost_usd", "account_id", "region"]
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parents[1] / "data" / "costs.db"
+
+
+def _to_frame(records: Union[List[Dict], pa.Table]) -> pd.DataFrame:
+    """
+    Normalized records as a frame with non-null keys, deduplicated on the
+    upsert key (last wins).
+    """
+    table = records if isinstance(records, pa.Table) else to_table(records)
+    df = table.to_pandas()
+    for col in ("service", "account_id", "region"):
+        df[col] = df[col].astype("string").fillna("")
+    df = df[COLUMNS]
+    return df[~df.duplicated(KEY_COLUMNS, keep="last")]
+
+
+class CostRepository:
+    """
+    Base class: the event loop thread and the sync/async entry points.
+    Backends implement `_connect`, `_disconnect`, `_read`, `_write`,
+    `_providers` and `_delete`.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._connected = False
+        self._connecting: Optional[asyncio.Lock] = None
+        # (time.monotonic() when read, cost_providers as provider → updated_at)
+        self._updated: Optional[Tuple[float, Dict[str, datetime]]] = None
+
+    # ─── event loop ─────────────────────────────────────────────────────────
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="cost-repository", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    async def _ready(self, coro: Coroutine[Any, Any, T]) -> T:
+        if not self._connected:
+            # created on the repository loop, where every _ready runs
+            self._connecting = self._connecting or asyncio.Lock()
+            try:
+                async with self._connecting:
+                    if not self._connected:
+                        await self._connect()
+                        self._connected = True
+            except BaseException:
+                coro.close()
+                raise
+        return await coro
+
+    def _submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        return asyncio.run_coroutine_threadsafe(self._ready(coro), self._ensure_loop())
+
+    async def _call(self, coro: Coroutine[Any, Any, T]) -> T:
+        return await asyncio.wrap_future(self._submit(coro))
+
+    # ─── public API ─────────────────────────────────────────────────────────
+
+    async def read(
+        self,
+        provider: str,
+        service: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        One provider's costs, filtered in the database, in the frame shape
+        of `etl.load_and_transform` (no provider column).
+        """
+        df = await self._call(self._read(provider, service, start_date, end_date))
+        return transform(df)
+
+    def read_sync(
+        self,
+        provider: str,
+        service: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> pd.DataFrame:
+        df = self._submit(self._read(provider, service, start_date, end_date))
+        return transform(df.result())
+
+    def _cached_providers(self) -> Optional[Dict[str, datetime]]:
+        cached = self._updated
+        ttl = settings.database_providers_ttl_seconds
+        if cached is None or time.monotonic() - cached[0] >= ttl:
+            return None
+        return cached[1]
+
+    def _remember(self, providers: Dict[str, datetime]) -> Dict[str, datetime]:
+        self._updated = (time.monotonic(), providers)
+        return providers
+
+    async def providers(self) -> Dict[str, datetime]:
+        """
+        Time of the last write per provider with rows (`cost_providers`),
+        re-read at most every DATABASE_PROVIDERS_TTL_SECONDS.
+        """
+        cached = self._cached_providers()
+        if cached is None:
+            cached = self._remember(await self._call(self._providers()))
+        return cached
+
+    def providers_sync(self) -> Dict[str, datetime]:
+        cached = self._cached_providers()
+        if cached is None:
+            cached = self._remember(self._submit(self._providers()).result())
+        return cached
+
+    async def has_provider(self, provider: str) -> bool:
+        return provider in await self.providers()
+
+    def has_provider_sync(self, provider: str) -> bool:
+        return provider in self.providers_sync()
+
+    def write_sync(self, records: Union[List[Dict], pa.Table]) -> int:
+        """
+        Upsert normalized records (dicts or a TABLE_SCHEMA table), keyed by
+        (provider, date, service, account_id, region). Returns rows written.
+        """
+        df = _to_frame(records)
+        if df.empty:
+            return 0
+        written = self._submit(self._write(df)).result()
+        self._updated = None
+        return written
+
+    def delete_provider_sync(self, provider: str) -> None:
+        self._submit(self._delete(provider)).result()
+        self._updated = None
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._connected:
+            asyncio.run_coroutine_threadsafe(self._disconnect(), loop).result()
+            self._connected = False
+            self._connecting = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    # ─── backend hooks ──────────────────────────────────────────────────────
+
+    async def _connect(self) -> None:
+        raise NotImplementedError
+
+    async def _disconnect(self) -> None:
+        raise NotImplementedError
+
+    async def _read(
+        self,
+        provider: str,
+        service: Optional[str],
+        start_date: Optional[date],
+        end_date: Optional[date],
+    ) -> pd.DataFrame:
+        raise NotImplementedError
+
+    async def _write(self, df: pd.DataFrame) -> int:
+        raise NotImplementedError
+
+    async def _providers(self) -> Dict[str, datetime]:
+        raise NotImplementedError
+
+    async def _delete(self, provider: str) -> None:
+        raise NotImplementedError
+
+
+def _where(
+    provider: str,
+    service: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    placeholder,
+) -> Tuple[str, List[Any]]:
+    clauses, args = ["provider = {}"], [provider]
+    if start_date:
+        clauses.append("date >= {}")
+        args.append(start_date)
+    if end_date:
+        clauses.append("date <= {}")
+        args.append(end_date)
+    if service:
+        clauses.append("service = {}")
+        args.append(service)
+    sql = " AND ".join(c.format(placeholder(i + 1)) for i, c in enumerate(clauses))
+    return sql, args
+
+
+# ─── PostgreSQL ─────────────────────────────────────────────────────────────
+
+PG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS costs (
+    provider   text             NOT NULL,
+    date       date             NOT NULL,
+    service    text             NOT NULL,
+    cost_usd   double precision NOT NULL,
+    account_id text             NOT NULL DEFAULT '',
+    region     text             NOT NULL DEFAULT '',
+    PRIMARY KEY (provider, date, service, account_id, region)
+) PARTITION BY RANGE (date);
+
+-- index-only scans for the API's (provider, date range, service) reads
+CREATE INDEX IF NOT EXISTS costs_provider_date_service
+    ON costs (provider, date, service) INCLUDE (cost_usd, account_id, region);
+
+CREATE TABLE IF NOT EXISTS cost_providers (
+    provider   text        PRIMARY KEY,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+"""
+
+PG_UPSERT = """
+INSERT INTO costs ({columns})
+SELECT {columns} FROM costs_stage
+ON CONFLICT (provider, date, service, account_id, region)
+DO UPDATE SET cost_usd = EXCLUDED.cost_usd
+""".format(
+    columns=", ".join(COLUMNS)
+)
+
+
+def _month_partition(month: date) -> str:
+    nxt = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    name = f"costs_y{month:%Y}m{month:%m}"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF costs "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+    )
+
+
+class PostgresCostRepository(CostRepository):
+    def __init__(self, url: str):
+        super().__init__(url)
+        self._pool = None
+        self._months: set = set()
+
+    async def _connect(self) -> None:
+        import asyncpg  # only needed for PostgreSQL deployments
+
+        self._pool = await asyncpg.create_pool(
+            self.url,
+            min_size=settings.database_pool_min_size,
+            max_size=settings.database_pool_max_size,
+        )
+        async with self._pool.acquire() as conn:
+            await conn.execute(PG_SCHEMA)
+
+    async def _disconnect(self) -> None:
+        await self._pool.close()
+
+    async def _ensure_partitions(self, conn, months) -> List[date]:
+        """
+        Create the month partitions not yet known to exist, inside the
+        caller's transaction. Returns them, to be remembered on commit.
+        """
+        missing = sorted(set(months) - self._months)
+        if missing:
+            # serializes partition DDL across replicas
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext('costs_ddl'))")
+            for month in missing:
+                await conn.execute(_month_partition(month))
+        return missing
+
+    async def _read(self, provider, service, start_date, end_date) -> pd.DataFrame:
+        where, args = _where(provider, service, start_date, end_date, "${}".format)
+        sql = f"SELECT {', '.join(READ_COLUMNS)} FROM costs WHERE {where} ORDER BY date"
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+        return pd.DataFrame.from_records([tuple(r) for r in rows], columns=READ_COLUMNS)
+
+    async def _write(self, df: pd.DataFrame) -> int:
+        months = {d.replace(day=1) for d in df["date"].unique()}
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                created = await self._ensure_partitions(conn, months)
+                await conn.execute(
+                    "CREATE TEMP TABLE costs_stage (LIKE costs) ON COMMIT DROP"
+                )
+                await conn.copy_records_to_table(
+                    "costs_stage",
+                    records=df.itertuples(index=False, name=None),
+                    columns=COLUMNS,
+                )
+                await conn.execute(PG_UPSERT)
+                await conn.executemany(
+                    "INSERT INTO cost_providers (provider) VALUES ($1) "
+                    "ON CONFLICT (provider) DO UPDATE SET updated_at = now()",
+                    [(p,) for p in df["provider"].unique()],
+                )
+        self._months.update(created)
+        return len(df)
+
+    async def _providers(self) -> Dict[str, datetime]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("SELECT provider, updated_at FROM cost_providers")
+        return {r["provider"]: r["updated_at"] for r in rows}
+
+    async def _delete(self, provider: str) -> None:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM costs WHERE provider = $1", provider)
+                await conn.execute(
+                    "DELETE FROM cost_providers WHERE provider = $1", provider
+                )
+
+
+# ─── SQLite ─────────────────────────────────────────────────────────────────
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS costs (
+    provider   TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    service    TEXT NOT NULL,
+    cost_usd   REAL NOT NULL,
+    account_id TEXT NOT NULL DEFAULT '',
+    region     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (provider, date, service, account_id, region)
+);
+CREATE INDEX IF NOT EXISTS costs_provider_date_service
+    ON costs (provider, date, service, cost_usd);
+CREATE TABLE IF NOT EXISTS cost_providers (
+    provider   TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL
+);
+"""
+
+SQLITE_UPSERT = """
+INSERT INTO costs ({columns}) VALUES ({marks})
+ON CONFLICT (provider, date, service, account_id, region)
+DO UPDATE SET cost_usd = excluded.cost_usd
+""".format(
+    columns=", ".join(COLUMNS), marks=", ".join("?" * len(COLUMNS))
+)
+
+
+class SqliteCostRepository(CostRepository):
+    """
+    Same interface on SQLite, for local runs and tests. Queries run on the
+    repository's loop thread, one at a time.
+    """
+
+    def __init__(self, url: str):
+        super().__init__(url)
+        path = url.split(":///", 1)[1] if ":///" in url else ""
+        self.path = Path(path) if path else DEFAULT_SQLITE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _connect(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    async def _disconnect(self) -> None:
+        self._conn.close()
+
+    async def _read(self, provider, service, start_date, end_date) -> pd.DataFrame:
+        where, args = _where(provider, service, start_date, end_date, lambda i: "?")
+        sql = f"SELECT {', '.join(READ_COLUMNS)} FROM costs WHERE {where} ORDER BY date"
+        args = [a.isoformat() if isinstance(a, date) else a for a in args]
+        rows = self._conn.execute(sql, args).fetchall()
+        return pd.DataFrame.from_records(rows, columns=READ_COLUMNS)
+
+    async def _write(self, df: pd.DataFrame) -> int:
+        df = df.assign(date=pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d"))
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            self._conn.executemany(SQLITE_UPSERT, df.itertuples(index=False, name=None))
+            self._conn.executemany(
+                "INSERT INTO cost_providers (provider, updated_at) VALUES (?, ?) "
+                "ON CONFLICT (provider) DO UPDATE SET updated_at = excluded.updated_at",
+                [(p, now) for p in df["provider"].unique()],
+            )
+        return len(df)
+
+    async def _providers(self) -> Dict[str, datetime]:
+        rows = self._conn.execute("SELECT provider, updated_at FROM cost_providers")
+        return {p: datetime.fromisoformat(ts) for p, ts in rows}
+
+    async def _delete(self, provider: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM costs WHERE provider = ?", (provider,))
+            self._conn.execute(
+                "DELETE FROM cost_providers WHERE provider = ?", (provider,)
+            )
+
+
+def create_repository(url: str) -> CostRepository:
+    """
+    Repository for DATABASE_URL: postgresql:// (or postgres://) uses
+    asyncpg, anything else (sqlite:///path or empty) SQLite.
+    """
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresCostRepository(url)
+    return SqliteCostRepository(url)
+
+
+repository = create_repository(settings.database_url)
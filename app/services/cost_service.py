@@ -1,65 +1,337 @@
 # app/services/cost_service.py
 
+import asyncio
 import logging
 import os
-from datetime import date
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from app.core.config import settings
+from app.core.metrics import ROWS_RETURNED, ROWS_SCANNED, timed
+from app.services import cost_repository, cost_store, data_versions
+from app.services.cost_index import CostFrame
 from app.services.etl import load_and_transform
+from app.services.frame_cache import FrameCache
 
 # ─── point DATA_DIR at app/data ──────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 APP_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
 DATA_DIR = os.path.join(APP_DIR, "data")
 
-if not os.path.isdir(DATA_DIR):
-    raise RuntimeError(f"Data folder not found: {DATA_DIR!r}")
+PROVIDER_FILES = {
+    "AWS": "aws_2025.csv",
+    "Azure": "azure_2025.csv",
+    "GCP": "gcp_2025.csv",
+}
+
+# transformed frames shared by every request in this process
+_frame_cache = FrameCache(max_bytes=settings.cost_cache_max_bytes, name="cost_frames")
+
+# loads the providers of a unified query concurrently
+_load_pool = ThreadPoolExecutor(
+    max_workers=len(PROVIDER_FILES), thread_name_prefix="cost-load"
+)
+
+
+OUTPUT_COLUMNS = ["provider", "date", "service", "cost_usd"]
+
+
+def _with_provider(df: pd.DataFrame, provider: str) -> pd.DataFrame:
+    df["provider"] = pd.Categorical.from_codes([0] * len(df), categories=[provider])
+    return df
+
+
+def _load_indexed(csv_path: str, provider: str) -> CostFrame:
+    return CostFrame(_with_provider(load_and_transform(csv_path), provider))
+
+
+def _load_frame(csv_path: str, provider: str) -> CostFrame:
+    """
+    Return the indexed, date-sorted frame for `csv_path`, re-parsing the CSV
+    only when it changed on disk. Callers must treat the result as read-only.
+    """
+    return _frame_cache.get(csv_path, partial(_load_indexed, provider=provider))
+
+
+def in_store(provider: str) -> bool:
+    """
+    True when `provider` is served from ingested storage (the database with
+    COST_STORAGE=database, the Parquet store otherwise) rather than its
+    legacy CSV.
+    """
+    if settings.cost_storage == "database":
+        return cost_repository.repository.has_provider_sync(provider)
+    return cost_store.has_provider(provider)
+
+
+def store_updated_at(provider: str) -> Optional[datetime]:
+    """
+    When `provider`'s rows were last written to the database, as recorded
+    by whichever replica wrote them; None with file storage.
+    """
+    if settings.cost_storage != "database":
+        return None
+    return cost_repository.repository.providers_sync().get(provider)
+
+
+def read_store(
+    provider: str,
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    One provider's ingested costs, with a `provider` column, from the
+    database or the Parquet store (no CSV fallback).
+    """
+    if settings.cost_storage == "database":
+        df = cost_repository.repository.read_sync(
+            provider, service, start_date, end_date
+        )
+    else:
+        df = cost_store.read(provider, service, start_date, end_date)
+    # filters were pushed down: every row read is returned
+    ROWS_SCANNED.labels(provider).inc(len(df))
+    ROWS_RETURNED.labels(provider).inc(len(df))
+    return _with_provider(df, provider)
+
+
+def data_version(provider: str) -> Tuple[str, float]:
+    """
+    Version token and last-modified time (epoch seconds) of the data
+    served for `provider`. Both change once an ingestion into the store
+    has been saved and rolled up (see `data_versions`), when the database's
+    `cost_providers.updated_at` moves with COST_STORAGE=database, and
+    whenever the provider's legacy CSV changes on disk. Costs a stat, not
+    a read (plus a `cost_providers` query per TTL with the database).
+    """
+    if settings.cost_storage == "database":
+        # shared by every replica, unlike the node-local data_versions.json
+        updated = store_updated_at(provider)
+        stored = round(updated.timestamp() * 1e6) * 1000 if updated else 0
+    else:
+        stored = data_versions.get(provider)
+    try:
+        st = os.stat(os.path.join(DATA_DIR, PROVIDER_FILES[provider]))
+        csv_mtime, csv_size = st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        csv_mtime, csv_size = 0, 0
+    token = f"{stored:x}.{csv_mtime:x}.{csv_size:x}"
+    return token, max(stored, csv_mtime) / 1e9
+
+
+def check_data_dir() -> None:
+    """
+    Raise RuntimeError when DATA_DIR is missing. Called by the app lifespan
+    rather than at import, so importing this module touches no files.
+    """
+    if not os.path.isdir(DATA_DIR):
+        raise RuntimeError(f"Data folder not found: {DATA_DIR!r}")
+
+
+def warm_cache() -> None:
+    """
+    Pre-load every provider CSV present in DATA_DIR into the frame cache.
+    """
+    for provider, filename in PROVIDER_FILES.items():
+        csv_path = os.path.join(DATA_DIR, filename)
+        if in_store(provider) or not os.path.isfile(csv_path):
+            continue
+        try:
+            _load_frame(csv_path, provider)
+        except Exception:
+            logging.exception("Failed to warm %s cost cache", provider)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _frame_cache.stats()
 
 
 def _apply_filters(
-    df: pd.DataFrame,
+    df: Union[CostFrame, pd.DataFrame],
     service: Optional[str],
     start_date: Optional[date],
     end_date: Optional[date],
 ) -> pd.DataFrame:
+    with timed("filter"):
+        return _filter(df, service, start_date, end_date)
+
+
+def _filter(
+    df: Union[CostFrame, pd.DataFrame],
+    service: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> pd.DataFrame:
+    if isinstance(df, CostFrame):
+        # binary search on the sorted dates + service index lookup
+        return df.select(service, start_date, end_date)
+
+    # plain frame (already parsed by etl): one vectorized mask
+    mask = pd.Series(True, index=df.index)
     if service:
-        df = df[df["service"] == service]
+        mask &= df["service"] == service
     if start_date:
-        df = df[pd.to_datetime(df["date"]) >= pd.to_datetime(start_date)]
+        mask &= df["date"] >= pd.Timestamp(start_date)
     if end_date:
-        df = df[pd.to_datetime(df["date"]) <= pd.to_datetime(end_date)]
+        mask &= df["date"] <= pd.Timestamp(end_date)
+    return df[mask]
+
+
+def get_provider_cost_frame(
+    provider: str,
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Filtered, date-ordered frame for one provider, including a `provider`
+    column. Reads the Parquet store (or the database, with
+    COST_STORAGE=database) with the filters pushed down when the provider
+    has been ingested there, and falls back to the cached legacy CSV
+    otherwise. The result may share memory with the cache: read-only.
+    """
+    if in_store(provider):
+        return read_store(provider, service, start_date, end_date)
+    return _csv_cost_frame(provider, service, start_date, end_date)
+
+
+def _csv_cost_frame(
+    provider: str,
+    service: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> pd.DataFrame:
+    csv_path = os.path.join(DATA_DIR, PROVIDER_FILES[provider])
+    if not os.path.isfile(csv_path):
+        raise HTTPException(500, f"{provider} CSV not found at {csv_path!r}")
+    df_raw = _load_frame(csv_path, provider)
+    df = _apply_filters(df_raw, service, start_date, end_date)
+    ROWS_SCANNED.labels(provider).inc(len(df_raw))
+    ROWS_RETURNED.labels(provider).inc(len(df))
     return df
 
 
-def get_aws_cost_data(
+def get_cost_frame(
     service: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Unified, date-ordered frame across AWS, Azure, and GCP.
+    Providers are loaded in parallel and merged column-wise with a single
+    stable sort; providers without data are skipped. Raises 404 if none
+    has any.
+    """
+    futures = [
+        _load_pool.submit(
+            get_provider_cost_frame, provider, service, start_date, end_date
+        )
+        for provider in PROVIDER_FILES
+    ]
+    frames = []
+    for future in futures:
+        try:
+            frames.append(future.result())
+        except HTTPException:
+            # skip missing provider
+            continue
+    return _merge_frames(frames)
+
+
+def _merge_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        raise HTTPException(404, "No cost data found for the specified filters")
+
+    # empty frames would only make concat guess dtypes from all-NA columns
+    rows = [f[OUTPUT_COLUMNS] for f in frames if not f.empty]
+    if not rows:
+        # typed like a loaded frame, for callers that use .dt on the dates
+        return frames[0][OUTPUT_COLUMNS].iloc[:0].reset_index(drop=True)
+    df = pd.concat(rows, ignore_index=True)
+    df["provider"] = df["provider"].astype("category")
+    # each frame is already date-ordered: the stable sort merges sorted runs
+    return df.sort_values("date", kind="stable", ignore_index=True)
+
+
+async def aget_provider_cost_frame(
+    provider: str,
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Async `get_provider_cost_frame`: awaits the database repository with
+    COST_STORAGE=database, and runs file reads on the thread pool otherwise.
+    """
+    if (
+        settings.cost_storage == "database"
+        and await cost_repository.repository.has_provider(provider)
+    ):
+        df = await cost_repository.repository.read(
+            provider, service, start_date, end_date
+        )
+        return _with_provider(df, provider)
+    return await run_in_threadpool(
+        get_provider_cost_frame, provider, service, start_date, end_date
+    )
+
+
+async def aget_cost_frame(
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Async `get_cost_frame`: the providers are queried concurrently.
+    """
+    results = await asyncio.gather(
+        *(
+            aget_provider_cost_frame(provider, service, start_date, end_date)
+            for provider in PROVIDER_FILES
+        ),
+        return_exceptions=True,
+    )
+    frames = []
+    for result in results:
+        if isinstance(result, HTTPException):
+            continue  # skip missing provider
+        if isinstance(result, BaseException):
+            raise result
+        frames.append(result)
+    return _merge_frames(frames)
+
+
+def _provider_cost_data(
+    provider: str,
+    service: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
 ) -> List[Dict]:
-    csv_path = os.path.join(DATA_DIR, "aws_2025.csv")
-    if not os.path.isfile(csv_path):
-        raise HTTPException(500, f"AWS CSV not found at {csv_path!r}")
-    df_raw = load_and_transform(csv_path)
-    df_filt = _apply_filters(df_raw, service, start_date, end_date)
-    df = df_filt.assign(provider="AWS")
+    df = get_provider_cost_frame(provider, service, start_date, end_date)
     return df.to_dict(orient="records")
 
 
+def get_aws_cost_data(
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    return _provider_cost_data("AWS", service, start_date, end_date)
+
+
 def get_azure_cost_data(
     service: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
 ) -> List[Dict]:
-    csv_path = os.path.join(DATA_DIR, "azure_2025.csv")
-    if not os.path.isfile(csv_path):
-        raise HTTPException(500, f"Azure CSV not found at {csv_path!r}")
-    df_raw = load_and_transform(csv_path)
-    df_filt = _apply_filters(df_raw, service, start_date, end_date)
-    df = df_filt.assign(provider="Azure")
-    return df.to_dict(orient="records")
+    return _provider_cost_data("Azure", service, start_date, end_date)
 
 
 def get_gcp_cost_data(
@@ -67,13 +339,7 @@ def get_gcp_cost_data(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
 ) -> List[Dict]:
-    csv_path = os.path.join(DATA_DIR, "gcp_2025.csv")
-    if not os.path.isfile(csv_path):
-        raise HTTPException(500, f"GCP CSV not found at {csv_path!r}")
-    df_raw = load_and_transform(csv_path)
-    df_filt = _apply_filters(df_raw, service, start_date, end_date)
-    df = df_filt.assign(provider="GCP")
-    return df.to_dict(orient="records")
+    return _provider_cost_data("GCP", service, start_date, end_date)
 
 
 def get_cost_data(
@@ -82,23 +348,6 @@ def get_cost_data(
     end_date: Optional[date] = None,
 ) -> List[Dict]:
     """
-    Unified fetch across AWS, Azure, and GCP CSVs.
+    Unified fetch across AWS, Azure, and GCP, as date-ordered records.
     """
-    merged: List[Dict] = []
-    for fn in (get_aws_cost_data, get_azure_cost_data, get_gcp_cost_data):
-        try:
-            merged.extend(fn(service, start_date, end_date))
-        except HTTPException:
-            # skip missing provider
-            continue
-
-    if not merged:
-        raise HTTPException(404, "No cost data found for the specified filters")
-
-    # sort by date
-    try:
-        merged.sort(key=lambda r: date.fromisoformat(r["date"]))
-    except Exception:
-        logging.exception("Exception occurred in Cost Service")
-
-    return merged
+    return get_cost_frame(service, start_date, end_date).to_dict(orient="records")
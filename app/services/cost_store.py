@@ -0,0 +1,293 @@
+"""
+Partitioned Parquet store for normalized cost records.
+
+Layout (hive partitioning):
+
+    app/data/parquet/provider=AWS/month=2025-01/part-<uuid>.parquet
+
+Each month holds one file, sorted by date, with typed columns and a
+dictionary-encoded `service`, so reads can prune by partition
+(provider, month) and by row-group statistics (date, service). Writes
+are upserts keyed by (provider, date, service, account_id, region).
+
+Readers take no lock: a rewrite renames the new file into place before
+it removes the old one, and a read that loses a file to a rewrite is
+retried. Writers of a month hold an flock on its `.lock` file, so API
+workers and CLI scripts can write the same partition concurrently.
+"""
+
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.services import data_versions
+from app.services.etl import iter_chunks, transform
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = Path(__file__).resolve().parents[1] / "data" / "parquet"
+
+SCHEMA = pa.schema(
+    [
+        ("date", pa.date32()),
+        ("service", pa.dictionary(pa.int32(), pa.string())),
+        ("cost_usd", pa.float64()),
+        ("account_id", pa.string()),
+        ("region", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+
+# normalized records as a table: the stored columns plus their provider
+TABLE_SCHEMA = SCHEMA.append(pa.field("provider", pa.string()))
+
+# upsert key within a provider partition (provider itself is the directory)
+KEY_COLUMNS = ["date", "service", "account_id", "region"]
+
+# serializes partition rewrites within this process (flock: across processes)
+_write_lock = threading.Lock()
+
+# a read that lost files to a concurrent rewrite is retried this many times
+READ_RETRIES = 3
+
+# partitioning below a single provider directory
+MONTH_PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+def _provider_dir(provider: str, root: Optional[Path] = None) -> Path:
+    return (root or STORE_DIR) / f"provider={provider}"
+
+
+def has_provider(provider: str, root: Optional[Path] = None) -> bool:
+    """
+    True when at least one partition has been written for `provider`.
+    """
+    return _provider_dir(provider, root).is_dir()
+
+
+def to_table(records: Iterable[Dict]) -> pa.Table:
+    """
+    Build a typed Arrow table (TABLE_SCHEMA) from normalized records.
+    """
+    df = pd.DataFrame.from_records(list(records))
+    for col in ("service", "account_id", "region"):
+        if col not in df.columns:
+            df[col] = None
+    if "provider" not in df.columns or df["provider"].isna().any():
+        raise ValueError("Every record needs a 'provider' to be stored as Parquet")
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    df["cost_usd"] = pd.to_numeric(df["cost_usd"], errors="coerce").fillna(0.0)
+    df["account_id"] = df["account_id"].astype("string")
+    table = pa.Table.from_pandas(
+        df[TABLE_SCHEMA.names],
+        schema=TABLE_SCHEMA,
+        preserve_index=False,
+    )
+    return table
+
+
+def _keys(df: pd.DataFrame) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays(
+        [df[col].astype("string").fillna("") for col in KEY_COLUMNS]
+    )
+
+
+@contextmanager
+def _partition_lock(out_dir: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on one month directory, across processes.
+    Readers ignore the "."-prefixed lock file.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _merge_partition(out_dir: Path, part: pa.Table) -> int:
+    """
+    Upsert `part` into one month directory and compact it into one file.
+    Returns the number of distinct records written.
+    """
+    with _partition_lock(out_dir):
+        return _merge_locked(out_dir, part)
+
+
+def _merge_locked(out_dir: Path, part: pa.Table) -> int:
+    new_df = part.to_pandas()
+    new_df = new_df[~_keys(new_df).duplicated(keep="last")]
+
+    old_files = sorted(out_dir.glob("part-*.parquet"))
+    if old_files:
+        old_df = (
+            ds.dataset([str(f) for f in old_files], schema=SCHEMA, format="parquet")
+            .to_table()
+            .to_pandas()
+        )
+        keep = ~_keys(old_df).isin(_keys(new_df))
+        merged = pd.concat([old_df[keep], new_df], ignore_index=True)
+    else:
+        merged = new_df
+    merged = merged.sort_values("date", kind="stable")
+
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    # readers ignore "_"-prefixed files until the rename below
+    tmp = out_dir / f"_{name}"
+    pq.write_table(
+        pa.Table.from_pandas(merged, schema=SCHEMA, preserve_index=False),
+        tmp,
+        row_group_size=settings.cost_store_row_group_size,
+        compression="zstd",
+    )
+    # new file first: a reader may briefly see both, but never neither
+    os.replace(tmp, out_dir / name)
+    for f in old_files:
+        f.unlink()
+    return len(new_df)
+
+
+def write(records: List[Dict], root: Optional[Path] = None) -> int:
+    """
+    Upsert normalized records into the store. Rows are keyed by
+    (provider, date, service, account_id, region): re-ingesting an overlapping
+    range replaces rows instead of duplicating them. Each affected
+    (provider, month) partition is rewritten as a single sorted file.
+    Returns the number of rows written.
+    """
+    if not records:
+        return 0
+    return write_table(to_table(records), root)
+
+
+def write_table(table: pa.Table, root: Optional[Path] = None) -> int:
+    """
+    `write` for records already in a TABLE_SCHEMA Arrow table (see
+    `normalizer.normalize_arrow`), skipping per-record conversion.
+    """
+    if not table.num_rows:
+        return 0
+    months = pc.strftime(table["date"], format="%Y-%m")
+    table = table.append_column("month", months)
+
+    written = 0
+    keys = (
+        table.select(["provider", "month"])
+        .group_by(["provider", "month"])
+        .aggregate([])
+        .to_pylist()
+    )
+    with _write_lock:
+        for key in keys:
+            mask = pc.and_(
+                pc.equal(table["provider"], key["provider"]),
+                pc.equal(table["month"], key["month"]),
+            )
+            part = table.filter(mask).drop_columns(["provider", "month"])
+            out_dir = _provider_dir(key["provider"], root) / f"month={key['month']}"
+            written += _merge_partition(out_dir, part)
+    return written
+
+
+def _scan(provider: str, expr: pc.Expression, root: Optional[Path]) -> pa.Table:
+    for attempt in range(READ_RETRIES + 1):
+        # listed afresh on each attempt
+        dataset = ds.dataset(
+            _provider_dir(provider, root),
+            format="parquet",
+            partitioning=MONTH_PARTITIONING,
+            schema=SCHEMA.append(pa.field("month", pa.string())),
+        )
+        try:
+            return dataset.to_table(columns=[f.name for f in SCHEMA], filter=expr)
+        except FileNotFoundError:
+            # a rewrite removed a listed file after renaming its successor
+            if attempt == READ_RETRIES:
+                raise
+            logger.debug("%s partition rewritten during a read; retrying", provider)
+
+
+def read(
+    provider: str,
+    service: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    root: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Read one provider's costs with the filters pushed down to Parquet:
+    month partitions outside [start_date, end_date] are never opened and
+    row groups are skipped using their date/service statistics.
+    Returns the same frame shape as `etl.load_and_transform`.
+    """
+    expr = pc.scalar(True)
+    if start_date:
+        expr &= ds.field("month") >= start_date.strftime("%Y-%m")
+        expr &= ds.field("date") >= pa.scalar(start_date, pa.date32())
+    if end_date:
+        expr &= ds.field("month") <= end_date.strftime("%Y-%m")
+        expr &= ds.field("date") <= pa.scalar(end_date, pa.date32())
+    if service:
+        expr &= ds.field("service") == service
+
+    table = _scan(provider, expr, root)
+    df = table.to_pandas()
+    df["account_id"] = df["account_id"].fillna("")
+    df = df.sort_values("date", kind="stable", ignore_index=True)
+    return transform(df)
+
+
+def delete_provider(provider: str, root: Optional[Path] = None) -> None:
+    """
+    Remove every partition of `provider` (used by full re-fetch scripts).
+    """
+    path = _provider_dir(provider, root)
+    if path.is_dir():
+        shutil.rmtree(path)
+
+
+def csv_records(csv_path: str, provider: str) -> Iterator[List[Dict]]:
+    """
+    A legacy provider CSV as lists of store records, one ETL block at a
+    time so the file never has to fit in memory.
+    """
+    for chunk in iter_chunks(csv_path):
+        chunk["provider"] = provider
+        columns = [col for col in TABLE_SCHEMA.names if col in chunk.columns]
+        yield chunk[columns].to_dict(orient="records")
+
+
+def import_csv(csv_path: str, provider: str, root: Optional[Path] = None) -> int:
+    """
+    Load a legacy provider CSV from app/data into the store. Rollups pick
+    the provider up from the store on their next query.
+    """
+    count = 0
+    for records in csv_records(csv_path, provider):
+        count += write(records, root)
+    data_versions.bump(provider)
+    logger.info("Imported %d %s rows from %s", count, provider, csv_path)
+    return count
+
+
+if __name__ == "__main__":
+    # python -m app.services.cost_store  → migrate app/data/*_2025.csv
+    from app.services.cost_service import DATA_DIR, PROVIDER_FILES
+
+    logging.basicConfig(level=logging.INFO)
+    for prov, filename in PROVIDER_FILES.items():
+        csv_file = os.path.join(DATA_DIR, filename)
+        if os.path.isfile(csv_file) and not has_provider(prov):
+            import_csv(csv_file, prov)
@@ -0,0 +1,70 @@
+"""
+Per-provider data versions, the validators behind the cost routes' ETag
+and Last-Modified headers.
+
+`loader` calls `bump()` once a save has updated everything served for a
+provider: its Parquet rows, rollups and anomaly state. A response built
+between the write and the bump therefore never gets cached under the new
+version. Versions are nanosecond timestamps kept in
+app/data/data_versions.json, so every worker process on the node sees
+ingestion done by another one. Bumps hold an flock on a sibling ".lock"
+file; readers re-parse the file only when it is replaced.
+
+With COST_STORAGE=database the versions come from the database's
+`cost_providers.updated_at` instead (see `cost_service.data_version`).
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+VERSIONS_PATH = Path(__file__).resolve().parents[1] / "data" / "data_versions.json"
+
+_lock = threading.Lock()
+_cache: Tuple[Optional[Tuple[int, int]], Dict[str, int]] = (None, {})
+
+
+def _read() -> Dict[str, int]:
+    global _cache
+    try:
+        st = VERSIONS_PATH.stat()
+    except FileNotFoundError:
+        return {}
+    # every bump replaces the file: a new inode even within one mtime tick
+    signature = (st.st_ino, st.st_mtime_ns)
+    if _cache[0] != signature:
+        _cache = (signature, json.loads(VERSIONS_PATH.read_text()))
+    return _cache[1]
+
+
+def bump(*providers: str) -> None:
+    """
+    Record that the stored rows of `providers` changed just now.
+    """
+    VERSIONS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = VERSIONS_PATH.with_name(VERSIONS_PATH.name + ".lock")
+    with _lock, open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            versions = json.loads(VERSIONS_PATH.read_text())
+        except FileNotFoundError:
+            versions = {}
+        now = time.time_ns()
+        for provider in providers:
+            # strictly increasing, even within one clock tick
+            versions[provider] = max(now, versions.get(provider, 0) + 1)
+        tmp = VERSIONS_PATH.with_name(f".{VERSIONS_PATH.name}.{uuid.uuid4().hex}")
+        tmp.write_text(json.dumps(versions))
+        os.replace(tmp, VERSIONS_PATH)
+
+
+def get(provider: str) -> int:
+    """
+    Version of `provider`'s stored rows (0 if never written).
+    """
+    return _read().get(provider, 0)
@@ -1,8 +1,49 @@
 """
 ETL module for loading and transforming cloud cost CSVs (AWS, Azure, GCP).
+
+CSVs are parsed by pyarrow against an explicit schema (CSV_SCHEMA): only
+the known columns are read, dates are parsed in C and string columns
+arrive dictionary-encoded, so a loaded frame takes about 24 bytes per row.
+Files are streamed in ETL_BLOCK_BYTES blocks, so the raw text is never
+held in memory at once, and `iter_chunks` transforms a file block by
+block for callers that do not need it whole.
 """
 
+import csv
+import logging
+from typing import Dict, Iterator, List, Optional
+
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+from app.core.config import settings
+from app.core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+_STRING = pa.dictionary(pa.int32(), pa.string())
+
+# every column the ETL reads; other CSV columns are skipped
+CSV_SCHEMA = {
+    "date": pa.timestamp("ns"),
+    "service": _STRING,
+    "account_id": _STRING,
+    "region": _STRING,
+    "usage_type": _STRING,
+    "cost_usd": pa.float64(),
+}
+REQUIRED_COLUMNS = ["date", "cost_usd"]
+CATEGORY_COLUMNS = ["service", "account_id", "region", "usage_type"]
+WEEKDAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
 
 
 def load_and_transform(csv_path: str) -> pd.DataFrame:
@@ -19,17 +60,103 @@ def load_and_transform(csv_path: str) -> pd.DataFrame:
       - region
       - usage_type
 
-    Adds derived columns:
-      - month, day, weekday, year
-    Casts categorical columns for efficiency.
+    Other columns are not read. Adds derived columns:
+      - month (category), day (int8), weekday (category), year (int16)
+    String columns are categoricals.
+    """
+    with timed("etl.read"):
+        try:
+            table = _reader(csv_path).read_all()
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+        except pa.ArrowInvalid as exc:
+            # e.g. dates in a format pyarrow does not parse
+            logger.warning("%s: %s; parsing with pandas instead", csv_path, exc)
+            df = _read_pandas(csv_path)
+    df = transform(df)
+    usage = memory_usage(df)
+    logger.info(
+        "Loaded %s: %d rows, %.1f MiB (%.1f bytes/row)",
+        csv_path,
+        len(df),
+        usage["total"] / 2**20,
+        usage["total"] / max(len(df), 1),
+    )
+    return df
+
+
+def iter_chunks(csv_path: str) -> Iterator[pd.DataFrame]:
+    """
+    Yield the transformed CSV one ETL_BLOCK_BYTES block at a time, for
+    files larger than memory. Unlike `load_and_transform` there is no
+    pandas fallback: values that do not match CSV_SCHEMA raise ValueError.
+    """
+    for batch in _reader(csv_path):
+        yield transform(batch.to_pandas())
+
+
+def memory_usage(df: pd.DataFrame) -> Dict[str, int]:
     """
+    Deep in-memory size of `df` in bytes, per column and as "total".
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    report = {str(col): int(n) for col, n in usage.items()}
+    report["total"] = int(usage.sum())
+    return report
+
 
-    # Load CSV
-    df = pd.read_csv(csv_path)
+def _columns(csv_path: str) -> List[str]:
+    """The CSV_SCHEMA columns present in the header of `csv_path`."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    return [col for col in header if col in CSV_SCHEMA]
+
+
+def _reader(csv_path: str) -> pa_csv.CSVStreamingReader:
+    columns = _columns(csv_path)
+    return pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=settings.etl_block_bytes),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: CSV_SCHEMA[col] for col in columns},
+            include_columns=columns,
+        ),
+    )
+
+
+def _read_pandas(csv_path: str) -> pd.DataFrame:
+    columns = _columns(csv_path)
+    return pd.read_csv(
+        csv_path,
+        usecols=columns,
+        dtype={col: "category" for col in columns if col in CATEGORY_COLUMNS},
+    )
+
+
+def _category(values: pd.Series, fill: Optional[str] = None) -> pd.Series:
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        if fill is not None:
+            values = values.fillna(fill).astype(str)
+        return values.astype("category")
+    if fill is not None and values.hasnans:
+        if fill not in values.cat.categories:
+            values = values.cat.add_categories([fill])
+        values = values.fillna(fill)
+    return values
+
+
+def _narrow(values: pd.Series, dtype: str) -> pd.Series:
+    # nullable (e.g. "Int8") only when some dates did not parse
+    return values.astype(dtype.capitalize() if values.hasnans else dtype)
+
+
+def transform(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalizes an already-loaded cost DataFrame (CSV or Parquet source).
+    See `load_and_transform` for the expected and derived columns.
+    """
 
     # Validate minimal required columns
-    required = ["date", "cost_usd"]
-    missing = [c for c in required if c not in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
     if missing:
         raise ValueError(f"Missing required columns in CSV: {missing}")
 
@@ -40,25 +167,34 @@ def load_and_transform(csv_path: str) -> pd.DataFrame:
         df["account_id"] = ""
 
     # Parse date
-    df["date"] = pd.to_datetime(df["date"])
-
-    # Derive time dimensions
-    df["month"] = df["date"].dt.to_period("M").astype(str)
-    df["day"] = df["date"].dt.day
-    df["weekday"] = df["date"].dt.day_name()
-    df["year"] = df["date"].dt.year
-
-    # Cast string columns
-    df["service"] = df["service"].astype("category")
-    df["account_id"] = df["account_id"].astype(str)
-
-    # Cast optional categorical columns
-    if "region" in df.columns:
-        df["region"] = df["region"].astype("category")
-    if "usage_type" in df.columns:
-        df["usage_type"] = df["usage_type"].astype("category")
-
-    # Ensure numeric cost
-    df["cost_usd"] = pd.to_numeric(df["cost_usd"], errors="coerce").fillna(0.0)
+    with timed("etl.parse_dates"):
+        if df["date"].dtype != "datetime64[ns]":
+            df["date"] = pd.to_datetime(df["date"])
+
+    # Derive time dimensions: one category code or small int per row
+    with timed("etl.derive"):
+        dates = df["date"].dt
+        codes, months = pd.factorize(dates.to_period("M"), sort=True)
+        df["month"] = pd.Categorical.from_codes(codes, months.astype(str))
+        df["day"] = _narrow(dates.day, "int8")
+        df["weekday"] = pd.Categorical.from_codes(
+            dates.weekday.fillna(-1).astype("int8"), WEEKDAYS
+        )
+        df["year"] = _narrow(dates.year, "int16")
+
+    with timed("etl.cast"):
+        # Cast string columns
+        df["service"] = _category(df["service"])
+        df["account_id"] = _category(df["account_id"], fill="")
+
+        # Cast optional categorical columns
+        for col in ("region", "usage_type"):
+            if col in df.columns:
+                df[col] = _category(df[col])
+
+        # Ensure numeric cost
+        if df["cost_usd"].dtype != "float64":
+            df["cost_usd"] = pd.to_numeric(df["cost_usd"], errors="coerce")
+        df["cost_usd"] = df["cost_usd"].fillna(0.0)
 
     return df
@@ -0,0 +1,266 @@
+"""
+Per-series cost forecasting behind GET /api/v1/forecast.
+
+Follows notebooks/01_forecasting.ipynb. Each daily (provider, service)
+series gets its own XGBoost regressor on day-of-year and two lag
+features, and forecasts are made recursively, one day at a time.
+
+The features of every series are built at once from a (series x day)
+cost matrix. Series without a fitted model are trained in a process
+pool, in chunks. Fitted models are kept in an LRU keyed by a hash of the
+series (first date + daily values), so an unchanged series is never
+retrained. Forecasts are cached by (hash, horizon) as well.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ["dayofyear", "lag1", "lag2"]
+MODEL_PARAMS = {"n_estimators": 100, "learning_rate": 0.1, "n_jobs": 1}
+# bump when features or parameters change, to invalidate cached models
+MODEL_VERSION = "xgb-doy-lag2-v1"
+
+SERIES_KEYS = ["provider", "service"]
+
+
+class _LRU:
+    """Small thread-safe LRU mapping with hit/miss counters."""
+
+    def __init__(self, max_entries: int, name: str = "lru"):
+        self.max_entries = max_entries
+        self.name = name
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                cache_lookup(self.name, hit=True)
+                return self._items[key]
+            self.misses += 1
+            cache_lookup(self.name, hit=False)
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_models = _LRU(settings.forecast_model_cache_size, "forecast_models")
+_forecasts = _LRU(settings.forecast_model_cache_size, "forecasts")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_trained = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server (and OpenMP) is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.forecast_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+# ─── features ───────────────────────────────────────────────────────────────
+
+
+def series_matrix(
+    df: pd.DataFrame,
+) -> Tuple[pd.MultiIndex, pd.DatetimeIndex, np.ndarray]:
+    """
+    Daily totals of every (provider, service) series as a dense matrix,
+    one row per series and one column per day (missing days are 0).
+    """
+    daily = df.groupby([*SERIES_KEYS, "date"], observed=True)["cost_usd"].sum()
+    wide = daily.unstack("date", fill_value=0.0)
+    days = pd.date_range(wide.columns.min(), wide.columns.max(), freq="D")
+    wide = wide.reindex(columns=days, fill_value=0.0)
+    return wide.index, days, wide.to_numpy(dtype=np.float64)
+
+
+def build_features(
+    matrix: np.ndarray, days: pd.DatetimeIndex
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lag/day-of-year features for every series and day at once: an
+    (series x day x FEATURES) array and the matching targets. The first two
+    days of each row have no lags (NaN).
+    """
+    lag1 = np.full_like(matrix, np.nan)
+    lag2 = np.full_like(matrix, np.nan)
+    lag1[:, 1:] = matrix[:, :-1]
+    lag2[:, 2:] = matrix[:, :-2]
+    doy = np.broadcast_to(days.dayofyear.to_numpy(np.float64), matrix.shape)
+    return np.stack([doy, lag1, lag2], axis=-1), matrix
+
+
+def _series_key(first_day: pd.Timestamp, values: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(MODEL_VERSION.encode())
+    digest.update(first_day.strftime("%Y-%m-%d").encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+# ─── training (runs in the process pool) ────────────────────────────────────
+
+
+def _fit_and_forecast(
+    tasks: List[Tuple[str, Any, np.ndarray, np.ndarray, np.ndarray]],
+) -> List[Tuple[str, Any, np.ndarray, bool]]:
+    """
+    For each (key, model or None, X, y, future day-of-year) task: fit the
+    model if needed, then forecast recursively. Returns
+    (key, model, predictions, trained) per task.
+    """
+    from xgboost import XGBRegressor
+
+    out = []
+    for key, model, X, y, future_doy in tasks:
+        trained = model is None
+        if trained:
+            model = XGBRegressor(**MODEL_PARAMS)
+            model.fit(X, y)
+        lag1, lag2 = y[-1], y[-2]
+        preds = np.empty(len(future_doy))
+        for i, doy in enumerate(future_doy):
+            value = float(model.predict(np.array([[doy, lag1, lag2]]))[0])
+            preds[i] = max(value, 0.0)
+            lag1, lag2 = value, lag1
+        out.append((key, model, preds, trained))
+    return out
+
+
+# ─── forecasting ────────────────────────────────────────────────────────────
+
+
+def forecast(df: pd.DataFrame, horizon: int) -> pd.DataFrame:
+    """
+    Forecast the next `horizon` days of every (provider, service) series
+    in `df` (etl.load_and_transform output with a provider column).
+    Series with fewer than FORECAST_MIN_HISTORY_DAYS days are skipped.
+    Returns provider, service, date, cost_usd rows.
+    """
+    global _trained
+    columns = [*SERIES_KEYS, "date", "cost_usd"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    index, days, matrix = series_matrix(df)
+    features, targets = build_features(matrix, days)
+    future = pd.date_range(days[-1] + pd.Timedelta(days=1), periods=horizon)
+    future_doy = future.dayofyear.to_numpy(np.float64)
+    # each series starts on its first day with data
+    observed = matrix != 0
+    first = np.where(observed.any(axis=1), observed.argmax(axis=1), len(days))
+
+    results: Dict[int, np.ndarray] = {}
+    pending: List[int] = []
+    tasks = []
+    for row in range(len(index)):
+        start = first[row]
+        if len(days) - start < max(settings.forecast_min_history_days, 3):
+            continue
+        key = _series_key(days[start], matrix[row, start:])
+        cached = _forecasts.get((key, horizon))
+        if cached is not None:
+            results[row] = cached
+            continue
+        # drop the first two days of the series (no lags)
+        X = features[row, start + 2 :]  # noqa: E203
+        y = targets[row, start + 2 :]  # noqa: E203
+        pending.append(row)
+        tasks.append((key, _models.get(key), X, y, future_doy))
+
+    if tasks:
+        pool = _get_pool()
+        size = max(1, settings.forecast_chunk_series)
+        chunks = [
+            pool.submit(_fit_and_forecast, tasks[i : i + size])  # noqa: E203
+            for i in range(0, len(tasks), size)
+        ]
+        done = [out for chunk in chunks for out in chunk.result()]
+        trained = 0
+        for row, (key, model, preds, fitted) in zip(pending, done):
+            if fitted:
+                _models.put(key, model)
+                trained += 1
+            _forecasts.put((key, horizon), preds)
+            results[row] = preds
+        _trained += trained
+        logger.info(
+            "Forecast %d series: %d trained, %d from cached models",
+            len(tasks),
+            trained,
+            len(tasks) - trained,
+        )
+
+    if not results:
+        return pd.DataFrame(columns=columns)
+    rows = sorted(results)
+    return pd.DataFrame(
+        {
+            "provider": np.repeat(index.get_level_values(0)[rows], horizon),
+            "service": np.repeat(index.get_level_values(1)[rows], horizon),
+            "date": np.tile(future.date, len(rows)),
+            "cost_usd": np.concatenate([results[r] for r in rows]),
+        }
+    )
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "models": _models.stats(),
+        "forecasts": _forecasts.stats(),
+        "trained": _trained,
+    }
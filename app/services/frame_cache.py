@@ -0,0 +1,144 @@
+"""
+Process-wide LRU cache for transformed cost DataFrames.
+
+Entries are keyed by file path and validated against the file's
+(mtime, size) on every lookup, so a rewritten CSV is reloaded on the
+next request instead of being served stale.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+from app.core.metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    signature: Tuple[int, int]
+    value: Any
+    nbytes: int
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return int(getattr(value, "nbytes", 0))
+
+
+class FrameCache:
+    """
+    Thread-safe LRU cache keyed by file path and (mtime, size).
+
+    `max_bytes` caps the summed in-memory size of cached values; the least
+    recently used entries are evicted first. Concurrent misses on the same
+    path load the file only once. Lookups are counted in the
+    cache_requests_total metric under `name`.
+    """
+
+    def __init__(self, max_bytes: int, name: str = "frames"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Return the cached value for `path`, calling `loader(path)` when the
+        entry is missing or the file changed since it was loaded.
+        """
+        value = self._lookup(path, _signature(path))
+        if value is not None:
+            return value
+
+        with self._load_lock(path):
+            # another thread may have loaded it while we waited
+            signature = _signature(path)
+            value = self._lookup(path, signature, count=False)
+            if value is not None:
+                return value
+            value = loader(path)
+            self._store(path, signature, value)
+            return value
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    # ─── internals ──────────────────────────────────────────────────────────
+
+    def _load_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(path, threading.Lock())
+
+    def _lookup(self, path: str, signature: Tuple[int, int], count: bool = True) -> Any:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(path)
+                if count:
+                    self.hits += 1
+                    cache_lookup(self.name, hit=True)
+                return entry.value
+            if count:
+                self.misses += 1
+                cache_lookup(self.name, hit=False)
+            return None
+
+    def _store(self, path: str, signature: Tuple[int, int], value: Any) -> None:
+        nbytes = _nbytes(value)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if nbytes > self.max_bytes:
+                logger.warning(
+                    "Not caching %s: %d bytes exceeds cache cap of %d bytes",
+                    path,
+                    nbytes,
+                    self.max_bytes,
+                )
+                return
+            while self._entries and self._bytes + nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+            self._entries[path] = _Entry(signature, value, nbytes)
+            self._bytes += nbytes
@@ -1,16 +1,74 @@
 from datetime import date, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence
 
-import boto3
-from botocore.config import Config
+from app.core.config import settings
 
-from .base import BaseIngest
+from . import throttle
+from .base import (
+    BaseIngest,
+    CostExplorerClient,
+    iter_ranges_concurrently,
+    split_windows,
+)
+
+# extra GroupBy dimensions and the unified column each one fills
+GROUP_BY_COLUMNS = {"LINKED_ACCOUNT": "account_id", "REGION": "region"}
+
+THROTTLE_CODES = ("LimitExceededException", "ThrottlingException")
+
+
+def _is_throttled(exc: Exception) -> bool:
+    from botocore.exceptions import ClientError
+
+    return (
+        isinstance(exc, ClientError)
+        and exc.response.get("Error", {}).get("Code") in THROTTLE_CODES
+    )
 
 
 class AwsIngest(BaseIngest):
+    """
+    Ingest daily costs from AWS Cost Explorer.
+
+    The time period is split into `chunk_days` sub-ranges fetched
+    concurrently (`max_concurrency` at a time); every request goes through
+    the process-wide Cost Explorer token bucket, and throttled requests
+    back off adaptively. Pages are yielded in date order.
+    """
+
+    provider = "AWS"
+
     def __init__(
-        self, profile_name: Optional[str] = None, region_name: str = "us-east-1"
+        self,
+        profile_name: Optional[str] = None,
+        region_name: str = "us-east-1",
+        client: Optional[CostExplorerClient] = None,
+        group_by: Sequence[str] = (),
+        max_concurrency: Optional[int] = None,
+        chunk_days: Optional[int] = None,
     ):
+        """
+        Pass a shared Cost Explorer `client` (see ingestion.clients) to skip
+        building a new session and client. `group_by` adds LINKED_ACCOUNT or
+        REGION next to SERVICE (Cost Explorer allows two GroupBy keys) to
+        fill `account_id` / `region`.
+        """
+        unknown = set(group_by) - set(GROUP_BY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported GroupBy dimensions: {sorted(unknown)}")
+        if len(group_by) > 1:
+            raise ValueError("Cost Explorer allows one GroupBy besides SERVICE")
+        self.group_by = list(group_by)
+        self.max_concurrency = max_concurrency or settings.aws_ce_concurrency
+        self.chunk_days = chunk_days or settings.aws_ce_chunk_days
+        self.limiter = throttle.bucket("AWS", settings.aws_ce_requests_per_second)
+
+        if client is not None:
+            self.client = client
+            return
+        import boto3
+        from botocore.config import Config
+
         session = (
             boto3.Session(profile_name=profile_name)
             if profile_name
@@ -22,44 +80,59 @@ class AwsIngest(BaseIngest):
             config=Config(retries={"max_attempts": 3, "mode": "standard"}),
         )
 
-    def fetch(self, start: date, end: date) -> List[Dict]:
-        if start is None or end is None:
-            raise ValueError("start and end dates must be provided")
-
-        tp = {
-            "Start": start.isoformat(),
-            "End": (end + timedelta(days=1)).isoformat(),
-        }  # exclusive
+    def _fetch_range(self, start: date, end: date) -> List[List[Dict]]:
+        """
+        Blocking: all NextPageToken pages of one sub-range, parsed.
+        """
+        params = {
+            "TimePeriod": {
+                "Start": start.isoformat(),
+                "End": (end + timedelta(days=1)).isoformat(),  # exclusive
+            },
+            "Granularity": "DAILY",
+            "Metrics": ["UnblendedCost"],
+            "GroupBy": [{"Type": "DIMENSION", "Key": "SERVICE"}]
+            + [{"Type": "DIMENSION", "Key": key} for key in self.group_by],
+        }
+        columns = [GROUP_BY_COLUMNS[key] for key in self.group_by]
 
-        results: List[Dict] = []
+        pages: List[List[Dict]] = []
         token = None
-
         while True:
-            params = {
-                "TimePeriod": tp,
-                "Granularity": "DAILY",
-                "Metrics": ["UnblendedCost"],
-                "GroupBy": [{"Type": "DIMENSION", "Key": "SERVICE"}],
-            }
             if token:
                 params["NextPageToken"] = token
-
-            resp = self.client.get_cost_and_usage(**params)
+            resp = throttle.call_with_backoff(
+                lambda: self.client.get_cost_and_usage(**params),
+                self.limiter,
+                _is_throttled,
+            )
+            results: List[Dict] = []
             for day in resp.get("ResultsByTime", []):
                 date_str = day["TimePeriod"]["Start"]
                 for grp in day["Groups"]:
-                    svc = grp["Keys"][0]
+                    svc, *extra = grp["Keys"]
                     amount = float(grp["Metrics"]["UnblendedCost"]["Amount"])
-                    results.append(
-                        {
-                            "date": date_str,
-                            "service": svc,
-                            "cost_usd": amount,
-                        }
-                    )
+                    rec = {
+                        "provider": self.provider,
+                        "date": date_str,
+                        "service": svc,
+                        "cost_usd": amount,
+                    }
+                    rec.update(zip(columns, extra))
+                    results.append(rec)
+            pages.append(results)
 
             token = resp.get("NextPageToken")
             if not token:
-                break
+                return pages
 
-        return results
+    def iter_pages(self, start: date, end: date) -> Iterator[List[Dict]]:
+        if start is None or end is None:
+            raise ValueError("start and end dates must be provided")
+
+        yield from iter_ranges_concurrently(
+            self._fetch_range,
+            split_windows(start, end, self.chunk_days),
+            self.max_concurrency,
+            "aws-ce",
+        )
@@ -1,10 +1,54 @@
-from datetime import date
-from typing import Dict, List
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
 
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.costmanagement import CostManagementClient
+from app.core.config import settings
 
+from . import throttle
 from .base import BaseIngest
+from .base import CostManagementClient as CostManagementClientProtocol
+from .base import iter_ranges_concurrently, split_windows
+
+# extra grouping dimension -> unified column (None: folded into `service`)
+GROUP_BY_COLUMNS = {"ResourceGroupName": "account_id", "Meter": None}
+
+# result column names, matched case-insensitively
+DATE_COLUMNS = ("usagedate", "date")
+COST_COLUMNS = ("cost", "totalcost", "pretaxcost", "costusd")
+
+
+def _is_throttled(exc: Exception) -> bool:
+    from azure.core.exceptions import HttpResponseError
+
+    return isinstance(exc, HttpResponseError) and exc.status_code == 429
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """
+    Longest wait Azure asked for: Retry-After or any of the
+    x-ms-ratelimit-microsoft.costmanagement-*-retry-after headers.
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    waits = []
+    for name, value in response.headers.items():
+        name = name.lower()
+        if name == "retry-after" or (
+            name.startswith("x-ms-ratelimit") and name.endswith("retry-after")
+        ):
+            try:
+                waits.append(float(value))
+            except ValueError:
+                continue
+    return max(waits) if waits else None
+
+
+def _parse_date(value) -> str:
+    # Daily granularity returns UsageDate as a number, e.g. 20250131
+    if isinstance(value, (int, float)):
+        return datetime.strptime(str(int(value)), "%Y%m%d").date().isoformat()
+    return str(value)[:10]
 
 
 class AzureIngest(BaseIngest):
@@ -12,43 +56,118 @@ class AzureIngest(BaseIngest):
     Ingest cost data from Azure Cost Management REST API.
     Requires a Service Principal configured via AZURE_TENANT_ID, AZURE_CLIENT_ID, AZURE_CLIENT_SECRET,
     and the Cost Management Reader role on the subscription.
+
+    The range is queried one calendar month at a time, `max_concurrency`
+    months at once, through the process-wide Azure token bucket; every
+    query follows its `next_link` pages. Rows are grouped by ServiceName.
     """
 
-    def __init__(self, subscription_id: str):
-        credential = DefaultAzureCredential()
-        self.client = CostManagementClient(credential)
+    provider = "Azure"
+
+    def __init__(
+        self,
+        subscription_id: str,
+        client: Optional[CostManagementClientProtocol] = None,
+        group_by: Sequence[str] = (),
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        `group_by` adds ResourceGroupName (-> account_id) or Meter
+        (-> "service / meter"); queries allow two groupings in total.
+        """
+        unknown = set(group_by) - set(GROUP_BY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported Azure grouping: {sorted(unknown)}")
+        if len(group_by) > 1:
+            raise ValueError("Azure allows one grouping besides ServiceName")
+        # a shared client (see ingestion.clients) skips credential discovery
+        if client is None:
+            from azure.identity import DefaultAzureCredential
+            from azure.mgmt.costmanagement import CostManagementClient
+
+            client = CostManagementClient(DefaultAzureCredential())
+        self.client = client
         self.scope = f"/subscriptions/{subscription_id}"
+        self.group_by = list(group_by)
+        self.max_concurrency = max_concurrency or settings.azure_concurrency
+        self.limiter = throttle.bucket("Azure", settings.azure_requests_per_second)
 
-    def fetch(self, start: date, end: date) -> List[Dict]:
+    def _query(self, start: date, end: date) -> Dict:
         # Format dates with full ISO timestamp as Azure expects
-        start_iso = start.strftime("%Y-%m-%dT00:00:00Z")
-        end_iso = end.strftime("%Y-%m-%dT23:59:59Z")
-
-        query = {
+        return {
             "type": "Usage",
             "timeframe": "Custom",
-            "timePeriod": {"from": start_iso, "to": end_iso},
+            "timePeriod": {
+                "from": start.strftime("%Y-%m-%dT00:00:00Z"),
+                "to": end.strftime("%Y-%m-%dT23:59:59Z"),
+            },
             "dataset": {
                 "granularity": "Daily",
                 "aggregation": {"totalCost": {"name": "Cost", "function": "Sum"}},
+                "grouping": [
+                    {"type": "Dimension", "name": name}
+                    for name in ["ServiceName", *self.group_by]
+                ],
             },
         }
 
-        results: List[Dict] = []
-        # Execute the query
-        query_result = self.client.query.usage(self.scope, query)
-        if not query_result or not query_result.rows:
-            return results
-
-        # Each row is a list of values matching the columns: date, service, cost
-        for row in query_result.rows:
-            # row[0]: date, row[1]: service, row[2]: cost
-            results.append(
-                {
-                    "date": row[0],
-                    "service": row[1],
-                    "cost_usd": float(row[2]),
-                }
+    def _parse(self, result) -> List[Dict]:
+        names = [c.name.lower() for c in result.columns or []]
+
+        def index(candidates) -> int:
+            for name in candidates:
+                if name in names:
+                    return names.index(name)
+            raise ValueError(f"Azure result has none of the columns {candidates}")
+
+        i_date, i_cost = index(DATE_COLUMNS), index(COST_COLUMNS)
+        i_service = index(("servicename",))
+        extra = [(index((g.lower(),)), GROUP_BY_COLUMNS[g]) for g in self.group_by]
+
+        records = []
+        for row in result.rows or []:
+            rec = {
+                "provider": self.provider,
+                "date": _parse_date(row[i_date]),
+                "service": row[i_service],
+                "cost_usd": float(row[i_cost]),
+            }
+            for i, column in extra:
+                if column:
+                    rec[column] = row[i]
+                else:
+                    rec["service"] = f"{rec['service']} / {row[i]}"
+            records.append(rec)
+        return records
+
+    def _fetch_range(self, start: date, end: date) -> List[List[Dict]]:
+        """
+        Blocking: one query and all of its next_link pages, parsed.
+        """
+        query = self._query(start, end)
+        pages: List[List[Dict]] = []
+        params: Dict[str, str] = {}
+        while True:
+            result = throttle.call_with_backoff(
+                lambda: self.client.query.usage(self.scope, query, params=params),
+                self.limiter,
+                _is_throttled,
+                _retry_after,
             )
+            if not result:
+                return pages
+            pages.append(self._parse(result))
+            if not result.next_link:
+                return pages
+            token = parse_qs(urlparse(result.next_link).query).get("$skiptoken")
+            if not token:
+                return pages
+            params = {"$skiptoken": token[0]}
 
-        return results
+    def iter_pages(self, start: date, end: date) -> Iterator[List[Dict]]:
+        yield from iter_ranges_concurrently(
+            self._fetch_range,
+            split_windows(start, end),
+            self.max_concurrency,
+            "azure-cost",
+        )
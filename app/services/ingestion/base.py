@@ -1,15 +1,139 @@
-from datetime import date
-from typing import Dict, List
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+import pyarrow as pa
+
+_DONE = object()
+
+
+# ─── client interfaces ──────────────────────────────────────────────────────
+# The parts of the cloud SDK clients the ingestors call. Any object with
+# these methods can be injected, e.g. the local fakes of
+# scripts/benchmarks/fake_backends.py.
+
+
+class CostExplorerClient(Protocol):
+    """boto3 Cost Explorer ("ce") client."""
+
+    def get_cost_and_usage(self, **params: Any) -> Dict[str, Any]: ...
+
+
+class CostQueryOperations(Protocol):
+    def usage(self, scope: str, parameters: Any, **kwargs: Any) -> Any: ...
+
+
+class CostManagementClient(Protocol):
+    """azure-mgmt-costmanagement client; only `query.usage` is used."""
+
+    query: CostQueryOperations
+
+
+class BigQueryClient(Protocol):
+    """
+    google-cloud-bigquery client. `query(...).result()` must return rows
+    with `to_arrow_iterable(bqstorage_client=...)`.
+    """
+
+    def query(self, query: str, job_config: Any = None) -> Any: ...
+
+
+def split_windows(
+    start: date, end: date, window_days: Optional[int] = None
+) -> List[Tuple[date, date]]:
+    """
+    Split [start, end] (inclusive) into calendar-month windows, or into
+    fixed `window_days`-day windows when given.
+    """
+    windows = []
+    cur = start
+    while cur <= end:
+        if window_days:
+            last = cur + timedelta(days=window_days - 1)
+        else:
+            next_month = (cur.replace(day=1) + timedelta(days=32)).replace(day=1)
+            last = next_month - timedelta(days=1)
+        last = min(last, end)
+        windows.append((cur, last))
+        cur = last + timedelta(days=1)
+    return windows
+
+
+def iter_ranges_concurrently(
+    fetch_range: Callable[[date, date], List[List[Dict]]],
+    ranges: List[Tuple[date, date]],
+    max_workers: int,
+    name: str,
+) -> Iterator[List[Dict]]:
+    """
+    Run the blocking `fetch_range(start, end)` (returning a range's pages)
+    for up to `max_workers` ranges at a time, and yield the pages in range
+    order. Pending ranges are cancelled when the consumer stops early.
+    """
+    todo = deque(ranges)
+    pending: deque = deque()
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+    try:
+        while todo or pending:
+            while todo and len(pending) < max_workers:
+                pending.append(pool.submit(fetch_range, *todo.popleft()))
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 class BaseIngest:
     """
     Abstract base class for cloud cost ingestion.
+    Subclasses set `provider`, implement `iter_pages` and tag every raw
+    record with the provider. Columnar ingestors also implement
+    `iter_batches` and set `columnar`, and the runner then uses that path.
     """
 
+    provider: str = ""
+    columnar: bool = False
+
+    def iter_pages(self, start: date, end: date) -> Iterator[List[Dict]]:
+        """
+        Yield raw cost records between start and end dates, one provider
+        page (API response / result page) at a time.
+        """
+        raise NotImplementedError
+
+    def iter_batches(self, start: date, end: date) -> Iterator[pa.RecordBatch]:
+        """
+        Yield raw cost columns (date, service, cost_usd, optionally
+        account_id / region) as Arrow record batches.
+        """
+        raise NotImplementedError
+
     def fetch(self, start: date, end: date) -> List[Dict]:
         """
         Fetch raw cost records between start and end dates.
-        Returns a list of dicts.
+        Returns a list of dicts; prefer `iter_pages` for large ranges.
         """
-        raise NotImplementedError
+        return [rec for page in self.iter_pages(start, end) for rec in page]
+
+    async def aiter_pages(self, start: date, end: date) -> AsyncIterator[List[Dict]]:
+        """
+        Async version of `iter_pages`: each blocking page request runs in a
+        worker thread, and the next one starts only when the consumer asks.
+        """
+        pages = self.iter_pages(start, end)
+        while True:
+            page = await asyncio.to_thread(next, pages, _DONE)
+            if page is _DONE:
+                return
+            yield page
@@ -0,0 +1,354 @@
+"""
+Long-lived, shared cloud SDK clients for ingestion.
+
+Building a client means credential discovery, token fetches and new TLS
+connections, so the registry builds each client once per process and
+hands the same instance to every ingestion window. All three clients are
+safe to share across threads once constructed; construction is
+serialized per client, without blocking lookups of the others.
+
+A background thread refreshes credentials before they expire, and a
+client older than INGESTION_CLIENT_MAX_AGE_SECONDS is rebuilt on next use
+(e.g. to pick up rotated static keys). The replaced client is not closed,
+since windows may still be using it; it is released when garbage-collected.
+
+The SDKs are imported by the factories, on first use: processes that never
+ingest (API replicas serving /costs) do not pay for importing them.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AZURE_SCOPE = "https://management.azure.com/.default"
+BIGQUERY_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# a refresher returns True when it actually fetched new credentials
+Refresher = Callable[[], bool]
+
+
+@dataclass
+class _Entry:
+    client: Any
+    refresh: Refresher
+    close: Callable[[], None]
+    built_at: float
+    setup_seconds: float
+    refreshes: int = 0
+    # installed from outside: never rebuilt
+    pinned: bool = False
+    # credentials the client was built with, for clients that share them
+    credentials: Any = None
+
+
+def _pooled_session():
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=settings.ingestion_client_pool_size,
+        pool_maxsize=settings.ingestion_client_pool_size,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# ─── factories ──────────────────────────────────────────────────────────────
+
+
+def _build_aws() -> Tuple[Any, Refresher, Callable[[], None]]:
+    import boto3
+    from botocore.config import Config
+
+    profile = os.getenv("AWS_PROFILE") or None
+    session = boto3.Session(profile_name=profile)
+    client = session.client(
+        "ce",
+        region_name=os.getenv("AWS_REGION") or "us-east-1",
+        config=Config(
+            retries={"max_attempts": 3, "mode": "standard"},
+            max_pool_connections=settings.ingestion_client_pool_size,
+        ),
+    )
+
+    def refresh() -> bool:
+        creds = session.get_credentials()
+        if creds is None or not hasattr(creds, "refresh_needed"):
+            return False  # static keys never expire
+        margin = settings.ingestion_credential_refresh_margin
+        if not creds.refresh_needed(margin):
+            return False
+        # botocore refreshes only inside its own advisory window, which can
+        # be narrower than the margin: count it only if the expiry moved
+        creds.get_frozen_credentials()
+        return not creds.refresh_needed(margin)
+
+    return client, refresh, client.close
+
+
+def _build_azure() -> Tuple[Any, Refresher, Callable[[], None]]:
+    from azure.core.pipeline.transport import RequestsTransport
+    from azure.identity import DefaultAzureCredential
+    from azure.mgmt.costmanagement import CostManagementClient
+
+    credential = DefaultAzureCredential()
+    client = CostManagementClient(
+        credential,
+        transport=RequestsTransport(session=_pooled_session(), session_owner=True),
+    )
+    token = {"expires_on": 0}
+
+    def refresh() -> bool:
+        margin = settings.ingestion_credential_refresh_margin
+        if token["expires_on"] - time.time() > margin:
+            return False
+        token["expires_on"] = credential.get_token(AZURE_SCOPE).expires_on
+        return True
+
+    def close() -> None:
+        client.close()
+        credential.close()
+
+    return client, refresh, close
+
+
+def _build_bigquery(
+    project_id: str,
+) -> Tuple[Any, Refresher, Callable[[], None], Any]:
+    import requests
+    from google.auth import default as google_auth_default
+    from google.auth.transport.requests import AuthorizedSession
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+    from google.cloud import bigquery
+
+    credentials, _ = google_auth_default(scopes=BIGQUERY_SCOPES)
+    http = AuthorizedSession(credentials)
+    http.mount(
+        "https://",
+        requests.adapters.HTTPAdapter(
+            pool_connections=settings.ingestion_client_pool_size,
+            pool_maxsize=settings.ingestion_client_pool_size,
+        ),
+    )
+    client = bigquery.Client(project=project_id, credentials=credentials, _http=http)
+
+    def refresh() -> bool:
+        expiry = getattr(credentials, "expiry", None)
+        margin = timedelta(seconds=settings.ingestion_credential_refresh_margin)
+        if credentials.valid and expiry is not None:
+            # google-auth expiry is a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if expiry - now > margin:
+                return False
+        credentials.refresh(GoogleAuthRequest())
+        return True
+
+    return client, refresh, client.close, credentials
+
+
+def _bigquery_storage():
+    try:  # optional: Storage Read API for Arrow result downloads
+        from google.cloud import bigquery_storage
+    except ImportError:  # pragma: no cover - depends on the environment
+        return None
+    return bigquery_storage
+
+
+def _build_bigquery_storage(credentials) -> Tuple[Any, Refresher, Callable[[], None]]:
+    # shares the BigQuery client's credentials, which that entry refreshes
+    client = _bigquery_storage().BigQueryReadClient(credentials=credentials)
+    return client, lambda: False, client.transport.close
+
+
+# ─── registry ───────────────────────────────────────────────────────────────
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def _current(self, key: str) -> Optional[_Entry]:
+        """The entry for `key` unless it is missing or past its max age."""
+        max_age = settings.ingestion_client_max_age_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and (
+            entry.pinned or not max_age or time.monotonic() - entry.built_at < max_age
+        ):
+            return entry
+        return None
+
+    def _build_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key: str, factory: Callable[[], Tuple]) -> Any:
+        """
+        The client for `key`, built by `factory` when missing or too old.
+        A factory returns (client, refresh, close), plus the credentials
+        when other clients share them.
+        """
+        return self._entry(key, factory).client
+
+    def _entry(self, key: str, factory: Callable[[], Tuple]) -> _Entry:
+        entry = self._current(key)
+        if entry:
+            return entry
+
+        # only callers of this key wait for the build
+        with self._build_lock(key):
+            entry = self._current(key)
+            if entry:  # built by another thread while we waited
+                return entry
+            started = time.perf_counter()
+            client, refresh, close, *credentials = factory()
+            setup = time.perf_counter() - started
+            logger.info("Built %s client in %.2fs", key, setup)
+            entry = _Entry(
+                client=client,
+                refresh=refresh,
+                close=close,
+                built_at=time.monotonic(),
+                setup_seconds=setup,
+                credentials=credentials[0] if credentials else None,
+            )
+            with self._lock:
+                # windows may still hold the replaced client: no close()
+                self._entries[key] = entry
+            return entry
+
+    def aws(self):
+        """Cost Explorer client."""
+        return self._get("AWS", _build_aws)
+
+    def azure(self):
+        """Cost Management client (scope is passed per query)."""
+        return self._get("Azure", _build_azure)
+
+    def bigquery(self, project_id: str):
+        """BigQuery client for `project_id`."""
+        return self._get(f"GCP:{project_id}", lambda: _build_bigquery(project_id))
+
+    def bigquery_storage(self, project_id: str):
+        """
+        BigQuery Storage Read client for `project_id`, or None when
+        google-cloud-bigquery-storage is not installed or the BigQuery
+        client was installed without credentials.
+        """
+        if _bigquery_storage() is None:
+            return None
+        bq = self._entry(f"GCP:{project_id}", lambda: _build_bigquery(project_id))
+        if bq.credentials is None:
+            return None
+        return self._get(
+            f"GCP-storage:{project_id}",
+            lambda: _build_bigquery_storage(bq.credentials),
+        )
+
+    def install(self, key: str, client: Any) -> None:
+        """
+        Serve `client` for `key` ("AWS", "Azure", "GCP:<project>") instead
+        of building one, e.g. a local fake backend for offline runs. The
+        registry never refreshes, rebuilds or closes it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._close_entry(key, entry)
+            self._entries[key] = _Entry(
+                client=client,
+                refresh=lambda: False,
+                close=lambda: None,
+                built_at=time.monotonic(),
+                setup_seconds=0.0,
+                pinned=True,
+            )
+
+    def refresh_credentials(self) -> None:
+        """
+        Refresh every built client's credentials that are close to expiry.
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+        for key, entry in entries:
+            try:
+                if entry.refresh():
+                    entry.refreshes += 1
+                    logger.info("Refreshed %s credentials", key)
+            except Exception:
+                logger.exception("Refreshing %s credentials failed", key)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    "setup_seconds": round(e.setup_seconds, 3),
+                    "age_seconds": round(now - e.built_at, 1),
+                    "credential_refreshes": e.refreshes,
+                }
+                for key, e in self._entries.items()
+            }
+
+    # ─── lifespan ───────────────────────────────────────────────────────────
+
+    def warm(self) -> None:
+        """
+        Build the clients of every configured provider up front, so the
+        first ingestion does not pay for credential discovery.
+        """
+        builders = [("AWS", self.aws), ("Azure", self.azure)]
+        project = os.getenv("GCP_PROJECT_ID")
+        if project:
+            builders.append(("GCP", lambda: self.bigquery(project)))
+        for name, build in builders:
+            try:
+                build()
+            except Exception:
+                logger.exception("Could not build %s client at startup", name)
+
+    def start(self) -> None:
+        """
+        Start the background credential refresher (idempotent).
+        """
+        if self._refresher is not None:
+            return
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(settings.ingestion_credential_refresh_interval):
+                self.refresh_credentials()
+
+        self._refresher = threading.Thread(
+            target=loop, name="credential-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._refresher = None
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                self._close_entry(key, entry)
+
+    def _close_entry(self, key: str, entry: _Entry) -> None:
+        self._entries.pop(key, None)
+        try:
+            entry.close()
+        except Exception:
+            logger.exception("Closing %s client failed", key)
+
+
+registry = ClientRegistry()
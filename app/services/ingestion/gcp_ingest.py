@@ -1,9 +1,18 @@
 from datetime import date
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Sequence
 
-from google.cloud import bigquery
+import pyarrow as pa
 
-from .base import BaseIngest
+from .base import BaseIngest, BigQueryClient
+from .normalizer import normalize_arrow
+
+# extra grouping: billing export column -> unified column (None: folded
+# into `service`, which is the only other per-row dimension we store)
+GROUP_BY_COLUMNS = {
+    "project": ("project.id", "account_id"),
+    "region": ("location.region", "region"),
+    "sku": ("sku.description", None),
+}
 
 
 class GcpIngest(BaseIngest):
@@ -11,41 +20,78 @@ class GcpIngest(BaseIngest):
     Ingest GCP billing export data from BigQuery.
     Assumes billing export into a single partitioned table.
     Uses query parameters to avoid SQL-injection vectors.
+
+    Results are read as Arrow record batches (`iter_batches`), through
+    the BigQuery Storage Read API when a `bqstorage_client` is given.
     """
 
-    def __init__(self, project_id: str, dataset: str, table: str):
-        self.client = bigquery.Client(project=project_id)
+    provider = "GCP"
+    columnar = True
+
+    def __init__(
+        self,
+        project_id: str,
+        dataset: str,
+        table: str,
+        client: Optional[BigQueryClient] = None,
+        bqstorage_client=None,
+        group_by: Sequence[str] = (),
+    ):
+        """
+        `group_by` adds any of "project" (-> account_id), "region" and
+        "sku" (-> "service / sku") to the daily service grouping.
+        """
+        unknown = set(group_by) - set(GROUP_BY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported GCP grouping: {sorted(unknown)}")
+        # a shared client (see ingestion.clients) skips credential discovery
+        if client is None:
+            from google.cloud import bigquery
+
+            client = bigquery.Client(project=project_id)
+        self.client = client
+        self.bqstorage_client = bqstorage_client
+        self.group_by = [g for g in GROUP_BY_COLUMNS if g in group_by]
         # table should be a trusted identifier
         self.table = f"{project_id}.{dataset}.{table}"
 
-    def fetch(self, start: date, end: date) -> List[Dict]:
-        sql = f"""
+    def _sql(self) -> str:
+        service = "service.description"
+        if "sku" in self.group_by:
+            service = f"CONCAT({service}, ' / ', sku.description)"
+        extra = [
+            f"{expr} AS {column}"
+            for expr, column in (GROUP_BY_COLUMNS[g] for g in self.group_by)
+            if column
+        ]
+        select = ",\n          ".join(
+            ["DATE(usage_start_time) AS date", f"{service} AS service"]
+            + extra
+            + ["SUM(cost) AS cost_usd"]
+        )
+        keys = ", ".join(["date", "service"] + [e.rsplit(" AS ", 1)[1] for e in extra])
+        return f"""
         SELECT
-          DATE(usage_start_time) AS date, 
-          service.description    AS service, 
-          SUM(cost)              AS cost_usd
-        FROM `{self.table}`"""  # nosec B608
-        """WHERE DATE(_PARTITIONTIME) BETWEEN @start AND @end
-        GROUP BY date, service
+          {select}
+        FROM `{self.table}`
+        WHERE DATE(_PARTITIONTIME) BETWEEN @start AND @end
+        GROUP BY {keys}
         ORDER BY date
-        """
+        """  # nosec B608
+
+    def iter_batches(self, start: date, end: date) -> Iterator[pa.RecordBatch]:
+        from google.cloud import bigquery
+
         job_config = bigquery.QueryJobConfig(
             query_parameters=[
                 bigquery.ScalarQueryParameter("start", "DATE", start),
                 bigquery.ScalarQueryParameter("end", "DATE", end),
             ]
         )
+        rows = self.client.query(self._sql(), job_config=job_config).result()
+        # Storage Read API streams when a client is given, REST pages otherwise
+        yield from rows.to_arrow_iterable(bqstorage_client=self.bqstorage_client)
 
-        query_job = self.client.query(sql, job_config=job_config)
-        rows = query_job.result()
-
-        results: List[Dict] = []
-        for row in rows:
-            results.append(
-                {
-                    "date": row.date.isoformat(),
-                    "service": row.service,
-                    "cost_usd": float(row.cost_usd),
-                }
-            )
-        return results
+    def iter_pages(self, start: date, end: date) -> Iterator[List[Dict]]:
+        for batch in self.iter_batches(start, end):
+            yield normalize_arrow(batch, self.provider).to_pylist()
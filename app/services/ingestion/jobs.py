@@ -0,0 +1,383 @@
+"""
+Background ingestion jobs.
+
+A job splits its date range into windows (calendar months by default)
+per provider. Windows run on a dedicated event loop thread, at most
+INGESTION_MAX_WORKERS at a time, through `runner.run_provider` (bounded
+thread pool + per-window timeout). Each window streams its pages into
+storage as they arrive, so a failure only affects that window, which can
+then be retried on its own.
+
+A job runs in the worker process that accepted it, which also writes its
+progress to app/data/ingestion_jobs/<id>.json on every change, so any
+uvicorn worker can report it. A finished job can be retried from any
+worker, which then takes it over. The last INGESTION_JOB_HISTORY jobs are
+kept. `runner` locks each window across processes, so the same window
+never runs twice at once.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.ingestion import runner, watermarks
+from app.services.ingestion.base import split_windows
+
+logger = logging.getLogger(__name__)
+
+FAILED = ("error", "timeout")
+
+JOBS_DIR = Path(__file__).resolve().parents[2] / "data" / "ingestion_jobs"
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class Window:
+    provider: str
+    start: date
+    end: date
+    status: str = "pending"  # pending, running, ok, error, timeout
+    attempts: int = 0
+    count: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    id: str
+    start: Optional[date]
+    end: Optional[date]
+    windows: List[Window]
+    created_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    running_since: Optional[datetime] = None
+    busy_seconds: float = 0.0
+
+    @property
+    def status(self) -> str:
+        states = {w.status for w in self.windows}
+        if not states:
+            return "ok"  # nothing to fetch: every provider is up to date
+        if states & {"pending", "running"}:
+            return "running" if self.started_at else "queued"
+        if states == {"ok"}:
+            return "ok"
+        return "partial" if "ok" in states else "error"
+
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> "Job":
+        """Rebuild a job from its persisted snapshot (see `record`)."""
+        windows = [
+            Window(
+                **{
+                    **w,
+                    "start": date.fromisoformat(w["start"]),
+                    "end": date.fromisoformat(w["end"]),
+                }
+            )
+            for w in data["windows"]
+        ]
+        return cls(
+            id=data["id"],
+            start=_parse(data["start"], date),
+            end=_parse(data["end"], date),
+            windows=windows,
+            created_at=_parse(data["created_at"], datetime),
+            started_at=_parse(data["started_at"], datetime),
+            finished_at=_parse(data["finished_at"], datetime),
+            busy_seconds=data["busy_seconds"],
+        )
+
+    def record(self) -> Dict[str, Any]:
+        """The snapshot persisted for other workers, as JSON types."""
+        data = {**self.snapshot(), "busy_seconds": self.busy_seconds}
+        return json.loads(json.dumps(data, default=lambda v: v.isoformat()))
+
+    def snapshot(self, include_windows: bool = True) -> Dict[str, Any]:
+        done = [w for w in self.windows if w.status not in ("pending", "running")]
+        count = sum(w.count for w in self.windows)
+        elapsed = self.busy_seconds
+        if self.running_since:
+            elapsed += (_now() - self.running_since).total_seconds()
+        data: Dict[str, Any] = {
+            "id": self.id,
+            "status": self.status,
+            "start": self.start,
+            "end": self.end,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "windows_total": len(self.windows),
+            "windows_done": len(done),
+            "windows_failed": sum(w.status in FAILED for w in self.windows),
+            "progress": len(done) / len(self.windows) if self.windows else 1.0,
+            "count": count,
+            "records_per_second": count / elapsed if elapsed > 0 else 0.0,
+        }
+        if include_windows:
+            data["windows"] = [vars(w).copy() for w in self.windows]
+        return data
+
+
+def _parse(value: Optional[str], kind: type) -> Any:
+    return kind.fromisoformat(value) if value else None
+
+
+class JobManager:
+    """
+    Owns the job registry and the event loop thread that runs the windows.
+    """
+
+    def __init__(self, max_workers: int, history: int):
+        self.max_workers = max_workers
+        self.history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # ─── public API ─────────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        providers: Sequence[str] = runner.PROVIDERS,
+        window_days: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Queue a job. A missing `start`/`end` is filled in per provider from
+        its watermark (incremental run, see `watermarks.incremental_range`).
+        """
+        windows = []
+        for p in providers:
+            inc_start, inc_end = watermarks.incremental_range(p)
+            p_start, p_end = start or inc_start, end or inc_end
+            windows += [
+                Window(provider=p, start=ws, end=we)
+                for ws, we in split_windows(p_start, p_end, window_days)
+            ]
+        windows.sort(key=lambda w: (w.start, w.provider))
+        job = Job(
+            id=uuid.uuid4().hex,
+            start=min((w.start for w in windows), default=start),
+            end=max((w.end for w in windows), default=end),
+            windows=windows,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            snapshot = job.snapshot()
+            self._persist(job)
+        self._prune()
+        if windows:
+            self._schedule(job, windows)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._active(job_id)
+            if job:
+                return job.snapshot()
+            stored = self._jobs.get(job_id)
+        # finished here, or accepted (or since retried) by another worker
+        return self._stored(job_id) or (stored.snapshot() if stored else None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            active = {
+                job.id: job.snapshot(include_windows=False)
+                for job in self._jobs.values()
+                if self._active(job.id)
+            }
+        for data in self._stored_all():
+            data.pop("windows")
+            active.setdefault(data["id"], data)
+        return sorted(active.values(), key=_created_at, reverse=True)[: self.history]
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-run the failed windows of a job, in this worker process even if
+        another one accepted it. Returns None for unknown jobs and raises
+        ValueError while the job is still running, or while a timed-out
+        window's thread has not stopped yet.
+        """
+        with self._lock, _jobs_lock():
+            job = self._active(job_id)
+            if job is None:
+                stored = self._stored(job_id)
+                job = Job.from_record(stored) if stored else self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ("queued", "running"):
+                raise ValueError(f"Job {job_id} is still {job.status}")
+            failed = [w for w in job.windows if w.status in FAILED]
+            busy = [
+                w for w in failed if runner.window_running(w.provider, w.start, w.end)
+            ]
+            if busy:
+                raise ValueError(
+                    f"Job {job_id} has {len(busy)} timed-out window(s) whose "
+                    "fetch is still stopping; retry shortly"
+                )
+            for w in failed:
+                w.status = "pending"
+                w.error = None
+            if failed:
+                job.finished_at = None
+            self._jobs[job.id] = job
+            snapshot = job.snapshot()
+            self._persist(job)
+        if failed:
+            self._schedule(job, failed)
+        return snapshot
+
+    # ─── persistence ────────────────────────────────────────────────────────
+
+    def _active(self, job_id: str) -> Optional[Job]:
+        """The job, while queued or running in this process (under the lock)."""
+        job = self._jobs.get(job_id)
+        return job if job and job.status in ("queued", "running") else None
+
+    def _persist(self, job: Job) -> None:
+        """Write `job`'s progress for other workers (call under the lock)."""
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        path = JOBS_DIR / f"{job.id}.json"
+        tmp = path.with_name(f".{job.id}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(job.record()))
+        os.replace(tmp, path)
+
+    def _stored(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            return json.loads((JOBS_DIR / f"{job_id}.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def _stored_all(self) -> List[Dict[str, Any]]:
+        stored = []
+        for path in JOBS_DIR.glob("*.json"):
+            try:
+                stored.append(json.loads(path.read_text()))
+            except FileNotFoundError:  # pruned by another worker
+                continue
+        return stored
+
+    def _prune(self) -> None:
+        """Delete persisted jobs beyond the newest INGESTION_JOB_HISTORY."""
+        stored = sorted(self._stored_all(), key=_created_at, reverse=True)
+        for data in stored[self.history :]:  # noqa: E203
+            (JOBS_DIR / f"{data['id']}.json").unlink(missing_ok=True)
+
+    # ─── execution ──────────────────────────────────────────────────────────
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="ingestion-jobs", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def _schedule(self, job: Job, windows: List[Window]) -> None:
+        asyncio.run_coroutine_threadsafe(
+            self._execute(job, windows), self._ensure_loop()
+        )
+
+    async def _execute(self, job: Job, windows: List[Window]) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        with self._lock:
+            job.started_at = job.started_at or _now()
+            job.running_since = _now()
+            self._persist(job)
+        await asyncio.gather(*(self._run_window(job, w) for w in windows))
+        with self._lock:
+            job.busy_seconds += (_now() - job.running_since).total_seconds()
+            job.running_since = None
+            job.finished_at = _now()
+            self._persist(job)
+        self._advance_watermarks(job)
+        logger.info("Ingestion job %s finished: %s", job.id, job.status)
+
+    def _advance_watermarks(self, job: Job) -> None:
+        """
+        Move each provider's watermark over the contiguous run of successful
+        windows that starts at (or before) the day after it. A failed window
+        stops the run, so the next incremental run fetches it again.
+        """
+        limit = watermarks.last_complete_day()
+        with self._lock:
+            windows = sorted(job.windows, key=lambda w: w.start)
+        for provider in {w.provider for w in windows}:
+            mark = watermarks.get(provider)
+            reached = mark
+            for w in (w for w in windows if w.provider == provider):
+                if w.status != "ok":
+                    break
+                if reached is not None and w.start > reached + timedelta(days=1):
+                    break  # gap between the watermark and this window
+                day = min(w.end, limit)
+                reached = day if reached is None else max(reached, day)
+            if reached is not None and reached != mark:
+                watermarks.advance(provider, reached)
+
+    async def _run_window(self, job: Job, window: Window) -> None:
+        assert self._slots is not None
+        async with self._slots:
+            with self._lock:
+                window.status = "running"
+                window.attempts += 1
+                self._persist(job)
+            outcome = await runner.run_provider(
+                window.provider, window.start, window.end
+            )
+            with self._lock:
+                window.status = outcome.status
+                window.count = outcome.count
+                window.seconds = round(outcome.seconds, 3)
+                window.error = outcome.error
+                self._persist(job)
+
+
+@contextmanager
+def _jobs_lock() -> Iterator[None]:
+    """Serialize retries across worker processes."""
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(JOBS_DIR / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _created_at(snapshot: Dict[str, Any]) -> datetime:
+    created = snapshot["created_at"]
+    return created if isinstance(created, datetime) else _parse(created, datetime)
+
+
+jobs = JobManager(
+    max_workers=settings.ingestion_max_workers,
+    history=settings.ingestion_job_history,
+)
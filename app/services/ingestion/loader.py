@@ -1,22 +1,249 @@
-import csv
+import logging
+import os
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import settings
+from app.services import (
+    anomalies,
+    cost_repository,
+    cost_service,
+    cost_store,
+    data_versions,
+    rollups,
+)
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# upsert key; columns missing from a file are ignored
+KEY_COLUMNS = ["provider", "date", "service", "account_id", "region"]
+
+# concurrent windows save from worker threads; CSV upserts must not interleave
+_save_lock = threading.Lock()
+
+
+def _upsert_csv(path: Path, new: pd.DataFrame) -> None:
+    """
+    Replace rows of `path` that share a key with `new`, append the
+    rest, and rewrite the file atomically. Existing rows are kept verbatim.
+    """
+    new = new.astype("string")
+    if path.exists():
+        old = pd.read_csv(path, dtype="string", keep_default_na=False)
+    else:
+        old = pd.DataFrame(columns=new.columns, dtype="string")
+
+    keys = [c for c in KEY_COLUMNS if c in new.columns or c in old.columns]
+
+    def key_index(df: pd.DataFrame) -> pd.MultiIndex:
+        return pd.MultiIndex.from_arrays(
+            [
+                df[c].fillna("") if c in df.columns else pd.Series("", index=df.index)
+                for c in keys
+            ]
+        )
+
+    new = new[~key_index(new).duplicated(keep="last")]
+    merged = pd.concat([old[~key_index(old).isin(key_index(new))], new])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    merged.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _import_legacy_csvs(providers: Iterable[str]) -> None:
+    """
+    Move each provider's legacy CSV into the store (or database) before its
+    first ingested rows are written. A stored provider is no longer served
+    from its CSV, and incremental ingestion only fetches recent months, so
+    the CSV history would otherwise disappear.
+    """
+    for provider in sorted(providers):
+        filename = cost_service.PROVIDER_FILES.get(provider)
+        if filename is None or cost_service.in_store(provider):
+            continue
+        csv_path = os.path.join(cost_service.DATA_DIR, filename)
+        if not os.path.isfile(csv_path):
+            continue
+        logger.info("Importing legacy %s CSV before its first ingestion", provider)
+        if settings.cost_storage == "database":
+            for batch in cost_store.csv_records(csv_path, provider):
+                cost_repository.repository.write_sync(batch)
+        else:
+            cost_store.import_csv(csv_path, provider)
+
+
+def reset_provider(provider: str, filename: str) -> None:
+    """
+    Forget everything saved for `provider` before a full re-fetch: its CSV
+    `filename`, its rows in the store and the database, its rollups and
+    its anomaly state.
+    """
+    with _save_lock:
+        csv_path = DATA_DIR / filename
+        if csv_path.exists():
+            logger.info("Removing %s", csv_path)
+            csv_path.unlink()
+        cost_store.delete_provider(provider)
+        if settings.cost_storage == "database":
+            cost_repository.repository.delete_provider_sync(provider)
+        rollups.drop_provider(provider)
+        anomalies.drop_provider(provider)
+        data_versions.bump(provider)
+
+
+def destination(filename: str = "ingested_costs.csv") -> str:
+    """
+    Where `save` writes with the current COST_STORAGE, for messages.
+    """
+    if settings.cost_storage == "parquet":
+        return f"the Parquet store in {cost_store.STORE_DIR}"
+    if settings.cost_storage == "database":
+        return "the database cost repository"
+    return str(DATA_DIR / filename)
 
 
-def save(records: List[Dict], filename: str = "ingested_costs.csv") -> None:
+def save(
+    records: List[Dict],
+    filename: str = "ingested_costs.csv",
+    provider: Optional[str] = None,
+) -> None:
     """
-    Persist unified records to CSV in the data directory.
+    Persist unified records in the data directory, as upserts keyed by
+    (provider, date, service, account_id, region): saving an overlapping range
+    again replaces rows instead of duplicating them.
+
+    With COST_STORAGE=parquet (default) records go to the partitioned
+    Parquet store, which needs a provider per record (taken from the
+    record, or from `provider` when the record has none), and the summary
+    rollups and anomaly state are refreshed. COST_STORAGE=database does the same with the
+    database repository. With COST_STORAGE=csv they are merged into
+    `filename`.
     """
-    path = DATA_DIR / filename
     if not records:
         return
-    # write header if file not exists
-    write_header = not path.exists()
-    with open(path, mode="a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
-        if write_header:
-            writer.writeheader()
-        writer.writerows(records)
+    if provider:
+        records = [{**r, "provider": r.get("provider") or provider} for r in records]
+
+    with _save_lock:
+        if settings.cost_storage in ("parquet", "database"):
+            _import_legacy_csvs({r["provider"] for r in records})
+        if settings.cost_storage == "parquet":
+            cost_store.write(records)
+            rollups.apply(records)
+            anomalies.apply(records)
+            # only now: nothing stale gets cached under the new version
+            data_versions.bump(*{r["provider"] for r in records})
+            return
+        if settings.cost_storage == "database":
+            cost_repository.repository.write_sync(records)
+            rollups.apply(records)
+            anomalies.apply(records)
+            return
+
+        _upsert_csv(DATA_DIR / filename, pd.DataFrame.from_records(records))
+
+
+def save_table(table: pa.Table, filename: str = "ingested_costs.csv") -> None:
+    """
+    `save` for a normalized Arrow table (cost_store.TABLE_SCHEMA), as built
+    by `normalizer.normalize_arrow`: no per-record dicts on the Parquet path.
+    """
+    if not table.num_rows:
+        return
+    with _save_lock:
+        if settings.cost_storage in ("parquet", "database"):
+            _import_legacy_csvs(table.column("provider").unique().to_pylist())
+        if settings.cost_storage == "parquet":
+            cost_store.write_table(table)
+            rollups.apply(table)
+            anomalies.apply(table)
+            data_versions.bump(*table.column("provider").unique().to_pylist())
+            return
+        if settings.cost_storage == "database":
+            cost_repository.repository.write_sync(table)
+            rollups.apply(table)
+            anomalies.apply(table)
+            return
+
+        df = table.to_pandas()
+        df["date"] = df["date"].astype(str)
+        _upsert_csv(DATA_DIR / filename, df.dropna(axis=1, how="all"))
+
+
+class BatchWriter:
+    """
+    Sink for streamed records: buffers up to `batch_rows` records (default
+    INGESTION_BATCH_ROWS, 0 = every write) and `save`s each full batch.
+    Pages may be lists of dicts or normalized Arrow tables (`save_table`),
+    but not both in one writer.
+    Use as a context manager so the last partial batch is flushed.
+    """
+
+    def __init__(
+        self,
+        filename: str = "ingested_costs.csv",
+        provider: Optional[str] = None,
+        batch_rows: Optional[int] = None,
+    ):
+        self.filename = filename
+        self.provider = provider
+        self.batch_rows = (
+            settings.ingestion_batch_rows if batch_rows is None else batch_rows
+        )
+        self.count = 0
+        self.batches = 0
+        self._buffer: list = []
+        self._rows = 0
+
+    def write(self, records: Union[List[Dict], pa.Table]) -> None:
+        if isinstance(records, pa.Table):
+            self._buffer.append(records)
+            self._rows += records.num_rows
+        else:
+            self._buffer.extend(records)
+            self._rows += len(records)
+        if self._rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        batch, rows = self._buffer, self._rows
+        self._buffer, self._rows = [], 0
+        if isinstance(batch[0], pa.Table):
+            save_table(pa.concat_tables(batch), filename=self.filename)
+        else:
+            save(batch, filename=self.filename, provider=self.provider)
+        self.count += rows
+        self.batches += 1
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # on error, keep what was already saved but drop the partial batch
+        if exc_type is None:
+            self.flush()
+
+
+def save_stream(
+    batches: Iterable[Union[List[Dict], pa.Table]],
+    filename: str = "ingested_costs.csv",
+    provider: Optional[str] = None,
+    batch_rows: Optional[int] = None,
+) -> int:
+    """
+    Save an iterable of record batches (e.g. `normalize_pages(...)`) as they
+    arrive. Returns the number of records saved.
+    """
+    with BatchWriter(filename, provider, batch_rows) as writer:
+        for batch in batches:
+            writer.write(batch)
+    return writer.count
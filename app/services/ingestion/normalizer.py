@@ -1,24 +1,89 @@
 from datetime import date, datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.cost_store import TABLE_SCHEMA
+
+OPTIONAL_FIELDS = ("account_id", "region")
+
+# a provider page: raw dicts, or raw columns from a columnar ingestor
+Page = Union[List[Dict], pa.RecordBatch, pa.Table]
+
+
+def _unify(rec: Dict) -> Dict:
+    d = rec.get("date")
+    # Convert date/datetime to ISO string, leave string as is
+    if isinstance(d, (date, datetime)):
+        d = d.isoformat()
+    out = {
+        "provider": rec.get("provider"),
+        "date": d,
+        "service": rec.get("service"),
+        "cost_usd": rec.get("cost_usd"),
+    }
+    # optional dimensions, filled when the provider groups by them
+    for col in OPTIONAL_FIELDS:
+        if rec.get(col) is not None:
+            out[col] = rec[col]
+    return out
 
 
 def normalize(*args: List[Dict]) -> List[Dict]:
     """
     Flatten and unify raw ingestion records from multiple providers.
-    Output records have common fields: date, provider, cost_usd.
+    Output records have common fields: provider, date, service, cost_usd,
+    plus account_id / region when the raw record has them.
+    """
+    return [_unify(rec) for source in args for rec in source]
+
+
+def normalize_arrow(
+    batch: Union[pa.RecordBatch, pa.Table], provider: Optional[str] = None
+) -> pa.Table:
+    """
+    Columnar `normalize`: cast a raw Arrow batch (date, service, cost_usd and
+    optionally account_id, region, provider) to cost_store.TABLE_SCHEMA
+    with Arrow compute kernels, without building per-row Python objects.
+    `provider` fills the provider column when the batch has none.
+    """
+    if isinstance(batch, pa.RecordBatch):
+        batch = pa.Table.from_batches([batch])
+    n = batch.num_rows
+    columns = []
+    for field in TABLE_SCHEMA:
+        if field.name in batch.column_names:
+            col = batch[field.name]
+            if field.name == "date" and pa.types.is_timestamp(col.type):
+                col = pc.cast(col, pa.date32())
+            col = col.cast(field.type)
+        elif field.name == "provider" and provider:
+            col = pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(n, dtype=np.int8)), pa.array([provider])
+            ).cast(pa.string())
+        elif field.name == "provider":
+            raise ValueError("Arrow batch has no provider column and none given")
+        else:
+            col = pa.nulls(n, field.type)
+        if field.name == "cost_usd":
+            col = pc.fill_null(col, 0.0)
+        columns.append(col)
+    return pa.Table.from_arrays(columns, schema=TABLE_SCHEMA)
+
+
+def normalize_pages(
+    pages: Iterable[Page], provider: Optional[str] = None
+) -> Iterator[Union[List[Dict], pa.Table]]:
+    """
+    Streaming `normalize`: unify each page as it arrives, so only the
+    current page is held (raw and unified) at a time. Arrow pages go
+    through `normalize_arrow` and stay tables. Empty pages are skipped.
     """
-    unified = []
-    for source in args:
-        for rec in source:
-            d = rec.get("date")
-            # Convert date/datetime to ISO string, leave string as is
-            if isinstance(d, (date, datetime)):
-                d = d.isoformat()
-            unified.append(
-                {
-                    "date": d,
-                    "service": rec.get("service"),
-                    "cost_usd": rec.get("cost_usd"),
-                }
-            )
-    return unified
+    for page in pages:
+        if isinstance(page, (pa.RecordBatch, pa.Table)):
+            if page.num_rows:
+                yield normalize_arrow(page, provider)
+        elif page:
+            yield [_unify(rec) for rec in page]
@@ -0,0 +1,239 @@
+"""
+Execution of the provider ingestors.
+
+The cloud SDK clients are blocking, so each fetch runs on a bounded
+thread pool and is awaited with its own timeout, counted from the moment
+a pool thread picks it up; one slow or failing provider never blocks an
+event loop or the other providers. A timed-out window's thread runs on
+until its next page, and the window cannot be started again until then,
+in this or any other worker process (see `_window_lock`).
+
+A window is streamed: provider pages are normalized and saved in batches
+as they arrive, so memory is bounded by a page (plus one batch), not by
+the window's date range.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import INGESTION_DURATION, INGESTION_PAGES, INGESTION_ROWS
+from app.services.ingestion.aws_ingest import AwsIngest
+from app.services.ingestion.azure_ingest import AzureIngest
+from app.services.ingestion.base import BaseIngest
+from app.services.ingestion.clients import registry
+from app.services.ingestion.gcp_ingest import GcpIngest
+from app.services.ingestion.loader import BatchWriter
+from app.services.ingestion.normalizer import Page, normalize_pages
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("AWS", "Azure", "GCP")
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.ingestion_max_workers, thread_name_prefix="ingest"
+)
+
+# (provider, start, end) → worker of that window, until its thread returns
+WindowKey = Tuple[str, date, date]
+_workers: Dict[WindowKey, Future] = {}
+_workers_lock = threading.Lock()
+
+LOCK_DIR = Path(__file__).resolve().parents[2] / "data" / "ingestion_locks"
+
+
+@dataclass
+class ProviderOutcome:
+    status: str  # "ok", "error" or "timeout"
+    count: int = 0  # records saved
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+def build_ingestor(provider: str) -> BaseIngest:
+    """
+    Construct the ingestor for `provider` from environment configuration,
+    on top of the shared SDK clients of `clients.registry`.
+    Raises ValueError when required variables are missing.
+    """
+    if provider == "AWS":
+        group_by = [g.strip() for g in settings.aws_ce_group_by.split(",") if g.strip()]
+        return AwsIngest(client=registry.aws(), group_by=group_by)
+    if provider == "Azure":
+        sub_id = os.getenv("AZURE_SUBSCRIPTION_ID")
+        if not sub_id:
+            raise ValueError("Missing AZURE_SUBSCRIPTION_ID environment variable")
+        group_by = [g.strip() for g in settings.azure_group_by.split(",") if g.strip()]
+        return AzureIngest(
+            subscription_id=sub_id, client=registry.azure(), group_by=group_by
+        )
+    if provider == "GCP":
+        proj = os.getenv("GCP_PROJECT_ID")
+        ds = os.getenv("GCP_DATASET")
+        tbl = os.getenv("GCP_TABLE")
+        if not (proj and ds and tbl):
+            raise ValueError(
+                "Missing GCP_PROJECT_ID, GCP_DATASET, or GCP_TABLE environment variables"
+            )
+        group_by = [g.strip() for g in settings.gcp_group_by.split(",") if g.strip()]
+        return GcpIngest(
+            project_id=proj,
+            dataset=ds,
+            table=tbl,
+            client=registry.bigquery(proj),
+            bqstorage_client=(
+                registry.bigquery_storage(proj) if settings.gcp_storage_api else None
+            ),
+            group_by=group_by,
+        )
+    raise ValueError(f"Unknown provider: {provider!r}")
+
+
+def iter_provider_pages(provider: str, start: date, end: date) -> Iterator[Page]:
+    """
+    Blocking: yield the provider's raw records page by page, as Arrow
+    record batches for columnar ingestors.
+    """
+    ingestor = build_ingestor(provider)
+    if ingestor.columnar:
+        return ingestor.iter_batches(start, end)
+    return ingestor.iter_pages(start, end)
+
+
+class Cancelled(Exception):
+    pass
+
+
+def ingest_window(
+    provider: str, start: date, end: date, cancel: Optional[threading.Event] = None
+) -> int:
+    """
+    Blocking: stream one window from the provider into storage and return
+    the number of records saved. Stops between pages once `cancel` is set.
+    """
+    with BatchWriter(provider=provider) as writer:
+        for page in normalize_pages(
+            iter_provider_pages(provider, start, end), provider
+        ):
+            if cancel is not None and cancel.is_set():
+                raise Cancelled(f"{provider} window cancelled")
+            INGESTION_PAGES.labels(provider).inc()
+            writer.write(page)
+    INGESTION_ROWS.labels(provider).inc(writer.count)
+    return writer.count
+
+
+def _lock_path(key: WindowKey) -> Path:
+    provider, start, end = key
+    return LOCK_DIR / f"{provider}_{start.isoformat()}_{end.isoformat()}.lock"
+
+
+@contextmanager
+def _window_lock(key: WindowKey) -> Iterator[None]:
+    """
+    Hold an exclusive lock on one window, across worker processes.
+    Raises RuntimeError when another process is ingesting it.
+    """
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_lock_path(key), "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(
+                f"{key[0]} window {key[1]}..{key[2]} is running in another process"
+            ) from None
+        yield
+
+
+def window_running(provider: str, start: date, end: date) -> bool:
+    """
+    True while a thread is still working on this window, including one
+    that outlived its timeout and has not reached its next page yet, or
+    while another worker process holds the window's lock.
+    """
+    key = (provider, start, end)
+    with _workers_lock:
+        worker = _workers.get(key)
+    if worker is not None and not worker.done():
+        return True
+    try:
+        with open(_lock_path(key), "r") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except FileNotFoundError:
+        return False
+    except BlockingIOError:
+        return True
+    return False
+
+
+def _submit(
+    key: WindowKey, cancel: threading.Event, started: "asyncio.Future[None]"
+) -> Future:
+    loop = started.get_loop()
+
+    def mark_started() -> None:
+        if not started.done():
+            started.set_result(None)
+
+    def work() -> int:
+        loop.call_soon_threadsafe(mark_started)
+        with _window_lock(key):
+            return ingest_window(*key, cancel)
+
+    def forget(worker: Future) -> None:
+        with _workers_lock:
+            if _workers.get(key) is worker:
+                del _workers[key]
+
+    with _workers_lock:
+        if key in _workers and not _workers[key].done():
+            raise RuntimeError(
+                f"{key[0]} window {key[1]}..{key[2]} is still running "
+                "from a previous attempt"
+            )
+        worker = _workers[key] = _pool.submit(work)
+    worker.add_done_callback(forget)
+    return worker
+
+
+async def run_provider(
+    provider: str, start: date, end: date, timeout: Optional[float] = None
+) -> ProviderOutcome:
+    """
+    Await one provider window (fetch, normalize, save) on the ingestion
+    pool, with a timeout that starts once a pool thread runs it. Never
+    raises: failures are captured in the returned outcome.
+    """
+    timeout = timeout or settings.ingestion_provider_timeout_seconds
+    cancel = threading.Event()
+    started = time.perf_counter()
+    try:
+        running = asyncio.get_running_loop().create_future()
+        worker = asyncio.wrap_future(_submit((provider, start, end), cancel, running))
+        # queued behind other windows: no timeout until a thread is free
+        await asyncio.wait([running, worker], return_when=asyncio.FIRST_COMPLETED)
+        count = await asyncio.wait_for(worker, timeout=timeout)
+        outcome = ProviderOutcome(status="ok", count=count)
+    except asyncio.TimeoutError:
+        # the worker thread stops at its next page; batches already saved
+        # are kept (saves are upserts, so a retry just overwrites them)
+        cancel.set()
+        outcome = ProviderOutcome(
+            status="timeout", error=f"{provider} fetch exceeded {timeout:g}s"
+        )
+    except Exception as exc:
+        logger.exception("%s ingestion failed", provider)
+        outcome = ProviderOutcome(status="error", error=str(exc) or type(exc).__name__)
+    outcome.seconds = time.perf_counter() - started
+    INGESTION_DURATION.labels(provider, outcome.status).observe(outcome.seconds)
+    return outcome
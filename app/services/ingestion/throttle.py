@@ -0,0 +1,155 @@
+"""
+Client-side rate limiting for the provider billing APIs.
+
+Each API gets one process-wide `TokenBucket`, shared by every ingestor
+and worker thread, so concurrent windows and sub-range fetches together
+stay under the provider's request limit. The bucket is adaptive: a
+throttled response halves its rate, and each success steps the rate back
+up to the configured limit (AIMD).
+
+`call_with_backoff` runs one request through a bucket and retries it on
+throttling with jittered exponential backoff, or after the delay the
+provider asked for when it sends one.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import THROTTLE_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Throttled(Exception):
+    """Raised when a request is still throttled after all retries."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, with
+    bursts of up to `burst`. `name` labels its metrics.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, name: str = ""):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available. Returns the seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    self.waited_seconds += waited
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self) -> None:
+        """A request was throttled: halve the rate and drop any burst."""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def reward(self) -> None:
+        """A request succeeded: step the rate back toward the limit."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(name: str, rate: float) -> TokenBucket:
+    """
+    The shared bucket for `name`, created at `rate` requests/s on first use.
+    """
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(rate, name=name)
+        return _buckets[name]
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {name: b.stats() for name, b in buckets.items()}
+
+
+def call_with_backoff(
+    call: Callable[[], T],
+    limiter: TokenBucket,
+    is_throttled: Callable[[Exception], bool],
+    retry_after: Callable[[Exception], Optional[float]] = lambda exc: None,
+    max_retries: Optional[int] = None,
+) -> T:
+    """
+    Run `call` once a token is available. When it raises an exception that
+    `is_throttled` accepts, slow the bucket down and retry after
+    `retry_after(exc)` seconds, or after a jittered exponential delay, up
+    to INGESTION_THROTTLE_MAX_RETRIES times. Other exceptions propagate.
+    """
+    retries = settings.ingestion_throttle_max_retries
+    retries = retries if max_retries is None else max_retries
+    base = settings.ingestion_throttle_base_delay_seconds
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            result = call()
+        except Exception as exc:
+            if not is_throttled(exc):
+                raise
+            limiter.penalize()
+            if attempt >= retries:
+                raise Throttled(f"still throttled after {retries} retries") from exc
+            delay = retry_after(exc)
+            if delay is None:
+                delay = random.uniform(0.5, 1.0) * min(60.0, base * 2**attempt)
+            attempt += 1
+            THROTTLE_RETRIES.labels(limiter.name or "unnamed").inc()
+            logger.warning(
+                "Throttled (attempt %d/%d), retrying in %.2fs", attempt, retries, delay
+            )
+            time.sleep(delay)
+            continue
+        limiter.reward()
+        return result
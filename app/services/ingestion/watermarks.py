@@ -0,0 +1,73 @@
+"""
+Per-provider ingestion high-watermarks.
+
+The watermark of a provider is the last day whose billing data has been
+ingested completely. Scheduled runs start after it, minus a restatement
+lookback (INGESTION_LOOKBACK_DAYS) because providers keep revising the
+most recent days; the upserting store makes that overlap idempotent.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+WATERMARK_PATH = Path(__file__).resolve().parents[2] / "data" / "watermarks.json"
+
+_lock = threading.Lock()
+
+
+def last_complete_day(today: Optional[date] = None) -> date:
+    """
+    Yesterday (UTC): the current day's billing data is never complete.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    return today - timedelta(days=1)
+
+
+def load() -> Dict[str, date]:
+    try:
+        raw = json.loads(WATERMARK_PATH.read_text())
+    except FileNotFoundError:
+        return {}
+    return {provider: date.fromisoformat(day) for provider, day in raw.items()}
+
+
+def get(provider: str) -> Optional[date]:
+    return load().get(provider)
+
+
+def advance(provider: str, day: date) -> bool:
+    """
+    Move the provider's watermark forward to `day` (never backwards).
+    Returns True when it moved.
+    """
+    with _lock:
+        marks = load()
+        if provider in marks and marks[provider] >= day:
+            return False
+        marks[provider] = day
+        WATERMARK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = WATERMARK_PATH.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({p: d.isoformat() for p, d in marks.items()}))
+        os.replace(tmp, WATERMARK_PATH)
+        return True
+
+
+def incremental_range(provider: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Date range a scheduled run should fetch for `provider`: from the day
+    after its watermark, minus the restatement lookback, to the last
+    complete day. Without a watermark, the last INGESTION_INITIAL_DAYS.
+    """
+    end = last_complete_day(today)
+    mark = get(provider)
+    if mark is None:
+        start = end - timedelta(days=settings.ingestion_initial_days - 1)
+    else:
+        start = mark + timedelta(days=1 - settings.ingestion_lookback_days)
+    return start, end
@@ -0,0 +1,325 @@
+"""
+Materialized cost rollups backing GET /api/v1/costs/summary.
+
+The rollup is a daily cube — total cost and row count per
+(provider, date, service, account_id, region) — persisted as
+app/data/rollups/daily.parquet. `apply()` refreshes only the
+(provider, month) slices an ingestion touched, so summary queries group a
+small pre-aggregated table instead of re-reading every raw row.
+
+Each provider slice remembers the source it was built from (the Parquet
+store, the database with its `cost_providers.updated_at`, or a legacy CSV's
+(mtime, size)). A slice whose source changed outside of this process's
+`loader.save` — including database writes by another replica — is rebuilt
+from `cost_service` on the next query.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from app.services import cost_service
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DIR = Path(__file__).resolve().parents[1] / "data" / "rollups"
+
+CUBE_KEYS = ["provider", "date", "service", "account_id", "region"]
+GROUP_BY_FIELDS = ("provider", "service", "account_id", "region", "month", "week")
+
+STORE_SOURCE = "store"
+
+
+def _aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse raw cost rows (or cube rows) to the cube grain.
+    """
+    df = df.copy()
+    for col in ("service", "account_id", "region"):
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].astype("string").fillna("")
+    df["provider"] = df["provider"].astype("string")
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    df["cost_usd"] = pd.to_numeric(df["cost_usd"], errors="coerce").fillna(0.0)
+    if "records" not in df.columns:
+        df["records"] = 1
+    cube = df.groupby(CUBE_KEYS, sort=False).agg(
+        cost_usd=("cost_usd", "sum"), records=("records", "sum")
+    )
+    return cube.reset_index()
+
+
+def _empty_cube() -> pd.DataFrame:
+    return _aggregate(
+        pd.DataFrame(
+            {"provider": [], "date": [], "cost_usd": []},
+        ).astype({"date": "datetime64[ns]"})
+    )
+
+
+def _csv_source(provider: str) -> Optional[str]:
+    csv_path = os.path.join(
+        cost_service.DATA_DIR, cost_service.PROVIDER_FILES[provider]
+    )
+    if not os.path.isfile(csv_path):
+        return None
+    st = os.stat(csv_path)
+    return f"csv:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _source(provider: str) -> Optional[str]:
+    if not cost_service.in_store(provider):
+        return _csv_source(provider)
+    updated = cost_service.store_updated_at(provider)
+    return f"{STORE_SOURCE}:{updated.isoformat()}" if updated else STORE_SOURCE
+
+
+def _from_store(source: Optional[str]) -> bool:
+    return source is not None and source.split(":", 1)[0] == STORE_SOURCE
+
+
+class RollupStore:
+    """
+    Thread-safe holder of the persisted daily cube.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self._root = root
+        self._lock = threading.RLock()
+        self._cube: Optional[pd.DataFrame] = None
+        self._sources: Dict[str, Optional[str]] = {}
+        self._signature: Optional[int] = None
+
+    @property
+    def root(self) -> Path:
+        return self._root or ROLLUP_DIR
+
+    @property
+    def cube_path(self) -> Path:
+        return self.root / "daily.parquet"
+
+    @property
+    def sources_path(self) -> Path:
+        return self.root / "sources.json"
+
+    # ─── persistence ────────────────────────────────────────────────────────
+
+    def _disk_signature(self) -> Optional[int]:
+        try:
+            return self.sources_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> pd.DataFrame:
+        """
+        Return the in-memory cube, reloading it if another process
+        persisted a newer one.
+        """
+        signature = self._disk_signature()
+        if self._cube is not None and signature == self._signature:
+            return self._cube
+        if signature is not None and self.cube_path.exists():
+            self._cube = pd.read_parquet(self.cube_path)
+            self._sources = json.loads(self.sources_path.read_text())
+        else:
+            self._cube = _empty_cube()
+            self._sources = {}
+        self._signature = signature
+        return self._cube
+
+    def _persist(self, cube: pd.DataFrame) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.cube_path.with_suffix(".parquet.tmp")
+        cube.to_parquet(tmp, index=False)
+        os.replace(tmp, self.cube_path)
+        # sources.json is written last: its mtime versions the pair
+        tmp = self.sources_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._sources))
+        os.replace(tmp, self.sources_path)
+        self._cube = cube
+        self._signature = self._disk_signature()
+
+    # ─── updates ────────────────────────────────────────────────────────────
+
+    def apply(self, records: Union[Iterable[Dict], pa.Table]) -> None:
+        """
+        Refresh the cube for the (provider, month) partitions that `records`
+        (dicts, or an Arrow table) were just upserted into. Only those months
+        are re-read from the store, so re-ingesting a range replaces totals
+        instead of adding.
+        """
+        if isinstance(records, pa.Table):
+            df = records.select(["provider", "date"]).to_pandas()
+        else:
+            df = pd.DataFrame.from_records(list(records))
+        if df.empty:
+            return
+        months = pd.to_datetime(df["date"]).dt.to_period("M")
+        affected = set(zip(df["provider"].astype(str), months))
+        with self._lock:
+            self._load()
+            # slices not yet built from the store are rebuilt in full by
+            # _refresh, from a store that already contains these records;
+            # the others only need the months just written
+            stale = set()
+            for provider in {p for p, _ in affected}:
+                if _from_store(self._sources.get(provider)):
+                    self._sources[provider] = _source(provider)
+                else:
+                    stale.add(provider)
+            self._refresh()
+            cube = self._load()
+            fresh = []
+            for provider, month in sorted(affected):
+                if provider in stale:
+                    continue
+                start, end = month.start_time.date(), month.end_time.date()
+                cube = cube[
+                    ~(
+                        (cube["provider"] == provider)
+                        & (cube["date"] >= pd.Timestamp(start))
+                        & (cube["date"] <= pd.Timestamp(end))
+                    )
+                ]
+                rows = cost_service.read_store(provider, start_date=start, end_date=end)
+                fresh.append(_aggregate(rows))
+            if not fresh:
+                return
+            self._persist(pd.concat([cube, *fresh], ignore_index=True))
+
+    def drop_provider(self, provider: str) -> None:
+        with self._lock:
+            cube = self._load()
+            self._sources.pop(provider, None)
+            self._persist(cube[cube["provider"] != provider].reset_index(drop=True))
+
+    def _rebuild_provider(self, provider: str, source: Optional[str]) -> None:
+        cube = self._load()
+        cube = cube[cube["provider"] != provider]
+        if source is not None:
+            df = cost_service.get_provider_cost_frame(provider)
+            cube = pd.concat([cube, _aggregate(df)], ignore_index=True)
+        logger.info("Rebuilt %s cost rollup from %s", provider, source)
+        self._sources[provider] = source
+        self._persist(cube.reset_index(drop=True))
+
+    def _refresh(self) -> None:
+        """
+        Rebuild provider slices whose source changed behind our back.
+        """
+        self._load()
+        for provider in cost_service.PROVIDER_FILES:
+            source = _source(provider)
+            if self._sources.get(provider) != source:
+                self._rebuild_provider(provider, source)
+
+    # ─── queries ────────────────────────────────────────────────────────────
+
+    def summarize(
+        self,
+        group_by: Sequence[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        provider: Optional[str] = None,
+        service: Optional[str] = None,
+    ) -> pd.DataFrame:
+        unknown = set(group_by) - set(GROUP_BY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported group_by fields: {sorted(unknown)}")
+        with self._lock:
+            self._refresh()
+            cube = self._load()
+
+        mask = pd.Series(True, index=cube.index)
+        if start_date:
+            mask &= cube["date"] >= pd.Timestamp(start_date)
+        if end_date:
+            mask &= cube["date"] <= pd.Timestamp(end_date)
+        if provider:
+            mask &= cube["provider"] == provider
+        if service:
+            mask &= cube["service"] == service
+        sel = cube[mask]
+
+        if "month" in group_by:
+            sel = sel.assign(month=sel["date"].dt.strftime("%Y-%m"))
+        if "week" in group_by:
+            monday = sel["date"] - pd.to_timedelta(sel["date"].dt.weekday, unit="D")
+            sel = sel.assign(week=monday.dt.strftime("%Y-%m-%d"))
+
+        keys: List[str] = list(dict.fromkeys(group_by))
+        if not keys:
+            total = pd.DataFrame(
+                {"cost_usd": [sel["cost_usd"].sum()], "records": [sel["records"].sum()]}
+            )
+            return total if not sel.empty else total.iloc[0:0]
+        out = sel.groupby(keys, sort=True).agg(
+            cost_usd=("cost_usd", "sum"), records=("records", "sum")
+        )
+        return out.reset_index()
+
+    def daily(
+        self,
+        provider: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        Daily (provider, service, date) totals of one provider.
+        """
+        with self._lock:
+            self._refresh()
+            cube = self._load()
+        mask = cube["provider"] == provider
+        if start_date:
+            mask &= cube["date"] >= pd.Timestamp(start_date)
+        if end_date:
+            mask &= cube["date"] <= pd.Timestamp(end_date)
+        out = cube[mask].groupby(["provider", "service", "date"], sort=True)
+        return out["cost_usd"].sum().reset_index()
+
+
+_store = RollupStore()
+
+
+def apply(records: Union[Iterable[Dict], pa.Table]) -> None:
+    """
+    Incrementally update the rollups with records just written to the store.
+    """
+    _store.apply(records)
+
+
+def drop_provider(provider: str) -> None:
+    _store.drop_provider(provider)
+
+
+def summarize(
+    group_by: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    provider: Optional[str] = None,
+    service: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Cost totals grouped by any of GROUP_BY_FIELDS, from the daily cube.
+    """
+    return _store.summarize(group_by, start_date, end_date, provider, service)
+
+
+def daily(
+    provider: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Daily cost per (provider, service, date) from the cube.
+    """
+    return _store.daily(provider, start_date, end_date)
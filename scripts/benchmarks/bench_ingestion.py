@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# scripts/benchmarks/bench_ingestion.py
+
+"""
+Measure ingestion throughput offline, against the local fake backends of
+fake_backends.py instead of Cost Explorer, Cost Management and BigQuery.
+
+Flows:
+
+  ingest_all   POST /api/v1/ingestion/ for all providers, polled to the end
+  fetch_aws    scripts/ingestion/fetch_aws.py with a fake client
+  fetch_azure  scripts/ingestion/fetch_azure.py with a fake client
+  fetch_gcp    scripts/ingestion/fetch_gcp.py with a fake client
+
+Each flow runs in a temporary data directory (see suite.sandbox), once
+for wall time and records/s and once under tracemalloc for peak Python
+memory, and reports the fake backends' call counts. The fetch scripts
+always fetch their fixed period (2025-01-01 to 2025-06-30); ingest_all
+uses --start/--end. Run from the repository root:
+
+    python -m scripts.benchmarks.bench_ingestion --latency 0.05 \\
+        --throttle-rate 0.02 --requests-per-second 20 --concurrency 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.ingestion import throttle
+from app.services.ingestion.aws_ingest import AwsIngest
+from app.services.ingestion.azure_ingest import AzureIngest
+from app.services.ingestion.clients import registry
+from app.services.ingestion.gcp_ingest import GcpIngest
+from app.services.ingestion.runner import PROVIDERS
+from scripts.benchmarks.fake_backends import (
+    FakeBackend,
+    FakeBigQuery,
+    FakeCostExplorer,
+    FakeCostManagement,
+)
+from scripts.benchmarks.suite import patched, sandbox
+from scripts.ingestion import fetch_aws, fetch_azure, fetch_gcp
+
+GCP_PROJECT = "bench-project"
+ENVIRONMENT = {
+    "AZURE_SUBSCRIPTION_ID": "00000000-0000-0000-0000-000000000000",
+    "GCP_PROJECT_ID": GCP_PROJECT,
+    "GCP_DATASET": "billing",
+    "GCP_TABLE": "export",
+}
+FINISHED = ("ok", "partial", "error")
+
+Backends = Dict[str, FakeBackend]
+
+
+@contextmanager
+def offline(args: argparse.Namespace) -> Iterator[Backends]:
+    """
+    A sandboxed data directory, fresh token buckets, and fake backends
+    installed in the shared client registry.
+    """
+    options = dict(
+        groups_per_day=args.groups_per_day,
+        page_size=args.page_size,
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    backends: Backends = {
+        "AWS": FakeCostExplorer(**options),
+        "Azure": FakeCostManagement(**options),
+        "GCP": FakeBigQuery(**options),
+    }
+    overrides: Dict[str, Any] = {"gcp_storage_api": False}
+    if args.requests_per_second:
+        overrides["aws_ce_requests_per_second"] = args.requests_per_second
+        overrides["azure_requests_per_second"] = args.requests_per_second
+    if args.concurrency:
+        overrides["aws_ce_concurrency"] = args.concurrency
+        overrides["azure_concurrency"] = args.concurrency
+    if args.batch_rows is not None:
+        overrides["ingestion_batch_rows"] = args.batch_rows
+
+    with ExitStack() as stack:
+        stack.enter_context(sandbox())
+        stack.enter_context(mock.patch.dict(os.environ, ENVIRONMENT))
+        stack.enter_context(patched(throttle, "_buckets", {}))
+        for name, value in overrides.items():
+            stack.enter_context(patched(settings, name, value))
+        registry.install("AWS", backends["AWS"])
+        registry.install("Azure", backends["Azure"])
+        registry.install(f"GCP:{GCP_PROJECT}", backends["GCP"])
+        stack.callback(registry.close)
+        yield backends
+
+
+# ─── flows ──────────────────────────────────────────────────────────────────
+
+
+def ingest_all(backends: Backends, args: argparse.Namespace) -> int:
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/ingestion/",
+        json={
+            "start": args.start.isoformat(),
+            "end": args.end.isoformat(),
+            "providers": list(PROVIDERS),
+            "window_days": args.window_days,
+        },
+    )
+    response.raise_for_status()
+    job_id = response.json()["id"]
+    while True:
+        job = client.get(f"/api/v1/ingestion/jobs/{job_id}").json()
+        if job["status"] in FINISHED:
+            break
+        time.sleep(0.02)
+    if job["status"] != "ok":
+        errors = {w["error"] for w in job["windows"] if w["error"]}
+        raise RuntimeError(f"ingestion job {job['status']}: {sorted(errors)}")
+    return job["count"]
+
+
+def _quiet(main: Callable[[], int]) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return main()
+
+
+def run_fetch_aws(backends: Backends, args: argparse.Namespace) -> int:
+    return _quiet(lambda: fetch_aws.main(AwsIngest(client=backends["AWS"])))
+
+
+def run_fetch_azure(backends: Backends, args: argparse.Namespace) -> int:
+    ingester = AzureIngest(ENVIRONMENT["AZURE_SUBSCRIPTION_ID"], backends["Azure"])
+    return _quiet(lambda: fetch_azure.main(ingester))
+
+
+def run_fetch_gcp(backends: Backends, args: argparse.Namespace) -> int:
+    ingester = GcpIngest(GCP_PROJECT, "billing", "export", client=backends["GCP"])
+    return _quiet(lambda: fetch_gcp.main(ingester))
+
+
+FLOWS = {
+    "ingest_all": ingest_all,
+    "fetch_aws": run_fetch_aws,
+    "fetch_azure": run_fetch_azure,
+    "fetch_gcp": run_fetch_gcp,
+}
+
+
+def measure(flow: str, args: argparse.Namespace) -> Dict[str, Any]:
+    run = FLOWS[flow]
+    with offline(args) as backends:
+        start = time.perf_counter()
+        records = run(backends, args)
+        wall = time.perf_counter() - start
+        calls = {p: b.stats() for p, b in backends.items() if b.calls}
+
+    # tracemalloc slows allocation-heavy code down: a separate run
+    with offline(args) as backends:
+        tracemalloc.start()
+        try:
+            run(backends, args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "records": records,
+        "wall_s": wall,
+        "records_per_s": records / wall if wall else 0.0,
+        "peak_mib": peak / 2**20,
+        "backends": calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--flow", action="append", choices=list(FLOWS), help="default: all"
+    )
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 6, 30))
+    parser.add_argument("--window-days", type=int, help="ingest_all window size")
+    parser.add_argument("--groups-per-day", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="seconds per backend call"
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="share of throttled calls"
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        help="AWS and Azure token bucket rate (default: settings)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, help="AWS and Azure sub-ranges fetched at once"
+    )
+    parser.add_argument("--batch-rows", type=int, help="rows per storage flush")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the results JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'flow':<12} {'records':>9} {'wall s':>8} {'rec/s':>10} {'peak MiB':>9}")
+    for flow in args.flow or FLOWS:
+        r = results[flow] = measure(flow, args)
+        print(
+            f"{flow:<12} {r['records']:>9,} {r['wall_s']:>8.2f} "
+            f"{r['records_per_s']:>10,.0f} {r['peak_mib']:>9.1f}"
+        )
+        for provider, stats in r["backends"].items():
+            print(
+                f"  {provider:<10} calls={stats['calls']} "
+                f"throttled={stats['throttled']} pages={stats['pages']}"
+            )
+
+    if args.output:
+        meta = {k: str(v) if isinstance(v, date) else v for k, v in vars(args).items()}
+        meta.pop("output")
+        document = {"meta": meta, "flows": results}
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# scripts/benchmarks/bench_serialization.py
+
+"""
+Compare JSON response paths for a cost frame of --rows rows, end to end
+through the ASGI stack:
+
+  validated  list of dicts checked against response_model (previous path)
+  records    cost_response: rows encoded with orjson, no validation
+  columnar   cost_response with format=columnar
+
+Run from the repository root:
+
+    python -m scripts.benchmarks.bench_serialization --rows 200000
+"""
+
+import argparse
+import statistics
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.responses import cost_response
+from app.api.routes.v1.costs import CostItem
+from app.services.cost_service import OUTPUT_COLUMNS
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "provider": pd.Categorical(rng.choice(["AWS", "Azure", "GCP"], rows)),
+            "date": pd.Timestamp("2025-01-01")
+            + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+            "service": pd.Categorical(
+                rng.choice([f"service-{i}" for i in range(200)], rows)
+            ),
+            "cost_usd": rng.gamma(2.0, 50.0, rows).round(4),
+        }
+    )
+    return df.sort_values("date", kind="stable", ignore_index=True)
+
+
+def build_app(df: pd.DataFrame) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[CostItem])
+    def validated():
+        return df[OUTPUT_COLUMNS].to_dict(orient="records")
+
+    @app.get("/records", response_model=List[CostItem])
+    def records(request: Request):
+        return cost_response(request, df, None, None, "empty")
+
+    @app.get("/columnar", response_model=List[CostItem])
+    def columnar(request: Request):
+        return cost_response(request, df, None, None, "empty", "columnar")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(synthetic_frame(args.rows)))
+    baseline = None
+    print(f"{'path':<10} {'median s':>9} {'MiB':>7} {'speedup':>8}")
+    for path in ("validated", "records", "columnar"):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(f"/{path}")
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+        median = statistics.median(timings)
+        baseline = baseline or median
+        size = len(response.content) / 2**20
+        print(f"{path:<10} {median:>9.3f} {size:>7.1f} {baseline / median:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
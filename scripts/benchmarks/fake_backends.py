@@ -0,0 +1,235 @@
+# scripts/benchmarks/fake_backends.py
+
+"""
+Local stand-ins for the Cost Explorer, Cost Management and BigQuery
+clients (see the client interfaces in app/services/ingestion/base.py).
+
+Every backend serves `groups_per_day` cost rows per day of the requested
+range, `page_size` rows per result page, and keeps call counts. A call
+sleeps `latency` seconds, and with probability `throttle_rate` fails with
+the provider's throttling error instead, so the ingestors' token buckets
+and backoff run as they would against the real APIs. Rows and throttling
+decisions are deterministic for a given `seed`.
+"""
+
+import abc
+import random
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pyarrow as pa
+from azure.core.exceptions import HttpResponseError
+from botocore.exceptions import ClientError
+
+# extra dimension values for grouped queries
+ACCOUNTS = 10
+REGIONS = ("us-east-1", "eu-west-1", "ap-southeast-1")
+
+
+class FakeBackend(abc.ABC):
+    def __init__(
+        self,
+        groups_per_day: int = 50,
+        page_size: int = 1000,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.groups_per_day = groups_per_day
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+        self.throttled = 0
+        self.pages = 0
+        self.rows = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            throttled = self._rng.random() < self.throttle_rate
+            self.throttled += throttled
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            raise self._throttle_error()
+
+    @abc.abstractmethod
+    def _throttle_error(self) -> Exception:
+        """The SDK's own error for a throttled request."""
+
+    def _page(self, start: date, end: date, offset: int) -> Tuple[List, int]:
+        """
+        Rows [offset, offset + page_size) of the inclusive range as
+        (day, group, cost) tuples, and the next offset (0 when done).
+        """
+        total = ((end - start).days + 1) * self.groups_per_day
+        stop = min(offset + self.page_size, total)
+        rows = [
+            (
+                start + timedelta(days=i // self.groups_per_day),
+                i % self.groups_per_day,
+                (i * 7919 % 100_000) / 100,
+            )
+            for i in range(offset, stop)
+        ]
+        with self._lock:
+            self.pages += 1
+            self.rows += len(rows)
+        return rows, stop if stop < total else 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "pages": self.pages,
+                "rows": self.rows,
+            }
+
+
+def _extra(dimension: str, group: int) -> str:
+    if dimension in ("LINKED_ACCOUNT", "ResourceGroupName"):
+        return f"{100_000_000_000 + group % ACCOUNTS}"
+    if dimension == "REGION":
+        return REGIONS[group % len(REGIONS)]
+    return f"meter-{group % 4}"
+
+
+class FakeCostExplorer(FakeBackend):
+    """`get_cost_and_usage` with NextPageToken pages, one result per day."""
+
+    def _throttle_error(self) -> Exception:
+        return ClientError(
+            {"Error": {"Code": "ThrottlingException"}}, "GetCostAndUsage"
+        )
+
+    def get_cost_and_usage(self, **params: Any) -> Dict[str, Any]:
+        self._call()
+        start = date.fromisoformat(params["TimePeriod"]["Start"])
+        # End is exclusive
+        end = date.fromisoformat(params["TimePeriod"]["End"]) - timedelta(days=1)
+        extra = [g["Key"] for g in params["GroupBy"][1:]]
+        rows, next_offset = self._page(start, end, int(params.get("NextPageToken", 0)))
+
+        by_day: Dict[date, List[Dict]] = {}
+        for day, group, cost in rows:
+            by_day.setdefault(day, []).append(
+                {
+                    "Keys": [f"Service {group}"] + [_extra(k, group) for k in extra],
+                    "Metrics": {"UnblendedCost": {"Amount": str(cost), "Unit": "USD"}},
+                }
+            )
+        resp: Dict[str, Any] = {
+            "ResultsByTime": [
+                {"TimePeriod": {"Start": day.isoformat()}, "Groups": groups}
+                for day, groups in by_day.items()
+            ]
+        }
+        if next_offset:
+            resp["NextPageToken"] = str(next_offset)
+        return resp
+
+
+class FakeCostManagement(FakeBackend):
+    """
+    Client whose `query.usage` returns column/row results with a
+    `$skiptoken` next_link. Throttled calls ask for `retry_after` seconds.
+    """
+
+    def __init__(self, *args: Any, retry_after: float = 0.05, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+        self.query = self
+
+    def _throttle_error(self) -> Exception:
+        exc = HttpResponseError(message="Too many requests")
+        exc.status_code = 429
+        exc.response = SimpleNamespace(
+            status_code=429,
+            headers={
+                "x-ms-ratelimit-microsoft.costmanagement-qpu-retry-after": str(
+                    self.retry_after
+                )
+            },
+        )
+        return exc
+
+    def usage(self, scope: str, parameters: Any, **kwargs: Any) -> Any:
+        self._call()
+        period = parameters["timePeriod"]
+        start = date.fromisoformat(period["from"][:10])
+        end = date.fromisoformat(period["to"][:10])
+        extra = [g["name"] for g in parameters["dataset"]["grouping"][1:]]
+        offset = int((kwargs.get("params") or {}).get("$skiptoken", 0))
+        rows, next_offset = self._page(start, end, offset)
+        columns = ["Cost", "UsageDate", "ServiceName", *extra, "Currency"]
+        return SimpleNamespace(
+            columns=[SimpleNamespace(name=c) for c in columns],
+            rows=[
+                [cost, int(day.strftime("%Y%m%d")), f"Service {group}"]
+                + [_extra(name, group) for name in extra]
+                + ["USD"]
+                for day, group, cost in rows
+            ],
+            next_link=(
+                f"https://fake.local{scope}/query?$skiptoken={next_offset}"
+                if next_offset
+                else None
+            ),
+        )
+
+
+class _Retry(Exception):
+    pass
+
+
+class FakeBigQuery(FakeBackend):
+    """
+    `query(...).result().to_arrow_iterable()` yielding `page_size`-row
+    record batches; each batch counts as a call. BigQuery retries
+    rate-limit errors inside the client library, so `throttle_rate` only
+    adds the wasted round trips.
+    """
+
+    def _throttle_error(self) -> Exception:
+        return _Retry()
+
+    def query(self, query: str, job_config: Any = None) -> Any:
+        params = {p.name: p.value for p in job_config.query_parameters}
+        return SimpleNamespace(
+            result=lambda: SimpleNamespace(
+                to_arrow_iterable=lambda bqstorage_client=None: self._batches(
+                    params["start"], params["end"]
+                )
+            )
+        )
+
+    def _fetch(self) -> None:
+        while True:
+            try:
+                return self._call()
+            except _Retry:
+                continue
+
+    def _batches(self, start: date, end: date) -> Iterator[pa.RecordBatch]:
+        offset = 0
+        while True:
+            self._fetch()
+            rows, offset = self._page(start, end, offset)
+            if rows:
+                days, groups, costs = zip(*rows)
+                yield pa.record_batch(
+                    {
+                        "date": pa.array(days, pa.date32()),
+                        "service": [f"Service {g}" for g in groups],
+                        "cost_usd": pa.array(costs, pa.float64()),
+                    }
+                )
+            if not offset:
+                return
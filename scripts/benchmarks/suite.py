@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# scripts/benchmarks/suite.py
+
+"""
+Benchmark the ETL, filter, ingestion and API hot paths on synthetic data
+and compare the results with a stored baseline.
+
+Every run generates --rows rows per provider (see synthetic.py) into a
+temporary data directory, points the cost service, the Parquet store, the
+rollups and the anomaly state at it, and times each benchmark --repeat
+times after one warm-up run:
+
+  etl.load_and_transform   parse one provider CSV (also bytes per row)
+  filter.costframe         _apply_filters on the indexed CostFrame
+  filter.dataframe         _apply_filters on the plain parsed frame
+  get_cost_data            unified records for a --window-days window
+  normalize                unify --batch-rows raw ingestion records
+  api.costs                GET /api/v1/costs/ for the window, via ASGI
+  api.costs.columnar       the same with format=columnar
+  loader.save              save --batch-rows records to an empty store
+  startup.import           `import app.main` in a fresh interpreter
+  startup.lifespan         the same plus app startup and shutdown
+
+Results are written as JSON. With --baseline, a benchmark whose median is
+more than --tolerance slower than the baseline's is a regression and the
+exit status is 1. Run from the repository root:
+
+    python -m scripts.benchmarks.suite --rows 100000 \\
+        --baseline scripts/benchmarks/baseline.json --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+from app.main import app
+from app.services import (
+    anomalies,
+    cost_service,
+    cost_store,
+    data_versions,
+    etl,
+    rollups,
+)
+from app.services.ingestion import jobs, loader, normalizer, runner, watermarks
+from scripts.benchmarks import synthetic
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+STARTUP_LIFESPAN = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app):
+    pass
+"""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], Any]
+    # rows processed by one run, for the throughput figure
+    rows: int
+    # untimed, before every run
+    setup: Optional[Callable[[], None]] = None
+    # in-memory size of the result, reported as bytes per row
+    nbytes: Optional[int] = None
+
+
+@contextmanager
+def patched(obj: Any, name: str, value: Any) -> Iterator[None]:
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, old)
+
+
+@contextmanager
+def sandbox(spec: Optional[synthetic.Spec] = None) -> Iterator[Path]:
+    """
+    Wire the services to a temporary data directory (as tests/conftest.py
+    does), with the provider CSVs of `spec` when given, and restore them
+    after.
+    """
+    with ExitStack() as stack:
+        data_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        if spec is not None:
+            synthetic.write_csvs(spec, data_dir)
+        for obj, name, value in (
+            (cost_service, "DATA_DIR", str(data_dir)),
+            (cost_store, "STORE_DIR", data_dir / "parquet"),
+            (rollups, "_store", rollups.RollupStore(data_dir / "rollups")),
+            (anomalies, "_store", anomalies.AnomalyStore(data_dir / "anomalies")),
+            (loader, "DATA_DIR", data_dir),
+            (watermarks, "WATERMARK_PATH", data_dir / "watermarks.json"),
+            (data_versions, "VERSIONS_PATH", data_dir / "versions.json"),
+            (jobs, "JOBS_DIR", data_dir / "ingestion_jobs"),
+            (runner, "LOCK_DIR", data_dir / "ingestion_locks"),
+        ):
+            stack.enter_context(patched(obj, name, value))
+        cost_service._frame_cache.clear()
+        stack.callback(cost_service._frame_cache.clear)
+        yield data_dir
+
+
+def startup(code: str) -> Callable[[], None]:
+    """Run `code` in a new interpreter, without cache or client warm-up."""
+    env = {
+        **os.environ,
+        "COST_CACHE_WARMUP": "false",
+        "INGESTION_CLIENTS_WARMUP": "false",
+    }
+
+    def run() -> None:
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env, check=True)
+
+    return run
+
+
+def build(
+    spec: synthetic.Spec, data_dir: Path, window_days: int, batch_rows: int
+) -> List[Benchmark]:
+    csv_path = str(data_dir / cost_service.PROVIDER_FILES["AWS"])
+    parsed = etl.load_and_transform(csv_path)
+    indexed = cost_service._load_indexed(csv_path, "AWS")
+    service = str(parsed["service"].iloc[0])
+    start = date.fromisoformat(spec.start) + timedelta(days=spec.days // 2)
+    end = start + timedelta(days=window_days - 1)
+    window_rows = len(cost_service.get_cost_frame(None, start, end))
+
+    batch = synthetic.records(synthetic.Spec(**{**spec.to_dict(), "rows": batch_rows}))
+    store_runs = iter(range(sys.maxsize))
+
+    def fresh_store() -> None:
+        # every run saves into an empty store
+        root = data_dir / f"save-{next(store_runs)}"
+        cost_store.STORE_DIR = root / "parquet"
+        rollups._store = rollups.RollupStore(root / "rollups")
+        anomalies._store = anomalies.AnomalyStore(root / "anomalies")
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://bench",
+        headers={"Accept-Encoding": "identity"},
+    )
+    window = {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+    def get(params: Dict[str, str]) -> Callable[[], None]:
+        def run() -> None:
+            response = loop.run_until_complete(
+                client.get("/api/v1/costs/", params=params)
+            )
+            response.raise_for_status()
+
+        return run
+
+    return [
+        Benchmark(
+            "etl.load_and_transform",
+            lambda: etl.load_and_transform(csv_path),
+            spec.rows,
+            nbytes=etl.memory_usage(parsed)["total"],
+        ),
+        Benchmark(
+            "filter.costframe",
+            lambda: cost_service._apply_filters(indexed, service, start, end),
+            spec.rows,
+        ),
+        Benchmark(
+            "filter.dataframe",
+            lambda: cost_service._apply_filters(parsed, service, start, end),
+            spec.rows,
+        ),
+        Benchmark(
+            "get_cost_data",
+            lambda: cost_service.get_cost_data(None, start, end),
+            window_rows,
+        ),
+        Benchmark("normalize", lambda: normalizer.normalize(batch), batch_rows),
+        Benchmark("api.costs", get(window), window_rows),
+        Benchmark(
+            "api.costs.columnar", get({**window, "format": "columnar"}), window_rows
+        ),
+        # afterwards AWS is served from the store instead of its CSV
+        Benchmark("loader.save", lambda: loader.save(batch), batch_rows, fresh_store),
+        Benchmark("startup.import", startup("import app.main"), 0),
+        Benchmark("startup.lifespan", startup(STARTUP_LIFESPAN), 0),
+    ]
+
+
+def measure(benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    timings = []
+    for i in range(repeat + 1):
+        if benchmark.setup:
+            benchmark.setup()
+        start = time.perf_counter()
+        benchmark.run()
+        if i:  # the first run is a warm-up
+            timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    result = {
+        "rows": benchmark.rows,
+        "median_s": median,
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "rows_per_s": benchmark.rows / median if median else 0.0,
+    }
+    if benchmark.nbytes is not None:
+        result["bytes_per_row"] = benchmark.nbytes / benchmark.rows
+    return result
+
+
+def run_suite(
+    spec: synthetic.Spec,
+    repeat: int = 5,
+    window_days: int = 31,
+    batch_rows: int = 100_000,
+    only: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the benchmarks (those whose name starts with one of `only`, or
+    all) and return the results document.
+    """
+    results = {}
+    with sandbox(spec) as data_dir:
+        for benchmark in build(spec, data_dir, window_days, batch_rows):
+            if only and not any(benchmark.name.startswith(p) for p in only):
+                continue
+            results[benchmark.name] = measure(benchmark, repeat)
+    return {
+        "meta": {
+            "spec": spec.to_dict(),
+            "repeat": repeat,
+            "window_days": window_days,
+            "batch_rows": batch_rows,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "benchmarks": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _workload(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: meta.get(k) for k in ("spec", "window_days", "batch_rows")}
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose median is more than `tolerance` (a fraction) slower
+    than in `baseline`. Raises ValueError when the two ran different
+    workloads.
+    """
+    if _workload(results["meta"]) != _workload(baseline["meta"]):
+        raise ValueError("results and baseline ran different workloads")
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        ratio = current["median_s"] / previous["median_s"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_s": previous["median_s"],
+                    "median_s": current["median_s"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=synthetic.Spec.rows)
+    parser.add_argument("--services", type=int, default=synthetic.Spec.services)
+    parser.add_argument("--accounts", type=int, default=synthetic.Spec.accounts)
+    parser.add_argument("--regions", type=int, default=synthetic.Spec.regions)
+    parser.add_argument("--days", type=int, default=synthetic.Spec.days)
+    parser.add_argument("--start", default=synthetic.Spec.start)
+    parser.add_argument("--seed", type=int, default=synthetic.Spec.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--window-days", type=int, default=31)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    parser.add_argument(
+        "--only", action="append", help="run benchmarks with this name prefix"
+    )
+    parser.add_argument("--output", type=Path, help="write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="compare with this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"overwrite {BASELINE_PATH.name} with these results",
+    )
+    args = parser.parse_args()
+
+    spec = synthetic.Spec(
+        rows=args.rows,
+        services=args.services,
+        accounts=args.accounts,
+        regions=args.regions,
+        days=args.days,
+        start=args.start,
+        seed=args.seed,
+    )
+    results = run_suite(spec, args.repeat, args.window_days, args.batch_rows, args.only)
+
+    print(f"{'benchmark':<24} {'rows':>10} {'median s':>10} {'rows/s':>12}")
+    for name, r in results["benchmarks"].items():
+        line = (
+            f"{name:<24} {r['rows']:>10,} {r['median_s']:>10.4f} "
+            f"{r['rows_per_s']:>12,.0f}"
+        )
+        if "bytes_per_row" in r:
+            line += f" {r['bytes_per_row']:>8.1f} B/row"
+        print(line)
+
+    document = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(document)
+    if args.save_baseline:
+        BASELINE_PATH.write_text(document)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        try:
+            regressions = compare(results, baseline, args.tolerance)
+        except ValueError as exc:
+            sys.exit(f"cannot compare with {args.baseline}: {exc}")
+        for r in regressions:
+            print(
+                f"REGRESSION {r['name']}: {r['median_s']:.4f}s vs "
+                f"{r['baseline_s']:.4f}s ({r['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/benchmarks/synthetic.py
+
+"""
+Deterministic synthetic billing data for the benchmarks.
+
+Rows are spread evenly and in date order over `days` days starting at
+`start`; service, account and region are drawn from fixed-size
+vocabularies with a seeded RNG, and costs follow a gamma distribution.
+The same arguments always produce the same rows, whatever `chunk_rows`,
+so large files (tens of millions of rows) are written chunk by chunk
+without holding the whole table in memory.
+"""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from app.services.cost_service import PROVIDER_FILES
+
+MIN_ROWS = 10_000
+MAX_ROWS = 50_000_000
+
+# rows per generated block; every block has its own RNG stream
+BLOCK_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class Spec:
+    rows: int = 100_000
+    services: int = 50
+    accounts: int = 20
+    regions: int = 8
+    days: int = 365
+    start: str = "2025-01-01"
+    seed: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _block(spec: Spec, provider_index: int, first: int, n: int) -> pd.DataFrame:
+    rng = np.random.default_rng([spec.seed, provider_index, first // BLOCK_ROWS])
+    positions = np.arange(first, first + n, dtype=np.int64)
+    day = positions * spec.days // spec.rows
+    dates = pd.Timestamp(spec.start) + pd.to_timedelta(day, unit="D")
+    accounts = 100_000_000_000 + rng.integers(0, spec.accounts, n)
+    return pd.DataFrame(
+        {
+            "date": dates.strftime("%Y-%m-%d"),
+            "service": np.char.add(
+                f"service-{provider_index}-",
+                rng.integers(0, spec.services, n).astype(str),
+            ),
+            "account_id": accounts.astype(str),
+            "region": np.char.add(
+                "region-", rng.integers(0, spec.regions, n).astype(str)
+            ),
+            "cost_usd": rng.gamma(2.0, 25.0, n).round(6),
+        }
+    )
+
+
+def frames(spec: Spec, provider_index: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yield one provider's `spec.rows` rows in date order, BLOCK_ROWS at a
+    time.
+    """
+    for first in range(0, spec.rows, BLOCK_ROWS):
+        yield _block(spec, provider_index, first, min(BLOCK_ROWS, spec.rows - first))
+
+
+def frame(spec: Spec, provider_index: int = 0) -> pd.DataFrame:
+    """All of one provider's rows in a single frame."""
+    return pd.concat(list(frames(spec, provider_index)), ignore_index=True)
+
+
+def records(spec: Spec, provider: str = "AWS") -> List[Dict]:
+    """Rows as raw ingestion records, the input of `normalize` and `save`."""
+    index = list(PROVIDER_FILES).index(provider)
+    df = frame(spec, index)
+    df.insert(0, "provider", provider)
+    return df.to_dict(orient="records")
+
+
+def write_csvs(spec: Spec, data_dir: Path) -> Dict[str, Path]:
+    """
+    Write `spec.rows` rows per provider to the legacy provider CSVs
+    (cost_service.PROVIDER_FILES) in `data_dir`.
+    """
+    if not MIN_ROWS <= spec.rows <= MAX_ROWS:
+        raise ValueError(f"rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for index, (provider, filename) in enumerate(PROVIDER_FILES.items()):
+        path = data_dir / filename
+        with open(path, "w", newline="") as f:
+            for i, block in enumerate(frames(spec, index)):
+                block.to_csv(f, index=False, header=i == 0)
+        paths[provider] = path
+    return paths
@@ -2,31 +2,32 @@
 # scripts/ingestion/fetch_aws.py
 
 from datetime import date
+from typing import Optional
 
+from app.services.ingestion import loader
 from app.services.ingestion.aws_ingest import AwsIngest
-from app.services.ingestion.loader import DATA_DIR, save
-from app.services.ingestion.normalizer import normalize
+from app.services.ingestion.normalizer import normalize_pages
 
+FILENAME = "aws_2025.csv"
 
-def main():
+
+def main(ingester: Optional[AwsIngest] = None) -> int:
+    """
+    Re-fetch AWS costs for the period, replacing what was saved before,
+    and return the number of records saved. Pass an `ingester` to use a
+    different client (e.g. a fake).
+    """
     start = date(2025, 1, 1)
     end = date(2025, 6, 30)
 
-    # Determine the actual CSV path in app/data and delete it if present
-    output_file = DATA_DIR / "aws_2025.csv"
-    if output_file.exists():
-        print(f"Overwriting existing file: {output_file}")
-        output_file.unlink()
-
-    ingester = AwsIngest(profile_name=None, region_name=None)
-    raw_aws = ingester.fetch(start, end)
-    print(f"Fetched {len(raw_aws)} raw AWS records")
-
-    unified = normalize(raw_aws, [], [])
-    print(f"Unified into {len(unified)} records")
+    loader.reset_provider("AWS", FILENAME)
 
-    save(unified, filename="aws_2025.csv")
-    print(f"Saved to {output_file}")
+    ingester = ingester or AwsIngest(profile_name=None, region_name=None)
+    # pages are normalized and saved as they arrive
+    pages = normalize_pages(ingester.iter_pages(start, end))
+    count = loader.save_stream(pages, filename=FILENAME)
+    print(f"Fetched and saved {count} AWS records to {loader.destination(FILENAME)}")
+    return count
 
 
 if __name__ == "__main__":
@@ -1,26 +1,33 @@
 from datetime import date
+from typing import Optional
 
+from app.services.ingestion import loader
 from app.services.ingestion.azure_ingest import AzureIngest
-from app.services.ingestion.loader import save
-from app.services.ingestion.normalizer import normalize
+from app.services.ingestion.normalizer import normalize_pages
 
+FILENAME = "azure_2025.csv"
 
-def main():
+
+def main(ingester: Optional[AzureIngest] = None) -> int:
+    """
+    Re-fetch Azure costs for the period, replacing what was saved before,
+    and return the number of records saved. Pass an `ingester` to use a
+    different client (e.g. a fake).
+    """
     start = date(2025, 1, 1)
     end = date(2025, 6, 30)
 
     subscription_id = "081f38d7-7b6f-4bf5-9f7b-46b99d534b8a"
 
-    ingester = AzureIngest(subscription_id=subscription_id)
-
-    raw_azure = ingester.fetch(start, end)
-    print(f"Fetched {len(raw_azure)} raw Azure records")
+    loader.reset_provider("Azure", FILENAME)
 
-    unified = normalize(raw_azure, [], [])
-    print(f"Unified into {len(unified)} records")
+    ingester = ingester or AzureIngest(subscription_id=subscription_id)
 
-    save(unified, filename="azure_2025.csv")
-    print("Saved to data/azure_2025.csv")
+    # pages are normalized and saved as they arrive
+    pages = normalize_pages(ingester.iter_pages(start, end))
+    count = loader.save_stream(pages, filename=FILENAME)
+    print(f"Fetched and saved {count} Azure records to {loader.destination(FILENAME)}")
+    return count
 
 
 if __name__ == "__main__":
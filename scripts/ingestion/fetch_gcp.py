@@ -1,11 +1,19 @@
 from datetime import date
+from typing import Optional
 
+from app.services.ingestion import loader
 from app.services.ingestion.gcp_ingest import GcpIngest
-from app.services.ingestion.loader import save
-from app.services.ingestion.normalizer import normalize
+from app.services.ingestion.normalizer import normalize_pages
 
+FILENAME = "gcp_2025.csv"
 
-def main():
+
+def main(ingester: Optional[GcpIngest] = None) -> int:
+    """
+    Re-fetch GCP costs for the period, replacing what was saved before,
+    and return the number of records saved. Pass an `ingester` to use a
+    different client (e.g. a fake).
+    """
     start = date(2025, 1, 1)
     end = date(2025, 6, 30)
 
@@ -13,20 +21,19 @@ def main():
     dataset = "google_costs"
     table = "gcp_billing_export_resource_v1_011AA8_61998B_989F55"
 
-    ingester = GcpIngest(
+    loader.reset_provider("GCP", FILENAME)
+
+    ingester = ingester or GcpIngest(
         project_id=project_id,
         dataset=dataset,
         table=table,
     )
 
-    raw_gcp = ingester.fetch(start, end)
-    print(f"Fetched {len(raw_gcp)} raw GCP records")
-
-    unified = normalize([], [], raw_gcp)
-    print(f"Unified into {len(unified)} records")
-
-    save(unified, filename="gcp_2025.csv")
-    print("Saved to data/gcp_2025.csv")
+    # Arrow batches are normalized and saved as tables, without row dicts
+    pages = normalize_pages(ingester.iter_batches(start, end), "GCP")
+    count = loader.save_stream(pages, filename=FILENAME)
+    print(f"Fetched and saved {count} GCP records to {loader.destination(FILENAME)}")
+    return count
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+# tests/conftest.py
+
+import pandas as pd
+import pytest
+
+from app.services import anomalies, cost_service, cost_store, data_versions, rollups
+from app.services.ingestion import jobs, loader, runner, watermarks
+
+SERVICES = {
+    "AWS": ["AmazonEC2", "AmazonS3"],
+    "Azure": ["Virtual Machines"],
+    "GCP": ["Compute Engine", "BigQuery"],
+}
+
+
+@pytest.fixture(autouse=True)
+def data_versions_file(tmp_path, monkeypatch):
+    """Keep data version bumps out of app/data."""
+    monkeypatch.setattr(data_versions, "VERSIONS_PATH", tmp_path / "versions.json")
+
+
+@pytest.fixture(autouse=True)
+def ingestion_state_dirs(tmp_path, monkeypatch):
+    """Keep persisted ingestion jobs and window locks out of app/data."""
+    monkeypatch.setattr(jobs, "JOBS_DIR", tmp_path / "ingestion_jobs")
+    monkeypatch.setattr(runner, "LOCK_DIR", tmp_path / "ingestion_locks")
+
+
+@pytest.fixture
+def cost_data(tmp_path, monkeypatch):
+    """
+    Small, deterministic provider CSVs (Jan-Mar 2025) in a temp data dir,
+    with an empty Parquet store, rollups, anomaly state and watermarks, wired into the
+    cost service and the ingestion loader.
+    """
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    days = pd.date_range("2025-01-01", "2025-03-31", freq="D")
+    for provider, filename in cost_service.PROVIDER_FILES.items():
+        rows = [
+            {
+                "date": d.date().isoformat(),
+                "service": svc,
+                "cost_usd": float(i + 1),
+            }
+            for d in days
+            for i, svc in enumerate(SERVICES[provider])
+        ]
+        pd.DataFrame(rows).to_csv(data_dir / filename, index=False)
+
+    monkeypatch.setattr(cost_service, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(cost_store, "STORE_DIR", data_dir / "parquet")
+    monkeypatch.setattr(rollups, "_store", rollups.RollupStore(data_dir / "rollups"))
+    monkeypatch.setattr(
+        anomalies, "_store", anomalies.AnomalyStore(data_dir / "anomalies")
+    )
+    monkeypatch.setattr(loader, "DATA_DIR", data_dir)
+    monkeypatch.setattr(watermarks, "WATERMARK_PATH", data_dir / "watermarks.json")
+    cost_service._frame_cache.clear()
+    yield data_dir
+    cost_service._frame_cache.clear()
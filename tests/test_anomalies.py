@@ -0,0 +1,108 @@
+# tests/test_anomalies.py
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import anomalies, cost_service, cost_store
+from app.services.anomalies import _empty_state, score
+from app.services.ingestion.loader import save
+
+client = TestClient(app)
+
+
+def _daily(days=60, spike_day=50):
+    dates = pd.date_range("2025-01-01", periods=days)
+    weekly = np.where(dates.weekday < 5, 100.0, 40.0)
+    noise = np.random.default_rng(0).normal(0, 2, days)
+    ec2 = weekly + noise
+    ec2[spike_day] *= 3
+    return pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "provider": "AWS",
+                    "service": "AmazonEC2",
+                    "date": dates,
+                    "cost_usd": ec2,
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "provider": "AWS",
+                    "service": "AmazonS3",
+                    "date": dates,
+                    "cost_usd": 5.0,
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+
+
+def test_score_flags_spikes_and_is_incremental():
+    daily = _daily()
+    state, flags = score(daily, _empty_state())
+    assert flags[["service", "date"]].values.tolist() == [
+        ["AmazonEC2", pd.Timestamp("2025-02-20")]
+    ]
+    assert flags["zscore"].iloc[0] > 3
+    assert state["n"].tolist() == [60, 60]
+
+    # folding the same days in two runs gives the same state and flags
+    cut = pd.Timestamp("2025-02-10")
+    part, first = score(daily[daily["date"] <= cut], _empty_state())
+    part, second = score(daily, part)  # already-folded days are skipped
+    pd.testing.assert_frame_equal(part, state)
+    assert len(first) + len(second) == 1
+
+
+def test_save_updates_flags_served_by_endpoint(cost_data):
+    for provider, filename in cost_service.PROVIDER_FILES.items():
+        cost_store.import_csv(str(cost_data / filename), provider)
+    # AmazonEC2 costs 1.0/day in the fixture
+    spike = {"provider": "AWS", "date": "2025-04-01", "cost_usd": 50.0}
+    save([{**spike, "service": "AmazonEC2"}])
+    # AWS's latest day may be partial: not scored yet
+    assert client.get("/api/v1/anomalies/").json() == []
+
+    save([{**spike, "date": "2025-04-02", "service": "AmazonS3", "cost_usd": 2.0}])
+    rows = client.get("/api/v1/anomalies/", params={"provider": "AWS"}).json()
+    assert [(r["date"], r["service"], r["cost_usd"]) for r in rows] == [
+        ("2025-04-01", "AmazonEC2", 50.0)
+    ]
+    assert rows[0]["expected_usd"] == 1.0
+    assert client.get("/api/v1/anomalies/", params={"provider": "GCP"}).json() == []
+
+    # series without a row on a day skip it; folded days are not re-scored
+    save([{**spike, "date": "2025-04-03", "service": "AmazonS3", "cost_usd": 2.0}])
+    assert len(client.get("/api/v1/anomalies/").json()) == 1
+    state, _ = anomalies._store._load()
+    assert state.loc[("AWS", "AmazonS3"), "last_date"] == pd.Timestamp("2025-04-02")
+    assert state.loc[("AWS", "AmazonEC2"), "last_date"] == pd.Timestamp("2025-04-01")
+
+
+def test_dormant_series_do_not_widen_the_reread(cost_data, monkeypatch):
+    cost_store.import_csv(str(cost_data / "aws_2025.csv"), "AWS")
+    day = {"provider": "AWS", "cost_usd": 1.0}
+    save(
+        [
+            {**day, "date": "2025-01-02", "service": "Retired"},
+            {**day, "date": "2025-04-01", "service": "AmazonEC2"},
+        ]
+    )
+    starts = []
+    real_daily = anomalies.rollups.daily
+
+    def daily(provider, start_date=None, end_date=None):
+        starts.append(start_date)
+        return real_daily(provider, start_date, end_date)
+
+    monkeypatch.setattr(anomalies.rollups, "daily", daily)
+    save([{**day, "date": "2025-04-02", "service": "AmazonS3"}])
+
+    # from the day after the newest folded one, not Retired's 2025-01-03
+    assert [str(s) for s in starts] == ["2025-04-01"]
+    state, _ = anomalies._store._load()
+    assert state.loc[("AWS", "AmazonEC2"), "last_date"] == pd.Timestamp("2025-04-01")
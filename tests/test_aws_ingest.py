@@ -0,0 +1,124 @@
+# tests/test_aws_ingest.py
+
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.services.ingestion import throttle
+from app.services.ingestion.aws_ingest import AwsIngest
+from app.services.ingestion.normalizer import normalize
+
+
+class FakeCostExplorer:
+    """Two pages per request range; throttles the first `throttle_first` calls."""
+
+    def __init__(self, throttle_first=0, delay=0.0):
+        self.calls = 0
+        self.throttle_first = throttle_first
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get_cost_and_usage(self, **params):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if call <= self.throttle_first:
+                raise ClientError(
+                    {"Error": {"Code": "LimitExceededException"}}, "GetCostAndUsage"
+                )
+            start = date.fromisoformat(params["TimePeriod"]["Start"])
+            end = date.fromisoformat(params["TimePeriod"]["End"])
+            days = [start + timedelta(n) for n in range((end - start).days)]
+            # first page: even days, second page (NextPageToken): odd days
+            second = "NextPageToken" in params
+            keys = [g["Key"] for g in params["GroupBy"]]
+            extra = {"LINKED_ACCOUNT": "123456789012", "REGION": "eu-west-1"}
+            return {
+                "ResultsByTime": [
+                    {
+                        "TimePeriod": {"Start": d.isoformat()},
+                        "Groups": [
+                            {
+                                "Keys": ["AmazonEC2"] + [extra[k] for k in keys[1:]],
+                                "Metrics": {"UnblendedCost": {"Amount": "1.5"}},
+                            }
+                        ],
+                    }
+                    for i, d in enumerate(days)
+                    if i % 2 == int(second)
+                ],
+                **({} if second else {"NextPageToken": "p2"}),
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def fast_throttle(monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_throttle_base_delay_seconds", 0.01)
+    monkeypatch.setattr(settings, "aws_ce_requests_per_second", 200.0)
+    monkeypatch.setattr(throttle, "_buckets", {})
+
+
+def test_sub_ranges_fetched_concurrently_and_merged_in_date_order():
+    fake = FakeCostExplorer(delay=0.05)
+    ingest = AwsIngest(client=fake, max_concurrency=4, chunk_days=7)
+    records = ingest.fetch(date(2025, 1, 1), date(2025, 1, 28))
+
+    assert fake.calls == 8  # 4 sub-ranges x 2 pages
+    assert fake.max_in_flight > 1
+    dates = [r["date"] for r in records]
+    assert len(dates) == 28
+    # each sub-range's pages stay together, sub-ranges in order
+    chunks = [(date.fromisoformat(d) - date(2025, 1, 1)).days // 7 for d in dates]
+    assert chunks == sorted(chunks)
+
+
+def test_throttled_requests_back_off_and_slow_the_bucket():
+    fake = FakeCostExplorer(throttle_first=2)
+    ingest = AwsIngest(client=fake, max_concurrency=1)
+    records = ingest.fetch(date(2025, 1, 1), date(2025, 1, 3))
+
+    assert len(records) == 3
+    stats = throttle.stats()["AWS"]
+    assert stats["throttled"] == 2
+    assert stats["rate"] < stats["max_rate"]
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_throttle_max_retries", 1)
+    ingest = AwsIngest(client=FakeCostExplorer(throttle_first=10))
+    with pytest.raises(throttle.Throttled):
+        ingest.fetch(date(2025, 1, 1), date(2025, 1, 3))
+
+
+def test_group_by_fills_account_and_region():
+    ingest = AwsIngest(client=FakeCostExplorer(), group_by=["LINKED_ACCOUNT"])
+    rec = normalize(ingest.fetch(date(2025, 1, 1), date(2025, 1, 1)))[0]
+    assert rec["account_id"] == "123456789012"
+    assert "region" not in rec
+
+    ingest = AwsIngest(client=FakeCostExplorer(), group_by=["REGION"])
+    assert ingest.fetch(date(2025, 1, 1), date(2025, 1, 1))[0]["region"] == "eu-west-1"
+
+    with pytest.raises(ValueError):
+        AwsIngest(client=FakeCostExplorer(), group_by=["LINKED_ACCOUNT", "REGION"])
+
+
+def test_token_bucket_limits_rate():
+    bucket = throttle.TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,108 @@
+# tests/test_azure_ingest.py
+
+import threading
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import HttpResponseError
+
+from app.core.config import settings
+from app.services.ingestion import throttle
+from app.services.ingestion.azure_ingest import AzureIngest
+
+BASE = "https://management.azure.com/subscriptions/sub/providers/Microsoft.CostManagement/query"
+
+
+def _throttled(retry_after):
+    response = SimpleNamespace(
+        status_code=429,
+        reason="Too Many Requests",
+        headers={
+            "x-ms-ratelimit-microsoft.costmanagement-qpu-retry-after": retry_after
+        },
+        text=lambda: "",
+    )
+    exc = HttpResponseError(message="throttled")
+    exc.status_code = 429
+    exc.response = response
+    return exc
+
+
+class FakeQuery:
+    """query.usage stand-in: two next_link pages per month, columns shuffled."""
+
+    def __init__(self, throttle_first=0):
+        self.calls = []
+        self.throttle_first = throttle_first
+        self._lock = threading.Lock()
+
+    def usage(self, scope, query, params=None):
+        with self._lock:
+            self.calls.append((query["timePeriod"]["from"][:10], dict(params or {})))
+            if len(self.calls) <= self.throttle_first:
+                raise _throttled("0.01")
+        start = date.fromisoformat(query["timePeriod"]["from"][:10])
+        grouping = [g["name"] for g in query["dataset"]["grouping"]]
+        second = bool(params)
+        columns = ["Currency", "ServiceName", *grouping[1:], "UsageDate", "Cost"]
+        day = start.replace(day=2 if second else 1)
+        row = ["USD", "Virtual Machines", *["rg-app"] * len(grouping[1:])]
+        return SimpleNamespace(
+            columns=[SimpleNamespace(name=c) for c in columns],
+            rows=[row + [int(day.strftime("%Y%m%d")), 2.5]],
+            next_link=None if second else f"{BASE}?api-version=x&$skiptoken=abc",
+        )
+
+
+@pytest.fixture(autouse=True)
+def fast_throttle(monkeypatch):
+    monkeypatch.setattr(settings, "azure_requests_per_second", 200.0)
+    monkeypatch.setattr(throttle, "_buckets", {})
+
+
+def _ingest(query, **kwargs):
+    return AzureIngest("sub", client=SimpleNamespace(query=query), **kwargs)
+
+
+def test_months_follow_next_link_and_map_columns_by_name():
+    query = FakeQuery()
+    records = _ingest(query).fetch(date(2025, 1, 1), date(2025, 3, 31))
+
+    assert [r["date"] for r in records] == [
+        "2025-01-01",
+        "2025-01-02",
+        "2025-02-01",
+        "2025-02-02",
+        "2025-03-01",
+        "2025-03-02",
+    ]
+    assert {r["service"] for r in records} == {"Virtual Machines"}
+    assert {r["cost_usd"] for r in records} == {2.5}
+    assert sorted(c[0] for c in query.calls if not c[1]) == [
+        "2025-01-01",
+        "2025-02-01",
+        "2025-03-01",
+    ]
+    assert all(c[1] == {"$skiptoken": "abc"} for c in query.calls if c[1])
+
+
+def test_throttle_honors_retry_after_headers():
+    query = FakeQuery(throttle_first=2)
+    records = _ingest(query, max_concurrency=1).fetch(
+        date(2025, 1, 1), date(2025, 1, 31)
+    )
+    assert len(records) == 2
+    assert throttle.stats()["Azure"]["throttled"] == 2
+
+
+def test_extra_grouping():
+    record = _ingest(FakeQuery(), group_by=["ResourceGroupName"]).fetch(
+        date(2025, 1, 1), date(2025, 1, 31)
+    )[0]
+    assert record["account_id"] == "rg-app"
+
+    record = _ingest(FakeQuery(), group_by=["Meter"]).fetch(
+        date(2025, 1, 1), date(2025, 1, 31)
+    )[0]
+    assert record["service"] == "Virtual Machines / rg-app"
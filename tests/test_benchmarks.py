@@ -0,0 +1,67 @@
+# tests/test_benchmarks.py
+
+import pandas as pd
+import pytest
+
+from app.services import cost_service
+from scripts.benchmarks import suite, synthetic
+
+SPEC = synthetic.Spec(rows=10_000, services=5, accounts=3, regions=2, days=30)
+
+
+def test_synthetic_is_deterministic_and_date_ordered():
+    first = synthetic.frame(SPEC)
+    assert len(first) == SPEC.rows
+    pd.testing.assert_frame_equal(first, synthetic.frame(SPEC))
+    assert first["date"].is_monotonic_increasing
+    assert first["date"].nunique() == SPEC.days
+    assert first["service"].nunique() == SPEC.services
+    assert first["account_id"].nunique() == SPEC.accounts
+    # another seed draws other rows
+    other = synthetic.frame(synthetic.Spec(**{**SPEC.to_dict(), "seed": 1}))
+    assert not first["cost_usd"].equals(other["cost_usd"])
+
+
+def test_write_csvs_rejects_out_of_range_rows(tmp_path):
+    with pytest.raises(ValueError):
+        synthetic.write_csvs(synthetic.Spec(rows=10), tmp_path)
+
+
+def test_suite_runs_in_a_sandbox():
+    data_dir = cost_service.DATA_DIR
+    results = suite.run_suite(
+        SPEC, repeat=1, window_days=7, batch_rows=1_000, only=["filter", "api"]
+    )
+    assert set(results["benchmarks"]) == {
+        "filter.costframe",
+        "filter.dataframe",
+        "api.costs",
+        "api.costs.columnar",
+    }
+    assert results["meta"]["spec"] == SPEC.to_dict()
+    # 7 of 30 days across the three providers
+    rows = results["benchmarks"]["api.costs"]["rows"]
+    assert rows == pytest.approx(3 * 7 * SPEC.rows / 30, rel=0.01)
+    assert cost_service.DATA_DIR == data_dir
+
+
+def _results(**medians):
+    return {
+        "meta": {"spec": SPEC.to_dict(), "window_days": 7, "batch_rows": 1_000},
+        "benchmarks": {name: {"median_s": m} for name, m in medians.items()},
+    }
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    baseline = _results(etl=1.0, filter=1.0, api=1.0)
+    current = _results(etl=1.2, filter=1.5, api=0.5, new=9.0)
+    regressions = suite.compare(current, baseline, tolerance=0.25)
+    assert [r["name"] for r in regressions] == ["filter"]
+    assert regressions[0]["ratio"] == pytest.approx(1.5)
+
+
+def test_compare_refuses_different_workloads():
+    baseline = _results(etl=1.0)
+    baseline["meta"]["batch_rows"] = 5_000
+    with pytest.raises(ValueError):
+        suite.compare(_results(etl=1.0), baseline, tolerance=0.25)
@@ -0,0 +1,154 @@
+# tests/test_clients.py
+
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import boto3
+from botocore.credentials import RefreshableCredentials
+
+from app.core.config import settings
+from app.services.ingestion import clients
+
+
+def _fake_factory(built, closed):
+    def build():
+        client = object()
+        built.append(client)
+        return client, lambda: True, lambda: closed.append(client)
+
+    return build
+
+
+def test_client_is_built_once_and_shared_across_threads(monkeypatch):
+    built, closed = [], []
+    monkeypatch.setattr(clients, "_build_aws", _fake_factory(built, closed))
+    registry = clients.ClientRegistry()
+
+    seen = []
+    threads = [
+        threading.Thread(target=lambda: seen.append(registry.aws())) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(c is built[0] for c in seen)
+    assert set(registry.stats()) == {"AWS"}
+
+    registry.refresh_credentials()
+    assert registry.stats()["AWS"]["credential_refreshes"] == 1
+
+    registry.close()
+    assert closed == built
+
+
+def test_client_is_rebuilt_after_max_age(monkeypatch):
+    built, closed = [], []
+    monkeypatch.setattr(clients, "_build_azure", _fake_factory(built, closed))
+    monkeypatch.setattr(settings, "ingestion_client_max_age_seconds", 1e-9)
+    registry = clients.ClientRegistry()
+
+    first = registry.azure()
+    second = registry.azure()
+    assert first is not second
+    # windows may still use the old client: it is left to the GC
+    assert closed == []
+    registry.close()
+    assert closed == [second]
+
+
+def test_slow_build_does_not_block_other_clients(monkeypatch):
+    building, release = threading.Event(), threading.Event()
+
+    def slow_aws():
+        building.set()
+        release.wait(5)
+        return object(), lambda: False, lambda: None
+
+    monkeypatch.setattr(clients, "_build_aws", slow_aws)
+    monkeypatch.setattr(clients, "_build_azure", _fake_factory([], []))
+    registry = clients.ClientRegistry()
+
+    aws = threading.Thread(target=registry.aws)
+    aws.start()
+    assert building.wait(5)
+    try:
+        assert registry.azure() is not None  # while AWS is still building
+        assert set(registry.stats()) == {"Azure"}
+    finally:
+        release.set()
+        aws.join()
+    assert set(registry.stats()) == {"AWS", "Azure"}
+
+
+def test_storage_client_shares_the_bigquery_credentials(monkeypatch):
+    credentials = object()
+
+    class FakeStorage:
+        class BigQueryReadClient:
+            def __init__(self, credentials):
+                self.credentials = credentials
+                self.transport = self
+
+            def close(self):
+                pass
+
+    monkeypatch.setattr(
+        clients,
+        "_build_bigquery",
+        lambda project: (object(), lambda: False, lambda: None, credentials),
+    )
+    monkeypatch.setattr(clients, "_bigquery_storage", lambda: FakeStorage)
+    registry = clients.ClientRegistry()
+
+    assert registry.bigquery_storage("proj").credentials is credentials
+    assert set(registry.stats()) == {"GCP:proj", "GCP-storage:proj"}
+
+    # an installed BigQuery client has no credentials to share
+    registry.install("GCP:other", object())
+    assert registry.bigquery_storage("other") is None
+
+
+def test_aws_refresh_counts_only_new_credentials(monkeypatch):
+    def metadata(minutes):
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+        return {
+            "access_key": "key",
+            "secret_key": "secret",
+            "token": "token",
+            "expiry_time": expiry.isoformat(),
+        }
+
+    lifetimes = [14, 60]
+    creds = RefreshableCredentials.create_from_metadata(
+        metadata(18), lambda: metadata(lifetimes.pop(0)), "test"
+    )
+
+    class Session:
+        def __init__(self, profile_name=None):
+            pass
+
+        def client(self, *args, **kwargs):
+            return SimpleNamespace(close=lambda: None)
+
+        def get_credentials(self):
+            return creds
+
+    monkeypatch.setattr(boto3, "Session", Session)
+    # wider than botocore's 15-minute advisory window
+    monkeypatch.setattr(settings, "ingestion_credential_refresh_margin", 20 * 60)
+    _, refresh, _ = clients._build_aws()
+
+    # within the margin but outside botocore's window: nothing fetched
+    assert not refresh()
+    assert lifetimes == [14, 60]
+
+    creds._expiry_time = datetime.now(timezone.utc) + timedelta(minutes=12)
+    # fetched, but the new credentials are still within the margin
+    assert not refresh()
+    assert lifetimes == [60]
+    assert refresh()
+    assert not refresh()
@@ -0,0 +1,51 @@
+# tests/test_cost_index.py
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.cost_index import CostFrame
+from app.services.cost_service import _apply_filters
+from app.services.etl import transform
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(42)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "date": pd.Timestamp("2025-01-01")
+            + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+            "service": rng.choice(["EC2", "S3", "Lambda"], n),
+            "cost_usd": rng.random(n),
+        }
+    )
+    return transform(df)
+
+
+@pytest.mark.parametrize(
+    "service,start_date,end_date",
+    [
+        (None, None, None),
+        ("S3", None, None),
+        (None, date(2025, 2, 1), date(2025, 2, 28)),
+        ("EC2", date(2025, 3, 15), None),
+        ("Lambda", None, date(2025, 1, 10)),
+        ("RDS", date(2025, 1, 1), date(2025, 12, 31)),
+        (None, date(2025, 3, 1), date(2025, 2, 1)),
+    ],
+)
+def test_indexed_select_matches_mask(frame, service, start_date, end_date):
+    expected = _apply_filters(frame, service, start_date, end_date)
+    got = _apply_filters(CostFrame(frame), service, start_date, end_date)
+
+    assert got["date"].is_monotonic_increasing
+    cols = ["date", "service", "cost_usd"]
+    pd.testing.assert_frame_equal(
+        got[cols].sort_values(cols).reset_index(drop=True),
+        expected[cols].sort_values(cols).reset_index(drop=True),
+        check_categorical=False,
+    )
@@ -0,0 +1,146 @@
+# tests/test_cost_repository.py
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import cost_repository, data_versions, rollups
+from app.services.cost_repository import (
+    PostgresCostRepository,
+    SqliteCostRepository,
+    _month_partition,
+    create_repository,
+)
+from app.services.ingestion.loader import save
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_repo(cost_data, monkeypatch):
+    repo = SqliteCostRepository(f"sqlite:///{cost_data / 'costs.db'}")
+    monkeypatch.setattr(cost_repository, "repository", repo)
+    monkeypatch.setattr(settings, "cost_storage", "database")
+    yield repo
+    repo.close()
+
+
+def _record(day, service="AmazonEC2", cost=1.0, **extra):
+    return {
+        "provider": "AWS",
+        "date": day,
+        "service": service,
+        "cost_usd": cost,
+        **extra,
+    }
+
+
+def test_create_repository_picks_backend():
+    assert isinstance(
+        create_repository("postgresql://u@db/costs"), PostgresCostRepository
+    )
+    assert isinstance(create_repository("sqlite:///tmp/c.db"), SqliteCostRepository)
+    assert "FROM ('2025-12-01') TO ('2026-01-01')" in _month_partition(
+        date(2025, 12, 1)
+    )
+
+
+def test_upsert_and_filtered_read(sqlite_repo):
+    sqlite_repo.write_sync(
+        [
+            _record("2025-04-01", cost=1.0),
+            _record("2025-04-01", cost=2.0, region="us-east-1"),
+            _record("2025-04-02", service="AmazonS3", cost=3.0),
+        ]
+    )
+    # same key again: replaced, not duplicated
+    sqlite_repo.write_sync([_record("2025-04-01", cost=10.0)])
+
+    assert sqlite_repo.has_provider_sync("AWS")
+    assert not sqlite_repo.has_provider_sync("GCP")
+    df = sqlite_repo.read_sync("AWS", service="AmazonEC2", end_date=date(2025, 4, 1))
+    assert sorted(df["cost_usd"]) == [2.0, 10.0]
+
+
+def test_provider_check_is_cached_until_the_provider_is_written(
+    sqlite_repo, monkeypatch
+):
+    calls = []
+    providers = sqlite_repo._providers
+
+    def counted():
+        calls.append(1)
+        return providers()
+
+    monkeypatch.setattr(sqlite_repo, "_providers", counted)
+
+    assert not sqlite_repo.has_provider_sync("AWS")
+    assert not sqlite_repo.has_provider_sync("AWS")
+    assert len(calls) == 1
+
+    sqlite_repo.write_sync([_record("2025-04-01")])
+    assert sqlite_repo.has_provider_sync("AWS")
+    assert sqlite_repo.has_provider_sync("AWS")
+    assert len(calls) == 2
+
+    sqlite_repo.delete_provider_sync("AWS")
+    assert not sqlite_repo.has_provider_sync("AWS")
+    assert len(calls) == 3
+
+
+def test_writes_by_another_replica_show_up_after_the_ttl(sqlite_repo, monkeypatch):
+    save([_record("2025-04-01", cost=1.0)])
+    summary = {"provider": "AWS", "start_date": "2025-04-01"}
+    assert rollups.summarize([], **summary)["cost_usd"].tolist() == [1.0]
+
+    # another replica: its own repository and rollups, same database
+    other = SqliteCostRepository(sqlite_repo.url)
+    other.write_sync([_record("2025-04-02", cost=5.0)])
+    other.close()
+    assert rollups.summarize([], **summary)["cost_usd"].tolist() == [1.0]
+
+    monkeypatch.setattr(settings, "database_providers_ttl_seconds", 0.0)
+    assert rollups.summarize([], **summary)["cost_usd"].tolist() == [6.0]
+
+
+def test_etag_follows_cost_providers_updated_at(sqlite_repo, cost_data, monkeypatch):
+    save([_record("2025-04-01")])
+    etag = client.get("/api/v1/costs/aws").headers["etag"]
+    assert client.get("/api/v1/costs/aws").headers["etag"] == etag
+
+    # written by another replica, which has its own data_versions.json
+    monkeypatch.setattr(settings, "database_providers_ttl_seconds", 0.0)
+    with monkeypatch.context() as node:
+        node.setattr(data_versions, "VERSIONS_PATH", cost_data / "other.json")
+        other = SqliteCostRepository(sqlite_repo.url)
+        other.write_sync([_record("2025-04-02")])
+        other.close()
+    assert client.get("/api/v1/costs/aws").headers["etag"] != etag
+
+
+def test_costs_routes_read_through_the_repository(sqlite_repo):
+    save([_record(f"2025-04-0{d}", cost=float(d)) for d in range(1, 4)])
+
+    rows = client.get("/api/v1/costs/aws", params={"start_date": "2025-04-01"}).json()
+    assert [r["cost_usd"] for r in rows] == [1.0, 2.0, 3.0]
+
+    # providers without database rows still come from their CSVs, and the
+    # AWS CSV was imported before its first ingested rows
+    unified = client.get(
+        "/api/v1/costs/", params={"start_date": "2025-03-31", "end_date": "2025-04-01"}
+    ).json()
+    assert {r["provider"] for r in unified} == {"AWS", "Azure", "GCP"}
+    assert any(r["provider"] == "AWS" and r["date"] == "2025-03-31" for r in unified)
+
+    summary = client.get(
+        "/api/v1/costs/summary", params={"provider": "AWS", "group_by": "month"}
+    ).json()
+    assert summary == [
+        {"month": "2025-01", "cost_usd": 93.0, "records": 62},
+        {"month": "2025-02", "cost_usd": 84.0, "records": 56},
+        {"month": "2025-03", "cost_usd": 93.0, "records": 62},
+        {"month": "2025-04", "cost_usd": 6.0, "records": 3},
+    ]
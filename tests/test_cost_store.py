@@ -0,0 +1,108 @@
+# tests/test_cost_store.py
+
+import multiprocessing
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services import cost_service, cost_store
+from app.services.ingestion.loader import save
+
+
+def _records():
+    rows = []
+    for day in ("2025-01-15", "2025-02-10", "2025-03-05"):
+        for svc, cost in (("AmazonEC2", 10.0), ("AmazonS3", 1.5)):
+            rows.append(
+                {"provider": "AWS", "date": day, "service": svc, "cost_usd": cost}
+            )
+    rows.append(
+        {
+            "provider": "GCP",
+            "date": "2025-02-11",
+            "service": "BigQuery",
+            "cost_usd": 3.0,
+        }
+    )
+    return rows
+
+
+def test_write_partitions_by_provider_and_month(tmp_path):
+    assert cost_store.write(_records(), root=tmp_path) == 7
+
+    months = sorted(p.name for p in (tmp_path / "provider=AWS").iterdir())
+    assert months == ["month=2025-01", "month=2025-02", "month=2025-03"]
+    assert cost_store.has_provider("GCP", root=tmp_path)
+    assert not cost_store.has_provider("Azure", root=tmp_path)
+
+    part = next((tmp_path / "provider=AWS" / "month=2025-02").glob("*.parquet"))
+    schema = pq.read_schema(part)
+    assert pa.types.is_dictionary(schema.field("service").type)
+    assert schema.field("date").type == pa.date32()
+
+
+def test_read_pushes_down_filters(tmp_path):
+    cost_store.write(_records(), root=tmp_path)
+
+    df = cost_store.read(
+        "AWS",
+        service="AmazonEC2",
+        start_date=date(2025, 2, 1),
+        end_date=date(2025, 2, 28),
+        root=tmp_path,
+    )
+    assert len(df) == 1
+    assert df.iloc[0]["date"].date() == date(2025, 2, 10)
+    assert df.iloc[0]["cost_usd"] == 10.0
+    assert df.iloc[0]["month"] == "2025-02"
+
+    assert len(cost_store.read("AWS", root=tmp_path)) == 6
+
+
+def test_write_is_an_upsert(tmp_path):
+    cost_store.write(_records(), root=tmp_path)
+    restated = [dict(r, cost_usd=r["cost_usd"] * 2) for r in _records()[:2]]
+    cost_store.write(restated + _records()[2:], root=tmp_path)
+
+    df = cost_store.read("AWS", root=tmp_path)
+    assert len(df) == 6
+    jan = df[df["month"] == "2025-01"].set_index("service")["cost_usd"]
+    assert jan.to_dict() == {"AmazonEC2": 20.0, "AmazonS3": 3.0}
+    files = list((tmp_path / "provider=AWS" / "month=2025-01").glob("*.parquet"))
+    assert len(files) == 1
+
+
+def _write_days(root, first):
+    records = [
+        {"provider": "AWS", "date": f"2025-01-{d:02d}", "cost_usd": 1.0}
+        for d in range(first, first + 5)
+    ]
+    for record in records:
+        cost_store.write([record], root=root)
+
+
+def test_processes_writing_one_partition_keep_every_row(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_write_days, args=(tmp_path, first))
+        for first in (1, 6, 11, 16)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert [w.exitcode for w in workers] == [0, 0, 0, 0]
+    assert len(cost_store.read("AWS", root=tmp_path)) == 20
+
+
+def test_first_save_imports_the_legacy_csv(cost_data):
+    save([{"provider": "AWS", "date": "2025-04-01", "service": "S3", "cost_usd": 5.0}])
+
+    assert cost_store.has_provider("AWS")
+    df = cost_service.get_provider_cost_frame("AWS")
+    # Jan-Mar from the CSV (2 services a day), then the ingested day
+    assert len(df) == 90 * 2 + 1
+    assert df["date"].min() == pd.Timestamp("2025-01-01")
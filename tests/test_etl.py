@@ -0,0 +1,86 @@
+# tests/test_etl.py
+
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services import etl
+
+ROWS = [
+    {
+        "date": f"2025-01-{day:02d}",
+        "service": ["EC2", "S3", "Lambda"][day % 3],
+        "account_id": "" if day % 5 == 0 else f"0{day % 4}1234567890",
+        "region": "eu-west-1",
+        "cost_usd": day * 1.5,
+        "currency": "USD",
+    }
+    for day in range(1, 32)
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "aws.csv"
+    pd.DataFrame(ROWS).to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_uses_compact_dtypes(csv_path):
+    df = etl.load_and_transform(csv_path)
+
+    assert "currency" not in df.columns
+    assert df.dtypes.astype(str).to_dict() == {
+        "date": "datetime64[ns]",
+        "service": "category",
+        "account_id": "category",
+        "region": "category",
+        "cost_usd": "float64",
+        "month": "category",
+        "day": "int8",
+        "weekday": "category",
+        "year": "int16",
+    }
+    first = df.iloc[0]
+    assert first["month"] == "2025-01"
+    assert first["weekday"] == "Wednesday"
+    assert (first["day"], first["year"]) == (1, 2025)
+    # ids keep their leading zeros; missing ones become ""
+    assert first["account_id"] == "011234567890"
+    assert df.loc[4, "account_id"] == ""
+
+
+def test_unparsed_dates_fall_back_to_pandas(tmp_path):
+    path = tmp_path / "azure.csv"
+    pd.DataFrame(
+        {"date": ["January 2, 2025", "January 3, 2025"], "cost_usd": [1.0, 2.0]}
+    ).to_csv(path, index=False)
+
+    df = etl.load_and_transform(str(path))
+
+    assert df["date"].tolist() == [
+        pd.Timestamp("2025-01-02"),
+        pd.Timestamp("2025-01-03"),
+    ]
+    assert df["weekday"].tolist() == ["Thursday", "Friday"]
+    assert df["service"].tolist() == ["", ""]
+
+
+def test_iter_chunks_matches_whole_file_load(csv_path, monkeypatch):
+    monkeypatch.setattr(settings, "etl_block_bytes", 256)
+
+    chunks = list(etl.iter_chunks(csv_path))
+    whole = etl.load_and_transform(csv_path)
+
+    assert len(chunks) > 1
+    combined = pd.concat(chunks, ignore_index=True)
+    for col in whole.columns:
+        assert combined[col].astype(str).tolist() == whole[col].astype(str).tolist()
+
+
+def test_memory_usage_reports_columns_and_total(csv_path):
+    df = etl.load_and_transform(csv_path)
+    usage = etl.memory_usage(df)
+
+    assert usage["total"] == sum(v for k, v in usage.items() if k != "total")
+    assert set(df.columns) < set(usage)
@@ -0,0 +1,106 @@
+# tests/test_fake_backends.py
+
+import argparse
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.services.ingestion import clients, throttle
+from app.services.ingestion.aws_ingest import AwsIngest
+from app.services.ingestion.azure_ingest import AzureIngest
+from app.services.ingestion.gcp_ingest import GcpIngest
+from scripts.benchmarks import bench_ingestion
+from scripts.benchmarks.fake_backends import (
+    FakeBigQuery,
+    FakeCostExplorer,
+    FakeCostManagement,
+)
+
+START, END = date(2025, 1, 1), date(2025, 2, 28)  # 59 days
+
+
+@pytest.fixture(autouse=True)
+def fast_throttle(monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_throttle_base_delay_seconds", 0.001)
+    monkeypatch.setattr(settings, "aws_ce_requests_per_second", 1000.0)
+    monkeypatch.setattr(settings, "azure_requests_per_second", 1000.0)
+    monkeypatch.setattr(throttle, "_buckets", {})
+
+
+def test_cost_explorer_pages_and_throttles():
+    fake = FakeCostExplorer(groups_per_day=30, page_size=100, throttle_rate=0.3)
+    records = AwsIngest(client=fake, group_by=["LINKED_ACCOUNT"], chunk_days=10).fetch(
+        START, END
+    )
+
+    assert len(records) == 59 * 30
+    assert len({(r["date"], r["service"]) for r in records}) == 59 * 30
+    assert all(r["account_id"].isdigit() for r in records)
+    stats = fake.stats()
+    assert stats["throttled"] > 0
+    assert stats["calls"] == stats["pages"] + stats["throttled"]
+    # 6 ten-day sub-ranges of at most 300 rows, 100 per page
+    assert stats["pages"] == 18
+
+
+def test_cost_management_follows_skiptokens_and_retry_after():
+    fake = FakeCostManagement(
+        groups_per_day=10, page_size=100, throttle_rate=0.3, retry_after=0.001
+    )
+    records = AzureIngest("sub", client=fake).fetch(START, END)
+
+    assert len(records) == 59 * 10
+    assert records[0]["date"] == "2025-01-01"
+    assert fake.throttled > 0
+    assert fake.pages == 4 + 3  # January: 310 rows, February: 280
+
+
+def test_bigquery_batches():
+    fake = FakeBigQuery(groups_per_day=10, page_size=250)
+    batches = list(GcpIngest("p", "d", "t", client=fake).iter_batches(START, END))
+
+    assert [b.num_rows for b in batches] == [250, 250, 90]
+    assert fake.stats()["calls"] == 3
+
+
+def test_installed_client_is_pinned(monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_client_max_age_seconds", 1e-9)
+    registry = clients.ClientRegistry()
+    fake = FakeCostExplorer()
+    registry.install("AWS", fake)
+
+    assert registry.aws() is fake
+    assert registry.aws() is fake
+    registry.close()
+
+
+def _args(**overrides):
+    values = dict(
+        start=START,
+        end=END,
+        window_days=None,
+        groups_per_day=5,
+        page_size=100,
+        latency=0.0,
+        throttle_rate=0.0,
+        requests_per_second=1000.0,
+        concurrency=2,
+        batch_rows=None,
+        seed=0,
+    )
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+@pytest.mark.parametrize("flow", ["ingest_all", "fetch_azure"])
+def test_bench_ingestion_flows_run_offline(flow):
+    result = bench_ingestion.measure(flow, _args())
+
+    # fetch scripts always cover 2025-01-01 to 2025-06-30
+    days = 59 if flow == "ingest_all" else 181
+    providers = 3 if flow == "ingest_all" else 1
+    assert result["records"] == providers * days * 5
+    assert result["records_per_s"] > 0
+    assert result["peak_mib"] > 0
+    assert len(result["backends"]) == providers
@@ -0,0 +1,101 @@
+# tests/test_forecast.py
+
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import forecasting
+
+client = TestClient(app)
+
+
+class InlinePool:
+    """ProcessPoolExecutor stand-in that runs tasks in-process."""
+
+    def __init__(self):
+        self.tasks = 0
+
+    def submit(self, fn, *args):
+        self.tasks += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(forecasting, "_models", forecasting._LRU(100))
+    monkeypatch.setattr(forecasting, "_forecasts", forecasting._LRU(100))
+    monkeypatch.setattr(forecasting, "_trained", 0)
+    inline = InlinePool()
+    monkeypatch.setattr(forecasting, "_get_pool", lambda: inline)
+    return inline
+
+
+def test_features_are_built_for_all_series_at_once():
+    df = pd.DataFrame(
+        {
+            "provider": ["AWS", "AWS", "AWS", "GCP"],
+            "service": ["EC2", "EC2", "EC2", "BigQuery"],
+            "date": pd.to_datetime(
+                ["2025-01-01", "2025-01-02", "2025-01-04", "2025-01-03"]
+            ),
+            "cost_usd": [1.0, 2.0, 4.0, 3.0],
+        }
+    )
+    index, days, matrix = forecasting.series_matrix(df)
+    assert list(index) == [("AWS", "EC2"), ("GCP", "BigQuery")]
+    assert matrix.tolist() == [[1.0, 2.0, 0.0, 4.0], [0.0, 0.0, 3.0, 0.0]]
+
+    features, targets = forecasting.build_features(matrix, days)
+    assert features.shape == (2, 4, len(forecasting.FEATURES))
+    assert features[0, 3].tolist() == [4.0, 0.0, 2.0]  # doy, lag1, lag2
+    assert np.isnan(features[0, 1, 2])
+
+
+def test_forecast_endpoint_caches_models(cost_data, pool):
+    params = {"provider": "AWS", "horizon_days": 7}
+    rows = client.get("/api/v1/forecast/", params=params).json()
+
+    assert len(rows) == 2 * 7
+    assert {r["service"] for r in rows} == {"AmazonEC2", "AmazonS3"}
+    assert rows[0]["date"] == "2025-04-01"
+    assert all(r["cost_usd"] >= 0 for r in rows)
+    assert forecasting.cache_stats()["trained"] == 2
+
+    # unchanged series, other horizon: cached models, nothing retrained
+    client.get("/api/v1/forecast/", params={**params, "horizon_days": 3})
+    assert forecasting.cache_stats()["trained"] == 2
+    # same request again: served from the forecast cache, no pool task
+    tasks = pool.tasks
+    assert client.get("/api/v1/forecast/", params=params).json() == rows
+    assert pool.tasks == tasks
+
+    # new data: both series are retrained
+    client.get("/api/v1/forecast/", params={**params, "end_date": "2025-03-30"})
+    assert forecasting.cache_stats()["trained"] == 4
+
+
+def test_models_are_trained_in_a_process_pool(monkeypatch):
+    monkeypatch.setattr(forecasting, "_models", forecasting._LRU(100))
+    monkeypatch.setattr(forecasting, "_forecasts", forecasting._LRU(100))
+    monkeypatch.setattr(forecasting, "_trained", 0)
+    monkeypatch.setattr(forecasting.settings, "forecast_workers", 1)
+    df = pd.DataFrame(
+        {
+            "provider": "AWS",
+            "service": "AmazonEC2",
+            "date": pd.date_range("2025-01-01", periods=30),
+            "cost_usd": np.arange(1, 31, dtype=float),
+        }
+    )
+    try:
+        result = forecasting.forecast(df, 5)
+    finally:
+        forecasting.shutdown()
+    assert result["date"].tolist() == list(pd.date_range("2025-01-31", periods=5).date)
+    assert forecasting._models.stats()["entries"] == 1
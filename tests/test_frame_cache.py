@@ -0,0 +1,61 @@
+# tests/test_frame_cache.py
+
+import os
+
+import pandas as pd
+
+from app.services.etl import load_and_transform
+from app.services.frame_cache import FrameCache
+
+
+def _write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_cache_hits_until_file_changes(tmp_path):
+    csv_path = str(tmp_path / "aws.csv")
+    _write_csv(csv_path, [{"date": "2025-01-01", "service": "S3", "cost_usd": 1.0}])
+    cache = FrameCache(max_bytes=10 * 1024 * 1024)
+
+    first = cache.get(csv_path, load_and_transform)
+    second = cache.get(csv_path, load_and_transform)
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    _write_csv(
+        csv_path,
+        [
+            {"date": "2025-01-01", "service": "S3", "cost_usd": 1.0},
+            {"date": "2025-01-02", "service": "S3", "cost_usd": 2.0},
+        ],
+    )
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    third = cache.get(csv_path, load_and_transform)
+    assert len(third) == 2
+    assert cache.misses == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        path = str(tmp_path / f"{name}.csv")
+        _write_csv(path, [{"date": "2025-01-01", "service": name, "cost_usd": 1.0}])
+        paths.append(path)
+
+    one_frame = FrameCache(max_bytes=1 << 30)
+    size = one_frame.get(paths[0], load_and_transform)
+    nbytes = int(size.memory_usage(index=True, deep=True).sum())
+
+    cache = FrameCache(max_bytes=nbytes * 2)
+    cache.get(paths[0], load_and_transform)
+    cache.get(paths[1], load_and_transform)
+    cache.get(paths[0], load_and_transform)  # a is now most recent
+    cache.get(paths[2], load_and_transform)  # evicts b
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    cache.get(paths[0], load_and_transform)
+    assert cache.hits == 2
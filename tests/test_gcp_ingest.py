@@ -0,0 +1,101 @@
+# tests/test_gcp_ingest.py
+
+from datetime import date, timedelta
+
+import pyarrow as pa
+
+from app.services import cost_store
+from app.services.ingestion import loader, runner
+from app.services.ingestion.gcp_ingest import GcpIngest
+from scripts.ingestion import fetch_gcp
+
+
+def _batch(day, n):
+    return pa.record_batch(
+        {
+            "date": pa.array([day] * n, pa.date32()),
+            "service": [f"svc-{i % 3}" for i in range(n)],
+            "account_id": [f"proj-{i}" for i in range(n)],
+            "region": ["europe-west1"] * n,
+            "cost_usd": [0.5] * n,
+        }
+    )
+
+
+class FakeRows:
+    def __init__(self, batches):
+        self.batches = batches
+        self.bqstorage_client = "unset"
+
+    def to_arrow_iterable(self, bqstorage_client=None):
+        self.bqstorage_client = bqstorage_client
+        yield from self.batches
+
+
+class FakeBigQuery:
+    """Stand-in for bigquery.Client returning canned Arrow batches."""
+
+    def __init__(self, batches):
+        self.rows = FakeRows(batches)
+        self.sql = None
+
+    def query(self, sql, job_config=None):
+        self.sql = sql
+        return self
+
+    def result(self):
+        return self.rows
+
+
+def _ingest(batches, **kwargs):
+    return GcpIngest(
+        "proj", "billing", "export", client=FakeBigQuery(batches), **kwargs
+    )
+
+
+def test_group_by_shapes_the_query():
+    ingest = _ingest([], group_by=["sku", "project", "region"])
+    sql = ingest._sql()
+    assert "project.id AS account_id" in sql
+    assert "location.region AS region" in sql
+    assert "CONCAT(service.description, ' / ', sku.description) AS service" in sql
+    assert "GROUP BY date, service, account_id, region" in sql
+    assert "WHERE DATE(_PARTITIONTIME) BETWEEN @start AND @end" in _ingest([])._sql()
+
+
+def test_batches_use_storage_client_and_keep_dict_contract():
+    ingest = _ingest([_batch(date(2025, 4, 1), 4)], bqstorage_client="read-client")
+    records = ingest.fetch(date(2025, 4, 1), date(2025, 4, 1))
+    assert ingest.client.rows.bqstorage_client == "read-client"
+    assert len(records) == 4
+    assert records[0]["provider"] == "GCP"
+    assert records[0]["account_id"] == "proj-0"
+
+
+def test_columnar_window_writes_arrow_batches(cost_data, monkeypatch):
+    batches = [_batch(date(2025, 4, 1) + timedelta(days=d), 6) for d in range(3)]
+    monkeypatch.setattr(runner, "build_ingestor", lambda provider: _ingest(batches))
+
+    assert runner.ingest_window("GCP", date(2025, 4, 1), date(2025, 4, 3)) == 18
+
+    df = cost_store.read("GCP", start_date=date(2025, 4, 1))
+    assert len(df) == 18
+    assert set(df["region"]) == {"europe-west1"}
+    assert df["cost_usd"].sum() == 9.0
+
+
+def test_fetch_script_saves_arrow_tables(cost_data, monkeypatch):
+    tables = []
+    real_save_table = loader.save_table
+
+    def save_table(table, **kwargs):
+        tables.append(table.num_rows)
+        real_save_table(table, **kwargs)
+
+    monkeypatch.setattr(loader, "save_table", save_table)
+    monkeypatch.setattr(loader, "save", None)  # no per-row dicts
+    batches = [_batch(date(2025, 4, 1) + timedelta(days=d), 4) for d in range(2)]
+
+    assert fetch_gcp.main(_ingest(batches)) == 8
+    assert tables == [8]
+    assert len(cost_store.read("GCP")) == 8
@@ -0,0 +1,171 @@
+# tests/test_http_caching.py
+
+import json
+import multiprocessing
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import compression
+from app.api.compression import choose_encoding, etag_matches
+from app.api.routes.v1 import costs
+from app.main import app
+from app.services import data_versions, rollups
+from app.services.ingestion.loader import save
+
+client = TestClient(app)
+
+
+def _get(url, **kwargs):
+    response = client.get(url, **kwargs)
+    assert response.status_code in (200, 304)
+    return response
+
+
+def test_if_none_match_answers_304_without_reading_data(cost_data, monkeypatch):
+    first = _get("/api/v1/costs/aws", params={"service": "AmazonS3"})
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"].endswith("GMT")
+    assert first.headers["cache-control"] == "no-cache"
+
+    async def no_read(*args, **kwargs):
+        raise AssertionError("data read for a fresh ETag")
+
+    monkeypatch.setattr(costs, "aget_provider_cost_frame", no_read)
+    again = _get(
+        "/api/v1/costs/aws",
+        params={"service": "AmazonS3"},
+        headers={"If-None-Match": etag},
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+    since = _get(
+        "/api/v1/costs/aws",
+        params={"service": "AmazonS3"},
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+    assert since.status_code == 304
+
+
+def test_etag_follows_query_and_data_version(cost_data):
+    url = "/api/v1/costs/"
+    etag = _get(url).headers["etag"]
+    assert _get(url, params={"service": "BigQuery"}).headers["etag"] != etag
+    assert _get(url, params={"format": "columnar"}).headers["etag"] != etag
+    assert _get(url).headers["etag"] == etag
+
+    # ingestion bumps the provider's version
+    save(
+        [
+            {
+                "provider": "GCP",
+                "date": "2025-04-01",
+                "service": "BigQuery",
+                "cost_usd": 1.0,
+            }
+        ]
+    )
+    changed = _get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    # so does rewriting a legacy CSV
+    etag = _get("/api/v1/costs/azure").headers["etag"]
+    with open(cost_data / "azure_2025.csv", "a") as f:
+        f.write("2025-04-01,Virtual Machines,9.0\n")
+    assert _get("/api/v1/costs/azure").headers["etag"] != etag
+
+
+def test_summary_is_conditional(cost_data):
+    first = _get("/api/v1/costs/summary", params={"provider": "AWS"})
+    again = _get(
+        "/api/v1/costs/summary",
+        params={"provider": "AWS"},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_summary_etag_changes_only_once_rollups_are_applied(cost_data, monkeypatch):
+    url, params = "/api/v1/costs/summary", {"provider": "AWS"}
+    save([{"provider": "AWS", "date": "2025-04-01", "cost_usd": 1.0}])
+    during = []
+    apply = rollups.apply
+
+    def apply_after_a_request(records):
+        # a summary request between the store write and the rollup update
+        during.append(_get(url, params=params))
+        apply(records)
+
+    monkeypatch.setattr(rollups, "apply", apply_after_a_request)
+    save([{"provider": "AWS", "date": "2025-04-02", "cost_usd": 1000.0}])
+
+    stale = during[0]
+    fresh = _get(url, params=params, headers={"If-None-Match": stale.headers["etag"]})
+    assert fresh.status_code == 200
+    assert fresh.json()[0]["cost_usd"] == stale.json()[0]["cost_usd"] + 1000.0
+
+
+def _bump_many(path, provider):
+    data_versions.VERSIONS_PATH = path
+    for _ in range(20):
+        data_versions.bump(provider)
+
+
+def test_processes_bumping_versions_keep_every_provider(tmp_path):
+    path = tmp_path / "versions.json"
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_bump_many, args=(path, provider))
+        for provider in ("AWS", "Azure", "GCP", "Other")
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert [w.exitcode for w in workers] == [0, 0, 0, 0]
+    assert sorted(json.loads(path.read_text())) == ["AWS", "Azure", "GCP", "Other"]
+
+
+def test_large_bodies_are_gzipped(cost_data, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = _get("/api/v1/costs/", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].endswith('-gzip"')
+    assert len(response.json()) == 90 * 5
+
+    # the encoded ETag still validates
+    again = _get(
+        "/api/v1/costs/",
+        headers={"If-None-Match": response.headers["etag"], "Accept-Encoding": "gzip"},
+    )
+    assert again.status_code == 304
+    assert again.headers["etag"] == response.headers["etag"]
+
+    streamed = _get(
+        "/api/v1/costs/",
+        headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+    )
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert len([json.loads(line) for line in streamed.text.splitlines()]) == 90 * 5
+
+    small = _get("/api/v1/costs/aws", params={"end_date": "2025-01-01"})
+    assert "content-encoding" not in small.headers
+
+
+def test_brotli_when_installed(cost_data):
+    pytest.importorskip("brotli")
+    response = _get("/api/v1/costs/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_accept_encoding_negotiation(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0, *;q=0.5") is None
+    assert choose_encoding("*") == "gzip"
+    assert etag_matches('"abc", W/"def-gzip"', '"def"')
+    assert not etag_matches('"abc"', '"abd"')
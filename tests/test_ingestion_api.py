@@ -0,0 +1,195 @@
+# tests/test_ingestion_api.py
+
+import asyncio
+import fcntl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import cost_service, cost_store
+from app.services.ingestion import runner
+from app.services.ingestion.jobs import JobManager, split_windows
+
+client = TestClient(app)
+
+PAYLOAD = {"start": "2025-01-01", "end": "2025-01-02"}
+
+
+def _fake_pages(delays, failures=(), spans=None):
+    def pages(provider, start, end):
+        began = time.monotonic()
+        time.sleep(delays.get(provider, 0))
+        if spans is not None:
+            spans.append((began, time.monotonic()))
+        if provider in failures:
+            raise RuntimeError(f"{provider} is down")
+        return [
+            [
+                {
+                    "provider": provider,
+                    "date": start.isoformat(),
+                    "service": "svc",
+                    "cost_usd": 1.0,
+                }
+            ]
+        ]
+
+    return pages
+
+
+def _import_csvs(cost_data):
+    # import the legacy CSVs up front, so first saves stay within timeouts
+    for provider, filename in cost_service.PROVIDER_FILES.items():
+        cost_store.import_csv(str(cost_data / filename), provider)
+
+
+def _wait(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/ingestion/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        assert time.monotonic() < deadline, job
+        time.sleep(0.02)
+
+
+def test_split_windows_by_month_and_days():
+    assert split_windows(date(2025, 1, 15), date(2025, 3, 2)) == [
+        (date(2025, 1, 15), date(2025, 1, 31)),
+        (date(2025, 2, 1), date(2025, 2, 28)),
+        (date(2025, 3, 1), date(2025, 3, 2)),
+    ]
+    assert split_windows(date(2025, 1, 1), date(2025, 1, 10), window_days=4) == [
+        (date(2025, 1, 1), date(2025, 1, 4)),
+        (date(2025, 1, 5), date(2025, 1, 8)),
+        (date(2025, 1, 9), date(2025, 1, 10)),
+    ]
+
+
+def test_job_runs_providers_concurrently(cost_data, monkeypatch):
+    spans = []
+    monkeypatch.setattr(
+        runner,
+        "iter_provider_pages",
+        _fake_pages({"AWS": 0.3, "Azure": 0.3, "GCP": 0.3}, spans=spans),
+    )
+    response = client.post("/api/v1/ingestion/", json=PAYLOAD)
+    assert response.status_code == 202
+    assert response.json()["windows_total"] == 3
+
+    job = _wait(response.json()["id"])
+    # every fetch started before the first one finished
+    assert max(began for began, _ in spans) < min(ended for _, ended in spans)
+    assert job["status"] == "ok"
+    assert job["count"] == 3
+    assert job["progress"] == 1.0
+    assert job["records_per_second"] > 0
+
+
+def test_month_fan_out_with_partial_failure_and_retry(cost_data, monkeypatch):
+    _import_csvs(cost_data)
+    monkeypatch.setattr(settings, "ingestion_provider_timeout_seconds", 1.0)
+    monkeypatch.setattr(
+        runner, "iter_provider_pages", _fake_pages({"Azure": 2.0}, failures={"GCP"})
+    )
+    response = client.post(
+        "/api/v1/ingestion/",
+        json={"start": "2025-01-01", "end": "2025-02-15"},
+    )
+    job = _wait(response.json()["id"])
+
+    assert job["status"] == "partial"
+    assert job["windows_total"] == 6
+    assert job["windows_failed"] == 4
+    by_provider = {}
+    for w in job["windows"]:
+        by_provider.setdefault(w["provider"], set()).add(w["status"])
+    assert by_provider == {"AWS": {"ok"}, "Azure": {"timeout"}, "GCP": {"error"}}
+
+    # the timed-out Azure threads are still sleeping: no retry alongside them
+    response = client.post(f"/api/v1/ingestion/jobs/{job['id']}/retry")
+    assert response.status_code == 409
+    azure = [w for w in job["windows"] if w["provider"] == "Azure"]
+    while any(
+        runner.window_running(
+            "Azure", date.fromisoformat(w["start"]), date.fromisoformat(w["end"])
+        )
+        for w in azure
+    ):
+        time.sleep(0.02)
+
+    monkeypatch.setattr(runner, "iter_provider_pages", _fake_pages({}))
+    response = client.post(f"/api/v1/ingestion/jobs/{job['id']}/retry")
+    assert response.status_code == 202
+    job = _wait(job["id"])
+    assert job["status"] == "ok"
+    assert job["count"] == 6
+    attempts = {(w["provider"], w["attempts"]) for w in job["windows"]}
+    assert attempts == {("AWS", 1), ("Azure", 2), ("GCP", 2)}
+
+
+def test_jobs_are_shared_across_worker_processes(cost_data, monkeypatch):
+    _import_csvs(cost_data)
+    monkeypatch.setattr(runner, "iter_provider_pages", _fake_pages({}, {"GCP"}))
+    job = _wait(client.post("/api/v1/ingestion/", json=PAYLOAD).json()["id"])
+    assert job["status"] == "partial"
+
+    # another uvicorn worker: nothing in memory, same app/data
+    other = JobManager(max_workers=2, history=10)
+    assert other.get(job["id"])["status"] == "partial"
+    assert [j["id"] for j in other.list()] == [job["id"]]
+
+    monkeypatch.setattr(runner, "iter_provider_pages", _fake_pages({}))
+    assert other.retry(job["id"])["status"] == "running"
+    # the retrying worker runs it; this one reports it from the stored state
+    job = _wait(job["id"])
+    assert job["status"] == "ok"
+    assert {(w["provider"], w["attempts"]) for w in job["windows"]} == {
+        ("AWS", 1),
+        ("Azure", 1),
+        ("GCP", 2),
+    }
+
+
+def test_window_locked_by_another_process_is_not_ingested(cost_data, monkeypatch):
+    monkeypatch.setattr(runner, "iter_provider_pages", _fake_pages({}))
+    key = ("AWS", date(2025, 1, 1), date(2025, 1, 1))
+    runner.LOCK_DIR.mkdir(parents=True)
+    # a separate open file description conflicts like another process would
+    with open(runner._lock_path(key), "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert runner.window_running(*key)
+        outcome = asyncio.run(runner.run_provider(*key, timeout=2.0))
+        assert outcome.status == "error"
+        assert "another process" in outcome.error
+    assert not runner.window_running(*key)
+    assert asyncio.run(runner.run_provider(*key, timeout=2.0)).status == "ok"
+
+
+def test_unknown_job_and_invalid_range(cost_data):
+    assert client.get("/api/v1/ingestion/jobs/nope").status_code == 404
+    assert client.get("/api/v1/ingestion/jobs/..%2Fwatermarks").status_code == 404
+    response = client.post(
+        "/api/v1/ingestion/", json={"start": "2025-02-01", "end": "2025-01-01"}
+    )
+    assert response.status_code == 422
+
+
+def test_timeout_starts_when_a_worker_picks_the_window_up(cost_data, monkeypatch):
+    _import_csvs(cost_data)
+    monkeypatch.setattr(runner, "_pool", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(runner, "iter_provider_pages", _fake_pages({"AWS": 0.6}))
+
+    async def both():
+        return await asyncio.gather(
+            runner.run_provider("AWS", date(2025, 1, 1), date(2025, 1, 1), 2.0),
+            # queued behind AWS for 0.6s, then runs well within 0.5s
+            runner.run_provider("GCP", date(2025, 1, 1), date(2025, 1, 1), 0.5),
+        )
+
+    aws, gcp = asyncio.run(both())
+    assert (aws.status, gcp.status) == ("ok", "ok")
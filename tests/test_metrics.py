@@ -0,0 +1,119 @@
+# tests/test_metrics.py
+
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import date
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services.ingestion import runner
+
+client = TestClient(app)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_latency_stages_and_rows(cost_data):
+    route = "/api/v1/costs/aws"
+    before = _sample(
+        "finops_http_request_duration_seconds_count",
+        method="GET",
+        route=route,
+        status="200",
+    )
+    misses = _sample("finops_cache_requests_total", cache="cost_frames", result="miss")
+    scanned = _sample("finops_rows_scanned_total", provider="AWS")
+    returned = _sample("finops_rows_returned_total", provider="AWS")
+
+    client.get(route, params={"service": "AmazonS3"})
+
+    assert (
+        _sample(
+            "finops_http_request_duration_seconds_count",
+            method="GET",
+            route=route,
+            status="200",
+        )
+        == before + 1
+    )
+    assert (
+        _sample("finops_cache_requests_total", cache="cost_frames", result="miss")
+        > misses
+    )
+    assert _sample("finops_rows_scanned_total", provider="AWS") == scanned + 180
+    assert _sample("finops_rows_returned_total", provider="AWS") == returned + 90
+    for stage in ("etl.read", "etl.parse_dates", "etl.derive", "etl.cast", "filter"):
+        assert _sample("finops_stage_duration_seconds_count", stage=stage) > 0
+    assert _sample("finops_stage_duration_seconds_count", stage="serialize.records") > 0
+
+    body = client.get("/metrics").text
+    assert (
+        'finops_http_request_duration_seconds_bucket{le="0.005",method="GET",' in body
+    )
+
+
+def test_unmatched_paths_share_one_label():
+    client.get("/no/such/path")
+    client.get("/another/missing/path")
+    assert (
+        _sample(
+            "finops_http_request_duration_seconds_count",
+            method="GET",
+            route="unmatched",
+            status="404",
+        )
+        >= 2
+    )
+
+
+def test_ingestion_metrics(cost_data, monkeypatch):
+    pages = [
+        [{"provider": "Azure", "date": "2025-04-01", "service": "VM", "cost_usd": 1.0}],
+        [{"provider": "Azure", "date": "2025-04-02", "service": "VM", "cost_usd": 2.0}],
+    ]
+    monkeypatch.setattr(runner, "iter_provider_pages", lambda *args: iter(pages))
+    before = _sample("finops_ingestion_pages_total", provider="Azure")
+    runs = _sample(
+        "finops_ingestion_duration_seconds_count", provider="Azure", status="ok"
+    )
+
+    outcome = asyncio.run(
+        runner.run_provider("Azure", date(2025, 4, 1), date(2025, 4, 2))
+    )
+
+    assert outcome.count == 2
+    assert _sample("finops_ingestion_pages_total", provider="Azure") == before + 2
+    assert (
+        _sample(
+            "finops_ingestion_duration_seconds_count", provider="Azure", status="ok"
+        )
+        == runs + 1
+    )
+
+
+def test_multiprocess_exposition_aggregates_workers(tmp_path):
+    script = (
+        "from app.core import metrics\n"
+        "metrics.INGESTION_PAGES.labels('GCP').inc(3)\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):  # two "workers"
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
+    body = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from app.core import metrics; print(metrics.exposition()[0].decode())",
+        ],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert 'finops_ingestion_pages_total{provider="GCP"} 6.0' in body
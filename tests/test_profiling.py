@@ -0,0 +1,91 @@
+# tests/test_profiling.py
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import profiling as profiling_api
+from app.core import profiling
+from app.core.config import settings
+
+TOKEN = "s3cret"
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_interval_seconds", 0.001)
+    monkeypatch.setattr(profiling, "profiles", profiling.ProfileBuffer(2))
+
+    app = FastAPI()
+    app.add_middleware(profiling_api.ProfilingMiddleware)
+    app.include_router(profiling_api.router)
+
+    @app.get("/slow")
+    def slow():
+        return {"total": busy_work(0.1)}
+
+    return TestClient(app)
+
+
+def test_requests_are_profiled_only_with_the_token(client):
+    assert "X-Profile-Id" not in client.get("/slow").headers
+    assert (
+        "X-Profile-Id"
+        not in client.get("/slow", headers={"X-Profile-Token": "wrong"}).headers
+    )
+
+    response = client.get("/slow", headers={"X-Profile-Token": TOKEN})
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = client.get("/admin/profiles/", headers={"X-Profile-Token": TOKEN})
+    [summary] = listed.json()
+    assert summary["id"] == int(profile_id)
+    assert summary["path"] == "/slow"
+    assert summary["status"] == 200
+    assert summary["samples"] > 10
+
+    collapsed = client.get(
+        f"/admin/profiles/{profile_id}?format=collapsed",
+        headers={"X-Profile-Token": TOKEN},
+    ).text
+    assert "busy_work (test_profiling.py)" in collapsed
+
+    doc = client.get(
+        f"/admin/profiles/{profile_id}", headers={"X-Profile-Token": TOKEN}
+    ).json()
+    assert doc["$schema"].startswith("https://www.speedscope.app")
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    assert "busy_work" in names
+    for p in doc["profiles"]:
+        assert len(p["samples"]) == len(p["weights"])
+        assert all(0 <= i < len(names) for s in p["samples"] for i in s)
+
+
+def test_admin_routes_need_the_token(client, monkeypatch):
+    assert client.get("/admin/profiles/").status_code == 403
+    monkeypatch.setattr(settings, "profiling_token", "")
+    assert client.get("/admin/profiles/").status_code == 404
+
+
+def test_sample_rate_and_ring_buffer(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    ids = [client.get("/slow").headers["X-Profile-Id"] for _ in range(3)]
+
+    kept = client.get("/admin/profiles/", headers={"X-Profile-Token": TOKEN}).json()
+    assert [str(p["id"]) for p in kept] == ids[:0:-1]  # newest first, 2 kept
+    missing = client.get(
+        f"/admin/profiles/{ids[0]}", headers={"X-Profile-Token": TOKEN}
+    )
+    assert missing.status_code == 404
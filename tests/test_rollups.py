@@ -0,0 +1,68 @@
+# tests/test_rollups.py
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import cost_service, cost_store
+from app.services.ingestion.loader import save
+
+client = TestClient(app)
+
+
+def _summary(**params):
+    response = client.get("/api/v1/costs/summary", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_summary_by_provider_and_month(cost_data):
+    rows = _summary(group_by=["provider", "month"])
+    assert len(rows) == 3 * 3
+    aws_jan = next(
+        r for r in rows if r["provider"] == "AWS" and r["month"] == "2025-01"
+    )
+    # AmazonEC2 costs 1.0/day, AmazonS3 2.0/day
+    assert aws_jan == {
+        "provider": "AWS",
+        "month": "2025-01",
+        "cost_usd": 31 * 3.0,
+        "records": 62,
+    }
+
+    rows = _summary(
+        group_by=["service"],
+        provider="GCP",
+        start_date="2025-02-01",
+        end_date="2025-02-07",
+    )
+    assert rows == [
+        {"service": "BigQuery", "cost_usd": 14.0, "records": 7},
+        {"service": "Compute Engine", "cost_usd": 7.0, "records": 7},
+    ]
+
+
+def test_summary_is_updated_incrementally_on_save(cost_data, monkeypatch):
+    for provider, filename in cost_service.PROVIDER_FILES.items():
+        cost_store.import_csv(str(cost_data / filename), provider)
+    before = {r["provider"]: r["cost_usd"] for r in _summary(group_by=["provider"])}
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("rollup should not be rebuilt from raw rows")
+
+    monkeypatch.setattr(cost_service, "get_provider_cost_frame", no_rebuild)
+    save(
+        [
+            {
+                "provider": "Azure",
+                "date": "2025-04-01",
+                "service": "Storage",
+                "cost_usd": 5.0,
+            }
+        ]
+    )
+
+    after = {r["provider"]: r["cost_usd"] for r in _summary(group_by=["provider"])}
+    assert after["Azure"] == before["Azure"] + 5.0
+    assert after["AWS"] == before["AWS"]
+    week = _summary(group_by=["week"], start_date="2025-04-01")
+    assert week == [{"week": "2025-03-31", "cost_usd": 5.0, "records": 1}]
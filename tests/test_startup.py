@@ -0,0 +1,56 @@
+# tests/test_startup.py
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import cost_service
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+PROBE = """
+import json, sys
+from app.main import app
+sdks = ("boto3", "botocore", "azure.identity", "azure.mgmt", "google.cloud.bigquery")
+print(json.dumps({
+    "sdks": sorted(m for m in sys.modules if m.startswith(sdks)),
+    "paths": sorted({r.path for r in app.routes}),
+}))
+"""
+
+
+def _probe(**env):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def test_import_loads_no_cloud_sdk():
+    result = _probe()
+    assert result["sdks"] == []
+    assert "/api/v1/ingestion/" in result["paths"]
+
+
+def test_read_only_replica_has_no_ingestion_routes():
+    result = _probe(API_READ_ONLY="true")
+    assert not [p for p in result["paths"] if p.startswith("/api/v1/ingestion")]
+    assert "/api/v1/costs/" in result["paths"]
+
+
+def test_missing_data_dir_fails_at_startup(tmp_path, monkeypatch):
+    monkeypatch.setattr(cost_service, "DATA_DIR", str(tmp_path / "missing"))
+    with pytest.raises(RuntimeError, match="Data folder not found"):
+        with TestClient(app):
+            pass
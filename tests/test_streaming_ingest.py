@@ -0,0 +1,86 @@
+# tests/test_streaming_ingest.py
+
+import asyncio
+from datetime import date, timedelta
+
+from app.services import cost_service
+from app.services.ingestion import loader
+from app.services.ingestion.base import BaseIngest
+from app.services.ingestion.normalizer import normalize_pages
+from scripts.ingestion import fetch_azure
+
+
+class PagedIngest(BaseIngest):
+    provider = "AWS"
+
+    def __init__(self, pages, rows):
+        self.pages = pages
+        self.rows = rows
+        self.served = 0
+
+    def iter_pages(self, start, end):
+        for p in range(self.pages):
+            self.served += 1
+            yield [
+                {
+                    "provider": self.provider,
+                    "date": start + timedelta(days=p),
+                    "service": f"svc-{i}",
+                    "cost_usd": 1.0,
+                }
+                for i in range(self.rows)
+            ]
+
+
+def test_fetch_flattens_pages():
+    records = PagedIngest(pages=3, rows=2).fetch(date(2025, 4, 1), date(2025, 4, 3))
+    assert len(records) == 6
+
+
+def test_aiter_pages_pulls_lazily():
+    ingest = PagedIngest(pages=5, rows=1)
+
+    async def first_two():
+        seen = []
+        async for page in ingest.aiter_pages(date(2025, 4, 1), date(2025, 4, 5)):
+            seen.append(page)
+            if len(seen) == 2:
+                break
+        return seen
+
+    assert len(asyncio.run(first_two())) == 2
+    assert ingest.served == 2
+
+
+def test_save_stream_writes_batches_as_pages_arrive(cost_data, monkeypatch):
+    ingest = PagedIngest(pages=4, rows=3)
+    saved = []
+    real_save = loader.save
+
+    def save(records, **kwargs):
+        # each batch is written before later pages are fetched
+        saved.append((len(records), ingest.served))
+        real_save(records, **kwargs)
+
+    monkeypatch.setattr(loader, "save", save)
+    pages = normalize_pages(ingest.iter_pages(date(2025, 4, 1), date(2025, 4, 4)))
+    assert loader.save_stream(pages, batch_rows=5) == 12
+
+    assert saved == [(6, 2), (6, 4)]
+    df = cost_service.get_provider_cost_frame(
+        "AWS", start_date=date(2025, 4, 1), end_date=date(2025, 4, 30)
+    )
+    assert len(df) == 12
+
+
+def test_fetch_scripts_replace_the_provider(cost_data, capsys):
+    loader.save_stream([[{"provider": "Azure", "date": "2025-08-01", "cost_usd": 1.0}]])
+    ingest = PagedIngest(pages=2, rows=3)
+    ingest.provider = "Azure"
+
+    assert fetch_azure.main(ingest) == 6
+
+    assert not (cost_data / "azure_2025.csv").exists()
+    df = cost_service.get_provider_cost_frame("Azure")
+    assert len(df) == 6  # neither the CSV nor the August row survive
+    assert "the Parquet store" in capsys.readouterr().out
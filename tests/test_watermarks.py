@@ -0,0 +1,101 @@
+# tests/test_watermarks.py
+
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.ingestion import jobs as jobs_module
+from app.services.ingestion import runner, watermarks
+from app.services.ingestion.loader import save
+
+
+def _run_job(manager, **kwargs):
+    job = manager.submit(**kwargs)
+    for _ in range(250):
+        job = manager.get(job["id"])
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(job)
+
+
+def test_incremental_range_uses_watermark_and_lookback(cost_data, monkeypatch):
+    monkeypatch.setattr(settings, "ingestion_lookback_days", 3)
+    monkeypatch.setattr(settings, "ingestion_initial_days", 10)
+    today = date(2025, 3, 20)
+
+    assert watermarks.incremental_range("AWS", today) == (
+        date(2025, 3, 10),
+        date(2025, 3, 19),
+    )
+    watermarks.advance("AWS", date(2025, 3, 15))
+    assert not watermarks.advance("AWS", date(2025, 3, 1))
+    # the last 3 ingested days are re-fetched for restatements
+    assert watermarks.incremental_range("AWS", today) == (
+        date(2025, 3, 13),
+        date(2025, 3, 19),
+    )
+
+
+def test_watermark_stops_at_first_failed_window(cost_data, monkeypatch):
+    def fetch(provider, start, end):
+        if provider == "GCP" and start.month == 2:
+            raise RuntimeError("throttled")
+        return [[{"provider": provider, "date": start, "service": "x", "cost_usd": 1}]]
+
+    monkeypatch.setattr(runner, "iter_provider_pages", fetch)
+    manager = jobs_module.JobManager(max_workers=3, history=10)
+    job = _run_job(
+        manager,
+        start=date(2025, 1, 1),
+        end=date(2025, 3, 31),
+        providers=["AWS", "GCP"],
+    )
+
+    assert job["status"] == "partial"
+    assert watermarks.load() == {
+        "AWS": date(2025, 3, 31),
+        "GCP": date(2025, 1, 31),
+    }
+
+
+def test_incremental_job_fetches_from_watermark(cost_data, monkeypatch):
+    yesterday = watermarks.last_complete_day()
+    watermarks.advance("Azure", yesterday - timedelta(days=5))
+    monkeypatch.setattr(settings, "ingestion_lookback_days", 2)
+    calls = []
+
+    def fetch(provider, start, end):
+        calls.append((provider, start, end))
+        return iter(())
+
+    monkeypatch.setattr(runner, "iter_provider_pages", fetch)
+    manager = jobs_module.JobManager(max_workers=3, history=10)
+    job = _run_job(manager, providers=["Azure"])
+
+    assert job["status"] == "ok"
+    assert min(c[1] for c in calls) == yesterday - timedelta(days=5 + 1)
+    assert max(c[2] for c in calls) == yesterday
+    assert watermarks.get("Azure") == yesterday
+
+
+def test_csv_save_upserts(cost_data, monkeypatch):
+    monkeypatch.setattr(settings, "cost_storage", "csv")
+    rows = [
+        {"provider": "AWS", "date": "2025-01-01", "service": "S3", "cost_usd": 1.0},
+        {"provider": "AWS", "date": "2025-01-02", "service": "S3", "cost_usd": 1.0},
+    ]
+    save(rows, filename="out.csv")
+    save(
+        [
+            dict(rows[1], cost_usd=4.0),
+            {"provider": "AWS", "date": "2025-01-03", "service": "S3", "cost_usd": 2},
+        ],
+        filename="out.csv",
+    )
+
+    df = pd.read_csv(cost_data / "out.csv")
+    assert df["date"].tolist() == ["2025-01-01", "2025-01-02", "2025-01-03"]
+    assert df["cost_usd"].tolist() == [1.0, 4.0, 2.0]